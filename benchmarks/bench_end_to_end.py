@@ -0,0 +1,215 @@
+"""End-to-end throughput benchmark of Yad2MultiSearchScraper.run_multi_search.
+
+Runs the real scraper against the local replay server and reports listings/sec,
+per-page latency percentiles, CPU spent parsing vs. time spent on the network,
+time to the first new-listing notification, and peak RSS.
+
+Usage:
+    python benchmarks/bench_end_to_end.py                         # synthetic site
+    python benchmarks/bench_end_to_end.py --fixtures DIR          # recorded with HTTP_RECORD_DIR
+    python benchmarks/bench_end_to_end.py --latency-ms 80 --error-rate 0.02 --workers 8
+    python benchmarks/bench_end_to_end.py --stream                # pipelined run_streaming
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fixtures import write_synthetic_fixtures
+from utils.replay_server import ReplayServer, point_scraper_at
+from config.search_configs import SEARCH_CONFIGURATIONS
+from config.settings import settings
+from notifications.telegram_notifier import DELIVERY_MODES, TelegramNotifier
+from utils.http_client import HttpClient
+from utils.rate_limiter import HostRateLimiters
+
+
+class TimedHttpClient(HttpClient):
+    """HttpClient that records wall time per request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.bytes_received = 0
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        start = time.perf_counter()
+        response = super().request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.latencies.append(elapsed)
+            self.bytes_received += len(response.content)
+        return response
+
+
+class ParseTimer:
+    """Wraps the scraper's __NEXT_DATA__ extractor to sum per-thread CPU time"""
+
+    def __init__(self, extract):
+        self.extract = extract
+        self.cpu_seconds = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, content):
+        start = time.thread_time()
+        try:
+            return self.extract(content)
+        finally:
+            elapsed = time.thread_time() - start
+            with self._lock:
+                self.cpu_seconds += elapsed
+                self.calls += 1
+
+
+class RecordingNotifier(TelegramNotifier):
+    """TelegramNotifier that records Bot API calls instead of making them"""
+
+    def __init__(self, delivery):
+        self.chat_id = 'benchmark'
+        self.delivery = delivery
+        self.album_size = settings.telegram_album_size
+        self.outbox = None
+        self._connection_ok = True
+        self.sent_at = []
+        self.api_calls = {}
+
+    def _post_api(self, method, data):
+        self.sent_at.append(time.perf_counter())
+        self.api_calls[method] = self.api_calls.get(method, 0) + 1
+        return True
+
+    def send_error_notification(self, error_message):
+        return True
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='Recorded fixture directory (default: generate a synthetic site)')
+    parser.add_argument('--pages', type=int, default=3, help='Synthetic feed pages per search')
+    parser.add_argument('--listings-per-page', type=int, default=24)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=settings.scraper.max_workers)
+    parser.add_argument('--rps', type=float, default=0.0, help='Per-host request rate (0 = unlimited)')
+    parser.add_argument('--delivery', choices=DELIVERY_MODES, default=settings.telegram_delivery,
+                        help='Telegram delivery mode whose API calls are counted')
+    parser.add_argument('--stream', action='store_true', help='Use run_streaming instead of run_multi_search')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='Consecutive runs sharing tracker and caches (run 2+ is warm)')
+    parser.add_argument('--json', help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture_dir = args.fixtures
+        if not fixture_dir:
+            fixture_dir = os.path.join(work_dir, 'fixtures')
+            write_synthetic_fixtures(fixture_dir, SEARCH_CONFIGURATIONS,
+                                     pages=args.pages, listings_per_page=args.listings_per_page)
+
+        server = ReplayServer(fixture_dir, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              error_rate=args.error_rate, seed=1)
+        point_scraper_at(server.start())
+
+        # Isolated state: fresh tracker, listing store and response cache, no Telegram
+        settings.database_path = os.path.join(work_dir, 'seen_properties.db')
+        settings.scraper.listing_store_path = os.path.join(work_dir, 'listing_store.json')
+        settings.scraper.response_cache_path = os.path.join(work_dir, 'response_cache.db')
+        settings.scraper.history_path = os.path.join(work_dir, 'history')
+
+        import scripts.scraper as scraper_module
+        parse_timer = ParseTimer(scraper_module.extract_next_data)
+        scraper_module.extract_next_data = parse_timer
+
+        reports = []
+        for run in range(1, args.runs + 1):
+            http_client = TimedHttpClient(
+                max_retries=settings.http.max_retries,
+                backoff_factor=0.05,
+                default_pool_size=max(args.workers, settings.scraper.feed_workers),
+                rate_limiters=HostRateLimiters(default_limits=(args.rps, args.rps)),
+            )
+            scraper = scraper_module.Yad2MultiSearchScraper(
+                SEARCH_CONFIGURATIONS, enable_notifications=False,
+                max_workers=args.workers, http_client=http_client
+            )
+            # Diff against the tracker and "notify" as main.py would, without Telegram
+            notifier = RecordingNotifier(args.delivery)
+            scraper.notifier = notifier
+            scraper.enable_notifications = True
+            parse_timer.cpu_seconds = 0.0
+            errors_before = server.errors_injected
+
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            df = scraper.run_streaming() if args.stream else scraper.run_multi_search()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            latencies = http_client.latencies
+            reports.append({
+                'run': run,
+                'mode': 'streaming' if args.stream else 'batch',
+                'listings': len(df),
+                'requests': len(latencies),
+                'errors_injected': server.errors_injected - errors_before,
+                'wall_seconds': wall,
+                'listings_per_second': len(df) / wall if wall else 0.0,
+                'notifications': len(notifier.sent_at),
+                'telegram_api_calls': notifier.api_calls,
+                'first_notification_seconds': notifier.sent_at[0] - wall_start if notifier.sent_at else None,
+                'page_latency_p50_ms': percentile(latencies, 0.50) * 1000,
+                'page_latency_p99_ms': percentile(latencies, 0.99) * 1000,
+                'network_seconds': sum(latencies),
+                'parse_cpu_seconds': parse_timer.cpu_seconds,
+                'process_cpu_seconds': cpu,
+                'bytes_received': http_client.bytes_received,
+                'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            })
+        server.stop()
+
+    for report in reports:
+        print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+def print_report(report):
+    print("\n" + "=" * 60)
+    print(f"END-TO-END BENCHMARK - run {report['run']} ({report['mode']})")
+    print("=" * 60)
+    print(f"Listings scraped:     {report['listings']:,} in {report['wall_seconds']:.2f}s "
+          f"({report['listings_per_second']:.1f} listings/s)")
+    print(f"HTTP requests:        {report['requests']:,} ({report['errors_injected']} injected errors)")
+    if report['first_notification_seconds'] is not None:
+        calls = ", ".join(f"{count} {method}" for method, count in report['telegram_api_calls'].items())
+        print(f"Notifications:        {calls}; first after {report['first_notification_seconds']:.2f}s")
+    else:
+        print(f"Notifications:        none (no new listings)")
+    print(f"Page latency:         p50 {report['page_latency_p50_ms']:.1f} ms, p99 {report['page_latency_p99_ms']:.1f} ms")
+    print(f"Network (summed):     {report['network_seconds']:.2f}s, {report['bytes_received'] / 1e6:.1f} MB")
+    print(f"Parse CPU:            {report['parse_cpu_seconds']:.2f}s of {report['process_cpu_seconds']:.2f}s process CPU")
+    print(f"Peak RSS:             {report['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
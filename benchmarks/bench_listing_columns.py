@@ -0,0 +1,77 @@
+"""Memory of the columnar listing accumulator vs. list-of-dicts -> DataFrame.
+
+Usage:
+    python benchmarks/bench_listing_columns.py --listings 50000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fixtures import make_listing_data
+from utils.field_extractor import extract_listing
+from utils.listing_columns import ListingColumns
+
+
+def make_cache(count):
+    """Stand-in for scraped_listings: one property_details dict per token"""
+    rng = random.Random(7)
+    return [
+        extract_listing(make_listing_data(f"tok{i:06d}", rng), link=f"https://www.yad2.co.il/realestate/item/tok{i:06d}")
+        for i in range(count)
+    ]
+
+
+def build_with_dicts(cache):
+    """What scrape_listings_pages used to do: copy each cached dict, then DataFrame it"""
+    rows = []
+    for details in cache:
+        row = details.copy()
+        row['found_in_searches'] = ['Elevator']
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def build_with_columns(cache):
+    columns = ListingColumns()
+    for details in cache:
+        columns.append(details, found_in_searches=['Elevator'])
+    return columns.to_frame()
+
+
+def measure(build, cache):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = build(cache)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frame_bytes = df.memory_usage(deep=True).sum()
+    return elapsed, peak, frame_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.listings:,} scraped listings...")
+    cache = make_cache(args.listings)
+
+    print(f"{'':>14} {'build time':>12} {'peak alloc':>12} {'DataFrame size':>16}")
+    for name, build in (('list-of-dicts', build_with_dicts), ('columnar', build_with_columns)):
+        elapsed, peak, frame_bytes = measure(build, cache)
+        print(f"{name:>14} {elapsed:>11.2f}s {peak / 2**20:>10.1f}MB {frame_bytes / 2**20:>14.1f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Compare per-row new-property detection against the vectorized diff + batched commit.
+
+Usage:
+    python benchmarks/bench_new_property_detection.py --rows 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.property_tracker import PropertyTracker
+
+
+def make_frame(rows, seen_fraction=0.5):
+    """Scraped-properties frame where seen_fraction of the IDs are already tracked"""
+    frame = pd.DataFrame({
+        'listing_id': [f"tok{i:07d}" for i in range(rows)],
+        'rent': [4500 + (i % 80) * 50 for i in range(rows)],
+        'city': 'תל אביב יפו',
+        'neighborhood': [f"neighborhood-{i % 40}" for i in range(rows)],
+        'rooms': [3 + (i % 4) * 0.5 for i in range(rows)],
+        'sqm': [60 + i % 60 for i in range(rows)],
+        'link': [f"https://www.yad2.co.il/realestate/item/tok{i:07d}" for i in range(rows)],
+    })
+    seen_ids = frame['listing_id'].iloc[:int(rows * seen_fraction)]
+    return frame, seen_ids
+
+
+def seeded_tracker(directory, name, seen_ids):
+    tracker = PropertyTracker(os.path.join(directory, f"{name}.db"))
+    tracker.add_properties((property_id, None) for property_id in seen_ids)
+    return tracker
+
+
+def per_row(tracker, frame):
+    """Detection as _handle_notifications used to do it"""
+    new_properties = []
+    for _, property_data in frame.iterrows():
+        property_id = property_data['listing_id']
+        if not tracker.property_exists(property_id):
+            new_properties.append(property_data)
+            tracker.add_property(property_id, property_data.to_dict())
+    return len(new_properties)
+
+
+def vectorized(tracker, frame):
+    """Detection as _handle_notifications does it now"""
+    new_properties = tracker.get_new_properties(frame).drop_duplicates('listing_id')
+    tracker.mark_properties_as_seen(new_properties)
+    return len(new_properties)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--per-row-limit', type=int, default=10_000,
+                        help='Time the per-row path on at most this many rows and extrapolate')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            frame, seen_ids = make_frame(rows)
+
+            tracker = seeded_tracker(directory, f"vectorized-{rows}", seen_ids)
+            start = time.perf_counter()
+            found = vectorized(tracker, frame)
+            vectorized_seconds = time.perf_counter() - start
+            tracker.close()
+
+            sample_rows = min(rows, args.per_row_limit)
+            sample, sample_seen = make_frame(sample_rows)
+            tracker = seeded_tracker(directory, f"per-row-{rows}", sample_seen)
+            start = time.perf_counter()
+            per_row(tracker, sample)
+            per_row_seconds = (time.perf_counter() - start) * rows / sample_rows
+            tracker.close()
+
+            note = f" (extrapolated from {sample_rows:,} rows)" if sample_rows < rows else ""
+            print(f"{rows:>8,} rows, {found:,} new")
+            print(f"    per-row:    {per_row_seconds:8.3f} s{note}")
+            print(f"    vectorized: {vectorized_seconds:8.3f} s")
+            print(f"    speedup:    {per_row_seconds / vectorized_seconds:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Compare the byte-level __NEXT_DATA__ extractor against the BeautifulSoup path.
+
+Usage:
+    python benchmarks/bench_next_data.py                      # synthetic item pages
+    python benchmarks/bench_next_data.py --fixtures DIR       # saved .html pages
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fixtures import load_fixture_pages, make_item_page
+from utils.next_data import extract_next_data
+
+
+def parse_with_beautifulsoup(content):
+    """The extraction path the scraper used before utils.next_data"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode('utf-8'), 'html.parser')
+    script_tag = soup.find('script', {'id': '__NEXT_DATA__'})
+    return json.loads(script_tag.string)
+
+
+def time_parser(parse, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='Directory of saved item pages (*.html)')
+    parser.add_argument('--pages', type=int, default=20, help='Synthetic pages to generate')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = load_fixture_pages(args.fixtures)
+    else:
+        pages = [make_item_page(f"bench{i:04d}", seed=i) for i in range(args.pages)]
+
+    if not pages:
+        print("No fixture pages found")
+        return 1
+
+    # Both paths must agree before timing them
+    for page in pages:
+        assert extract_next_data(page) == parse_with_beautifulsoup(page)
+
+    total_kb = sum(len(page) for page in pages) / 1024
+    print(f"Pages: {len(pages)} ({total_kb:,.0f} KB total)")
+
+    results = {
+        'beautifulsoup': time_parser(parse_with_beautifulsoup, pages, args.repeat),
+        'next_data': time_parser(extract_next_data, pages, args.repeat),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>14}: {seconds * 1000 / len(pages):8.2f} ms/page")
+    print(f"Speedup: {results['beautifulsoup'] / results['next_data']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Startup overhead: import time and a full no-new-listings run in a fresh process.
+
+Each measured run is a new interpreter that imports the scraper, builds
+Yad2MultiSearchScraper with notifications on, and runs run_multi_search against
+a zero-latency local replay where every listing is already known, so what is
+left is the fixed cost of a run.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import time
+
+_process_start = time.perf_counter()
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def child(base_url):
+    """One scraper run inside this process; prints its phase timings as JSON"""
+    import contextlib
+    import io
+
+    imports_start = time.perf_counter()
+    from benchmarks.bench_end_to_end import RecordingNotifier
+    from utils.replay_server import point_scraper_at
+    from config.search_configs import SEARCH_CONFIGURATIONS
+    from scripts.scraper import Yad2MultiSearchScraper
+    imported = time.perf_counter()
+    pandas_at_import = 'pandas' in sys.modules
+
+    point_scraper_at(base_url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper = Yad2MultiSearchScraper(SEARCH_CONFIGURATIONS, enable_notifications=True)
+        constructed = time.perf_counter()
+        # Telegram is replaced after construction, so a connection check in __init__ would still show up above
+        scraper.notifier = RecordingNotifier('digest')
+        df = scraper.run_multi_search()
+        finished = time.perf_counter()
+        scraper.close()
+
+    print(json.dumps({
+        'interpreter_seconds': imports_start - _process_start,
+        'import_seconds': imported - imports_start,
+        'construct_seconds': constructed - imported,
+        'run_seconds': finished - constructed,
+        'listings': len(df),
+        'notifications': len(scraper.notifier.sent_at),
+        'pandas_at_import': pandas_at_import,
+    }))
+
+
+def run_child(base_url, env):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', base_url],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    report['process_seconds'] = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=2, help='Synthetic feed pages per search')
+    parser.add_argument('--child', metavar='BASE_URL', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return 0
+
+    from benchmarks.fixtures import write_synthetic_fixtures
+    from utils.replay_server import ReplayServer
+    from config.search_configs import SEARCH_CONFIGURATIONS
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture_dir = os.path.join(work_dir, 'fixtures')
+        write_synthetic_fixtures(fixture_dir, SEARCH_CONFIGURATIONS, pages=args.pages, listings_per_page=24)
+        server = ReplayServer(fixture_dir)
+        base_url = server.start()
+
+        env = dict(
+            os.environ,
+            DATABASE_PATH=os.path.join(work_dir, 'seen_properties.db'),
+            LISTING_STORE_PATH=os.path.join(work_dir, 'listing_store.json'),
+            RESPONSE_CACHE_PATH=os.path.join(work_dir, 'response_cache.db'),
+            HISTORY_STORE_PATH=os.path.join(work_dir, 'history'),
+            TELEGRAM_QUEUE_PATH=os.path.join(work_dir, 'outbound_queue.db'),
+            TELEGRAM_BOT_TOKEN='benchmark', TELEGRAM_CHAT_ID='benchmark',
+            REQUEST_DELAY='0',
+        )
+        warm = run_child(base_url, env)  # marks every listing as seen
+        reports = [run_child(base_url, env) for _ in range(args.runs)]
+        server.stop()
+
+    baseline = statistics.median(
+        _timed([sys.executable, '-c', 'pass']) for _ in range(args.runs)
+    )
+
+    def median(key):
+        return statistics.median(report[key] for report in reports)
+
+    print("\n" + "=" * 60)
+    print(f"STARTUP BENCHMARK - median of {args.runs} fresh processes")
+    print("=" * 60)
+    print(f"Warm-up run:          {warm['listings']} listings, {warm['notifications']} notifications")
+    print(f"Measured runs:        {reports[-1]['listings']} listings, {reports[-1]['notifications']} notifications")
+    print(f"Bare interpreter:     {baseline * 1000:.0f} ms")
+    print(f"Import scraper:       {median('import_seconds') * 1000:.0f} ms "
+          f"(pandas loaded at import: {reports[-1]['pandas_at_import']})")
+    print(f"Construct scraper:    {median('construct_seconds') * 1000:.0f} ms")
+    print(f"No-new-listings run:  {median('run_seconds') * 1000:.0f} ms")
+    print(f"Whole process:        {median('process_seconds') * 1000:.0f} ms")
+    return 0
+
+
+def _timed(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Synthetic Yad2-shaped pages for benchmarks that must run without network access"""
+import json
+import os
+import random
+import sys
+from typing import Dict, List
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.http_recorder import ResponseRecorder, fixture_key
+
+
+def _filler_markup(size_kb: int, rng: random.Random) -> str:
+    """Markup roughly the size of a real Yad2 page's rendered body"""
+    blocks = []
+    size = 0
+    while size < size_kb * 1024:
+        block = (
+            f'<div class="item-{rng.randint(0, 999)}" data-nagish="feed-item">'
+            f'<span class="price">₪{rng.randint(3000, 12000):,}</span>'
+            f'<a href="/realestate/item/{rng.getrandbits(32):x}">דירה להשכרה</a></div>'
+        )
+        blocks.append(block)
+        size += len(block)
+    return "\n".join(blocks)
+
+
+def make_listing_data(token: str, rng: random.Random) -> Dict:
+    """Item-page listing payload with the fields scrape_listing_page reads"""
+    return {
+        'token': token,
+        'adNumber': rng.randint(10_000_000, 99_999_999),
+        'price': rng.randrange(4500, 8500, 50),
+        'propertyTax': rng.randrange(600, 1400, 10),
+        'houseCommittee': rng.randrange(0, 500, 10),
+        'dates': {'createdAt': '2025-10-01T10:00:00', 'updatedAt': '2025-10-15T12:00:00'},
+        'address': {
+            'city': {'text': 'תל אביב יפו'},
+            'neighborhood': {'text': rng.choice(['הצפון הישן', 'לב העיר', 'פלורנטין', 'נווה צדק'])},
+            'street': {'text': rng.choice(['דיזנגוף', 'אבן גבירול', 'שינקין', 'בוגרשוב'])},
+            'house': {'floor': rng.randint(0, 8), 'number': rng.randint(1, 200)},
+            'coords': {'lat': 32.06 + rng.random() / 50, 'lon': 34.77 + rng.random() / 50},
+        },
+        'additionalDetails': {
+            'roomsCount': rng.choice([3, 3.5, 4, 4.5]),
+            'squareMeter': rng.randint(60, 120),
+            'buildingTopFloor': rng.randint(3, 12),
+            'propertyCondition': {'text': 'משופץ'},
+            'entranceDate': '2025-11-01T00:00:00',
+            'property': {'text': 'דירה'},
+            'isLongTermContract': rng.random() < 0.5,
+        },
+        'inProperty': {
+            'includeElevator': rng.random() < 0.7,
+            'includeParking': rng.random() < 0.3,
+            'includeBalcony': rng.random() < 0.8,
+            'includeSecurityRoom': rng.random() < 0.4,
+            'includeAirconditioner': True,
+            'includeBoiler': True,
+            'isRenovated': rng.random() < 0.6,
+            'isPetsAllowed': rng.random() < 0.5,
+        },
+        'metaData': {
+            'description': 'דירה מרווחת ומוארת ' * rng.randint(5, 40),
+            'searchText': 'דירה להשכרה בתל אביב',
+            'images': [f'https://img.yad2.co.il/Pic/{token}/{i}.jpeg' for i in range(rng.randint(3, 15))],
+            'videos': [],
+        },
+        'furnitureInfo': '',
+        'tags': [{'name': 'משופצת', 'id': 1}],
+    }
+
+
+def make_feed_entry(token: str, rng: random.Random) -> Dict:
+    """Feed entry with the subset of fields the feed pages expose"""
+    listing = make_listing_data(token, rng)
+    return {
+        'token': token,
+        'price': listing['price'],
+        'adType': rng.choice(['private', 'agency']),
+        'dates': listing['dates'],
+        'address': listing['address'],
+        'additionalDetails': {
+            'roomsCount': listing['additionalDetails']['roomsCount'],
+            'squareMeter': listing['additionalDetails']['squareMeter'],
+            'property': listing['additionalDetails']['property'],
+        },
+        'metaData': {'coverImage': listing['metaData']['images'][0], 'images': listing['metaData']['images']},
+        'tags': listing['tags'],
+    }
+
+
+def render_page(next_data: Dict, filler_kb: int = 300, seed: int = 0) -> bytes:
+    """Wrap a __NEXT_DATA__ document in a page of realistic size"""
+    rng = random.Random(seed)
+    payload = json.dumps(next_data, ensure_ascii=False).replace('</', '<\\/')
+    html = (
+        '<!DOCTYPE html><html lang="he" dir="rtl"><head><meta charset="utf-8">'
+        '<title>יד2 - נדל"ן</title>'
+        + ''.join(f'<link rel="preload" href="/_next/static/chunks/{i}.js" as="script">' for i in range(40))
+        + '</head><body><div id="__next">'
+        + _filler_markup(filler_kb, rng)
+        + '</div>'
+        + f'<script id="__NEXT_DATA__" type="application/json">{payload}</script>'
+        + ''.join(f'<script src="/_next/static/chunks/{i}.js" defer></script>' for i in range(40))
+        + '</body></html>'
+    )
+    return html.encode('utf-8')
+
+
+def make_item_page(token: str, seed: int = 0) -> bytes:
+    rng = random.Random(f"{token}-{seed}")
+    listing = make_listing_data(token, rng)
+    next_data = {'props': {'pageProps': {'dehydratedState': {'queries': [
+        {'state': {'data': {'user': {}}}},
+        {'state': {'data': listing}},
+    ]}}}}
+    return render_page(next_data, seed=seed)
+
+
+def make_feed_page(tokens: List[str], seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    entries = [make_feed_entry(token, rng) for token in tokens]
+    third = max(1, len(entries) // 3)
+    feed = {
+        'private': entries[:third],
+        'platinum': entries[third:2 * third],
+        'agency': entries[2 * third:],
+    } if entries else {'private': [], 'platinum': [], 'agency': []}
+    return render_page({'props': {'pageProps': {'feed': feed}}}, filler_kb=150, seed=seed)
+
+
+def load_fixture_pages(directory: str) -> List[bytes]:
+    """Load saved HTML pages (e.g. recorded item pages) from a directory"""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(directory, name), 'rb') as f:
+                pages.append(f.read())
+    return pages
+
+
+def write_synthetic_fixtures(directory: str, search_configs: List[Dict],
+                             pages: int = 3, listings_per_page: int = 24, overlap: float = 0.3) -> int:
+    """
+    Record a synthetic site for the replay server
+
+    Each search config gets `pages` feed pages followed by an empty page; a
+    fraction `overlap` of each page's tokens is shared with the previous config.
+
+    Returns:
+        Number of unique item pages written
+    """
+    recorder = ResponseRecorder(directory)
+    rng = random.Random(42)
+    tokens = set()
+    previous_tokens: List[str] = []
+
+    for config_index, config in enumerate(search_configs):
+        config_tokens = []
+        for page in range(1, pages + 2):
+            if page <= pages:
+                shared = rng.sample(previous_tokens, min(len(previous_tokens), int(listings_per_page * overlap)))
+                fresh = [f"c{config_index}p{page}n{i:02d}" for i in range(listings_per_page - len(shared))]
+                page_tokens = shared + fresh
+            else:
+                page_tokens = []
+            config_tokens.extend(page_tokens)
+            query = urlencode({**config['params'], 'page': page})
+            recorder.save(fixture_key(f"/realestate/rent?{query}"),
+                          make_feed_page(page_tokens, seed=config_index * 100 + page))
+        tokens.update(config_tokens)
+        previous_tokens = config_tokens
+
+    for token in sorted(tokens):
+        recorder.save(fixture_key(f"/realestate/item/{token}"), make_item_page(token))
+
+    return len(tokens)
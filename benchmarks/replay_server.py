@@ -0,0 +1,43 @@
+"""Local stand-in for yad2.co.il that replays recorded feed and item pages.
+
+Responses carry an ETag so conditional GETs are answered with 304.
+
+Record fixtures by running the scraper with HTTP_RECORD_DIR set, then:
+
+    python benchmarks/replay_server.py FIXTURE_DIR --port 8765 --latency-ms 80 --error-rate 0.02
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.replay_server import ReplayServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.fixture_dir, host=args.host, port=args.port,
+                          latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, error_status=args.error_status)
+    print(f"Replaying {len(server.index)} recorded responses on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
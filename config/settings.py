@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -14,19 +14,82 @@ class ScraperConfig:
     base_url: str = "https://www.yad2.co.il"
     base_item_url: str = "https://www.yad2.co.il/realestate/item/"
     headers: Dict[str, str] = None
-    request_delay: float = 1.0  # seconds between requests
+    request_delay: float = 1.0  # starting seconds between requests per host (adapts at runtime)
+    max_workers: int = 4  # concurrent item-page fetches
+    feed_workers: int = 3  # search configs paginated concurrently
+    max_pages: int = 5  # feed pages per search ("max_pages" in a config overrides)
+    new_only: bool = False  # stop paging once the feed reaches already-seen listings
+    stop_after_known: int = 10  # consecutive seen listings that end new-only paging
+    requests_per_second: float = 2.0  # ceiling the adaptive per-host rate may grow to
+    query_planner: bool = False  # merge overlapping search configs into wider feed queries
+    planner_feed_flags: Tuple[str, ...] = ()  # amenity flags the feed carries, so the planner may merge across them
+    incremental: bool = True  # reuse stored item pages when the feed entry is unchanged
+    listing_store_path: str = "data/listing_store.json"
+    listing_max_age_hours: float = 24.0  # force a refetch after this long
+    response_cache: bool = True  # on-disk item-page cache with conditional revalidation
+    response_cache_path: str = "data/response_cache.db"
+    response_cache_ttl_hours: float = 72.0
+    response_cache_max_mb: float = 200.0
+    streaming: bool = False  # overlap feed, item-page and notification stages
+    stream_queue_size: int = 32  # bound on each queue between streaming stages
+    stream_notify_window: float = 5.0  # seconds a streamed announcement may wait to share a digest
+    stream_notify_batch: int = 20  # streamed announcements that flush a digest without waiting
+    history: bool = True  # append every run's listings to the Parquet history (needs pyarrow)
+    history_path: str = "data/history"
+    change_detection: bool = True  # price-change, relisting and removal events from stored fingerprints
+    removed_after_runs: int = 2  # full crawls a listing must be missing before it counts as removed
+    cluster_duplicates: bool = True  # collapse one apartment posted under several tokens
+    cluster_distance_m: float = 30.0  # coordinates this close count as the same building
+    cluster_similarity: float = 0.5  # description/photo similarity that marks a duplicate
+    cluster_price_tolerance: float = 0.1  # relative rent difference still counted as the same unit
     
     def __post_init__(self):
         if self.headers is None:
             self.headers = {}
 
 
+@dataclass
+class HttpConfig:
+    """Configuration for the shared pooled HTTP client"""
+    connect_timeout: float = 5.0  # seconds
+    read_timeout: float = 20.0  # seconds
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    default_pool_size: int = 4  # keep-alive connections per host
+    host_pool_sizes: Dict[str, int] = None
+    host_rate_limits: Dict[str, Tuple[float, float]] = None  # host -> (starting, max) requests/sec
+    record_dir: Optional[str] = None  # save feed/item responses here for offline replay
+
+    def __post_init__(self):
+        if self.host_pool_sizes is None:
+            self.host_pool_sizes = {
+                "www.yad2.co.il": 8,
+                "api.telegram.org": 2,
+            }
+        if self.host_rate_limits is None:
+            # Telegram allows about one message per second to the same chat
+            self.host_rate_limits = {
+                "api.telegram.org": (1.0, 1.0),
+            }
+
+
+@dataclass
+class DaemonConfig:
+    """Configuration for the long-running poll daemon"""
+    poll_interval_minutes: float = 10.0  # default per-search interval ("poll_interval_minutes" in a config overrides)
+    poll_jitter: float = 0.2  # randomize each interval by up to this fraction
+    sync_sheets: bool = True  # upsert newly found listings into Google Sheets after each poll
+
+
 @dataclass
 class GoogleSheetsConfig:
     """Configuration for Google Sheets integration"""
     credentials_file: str = "config/credentials.json"
     spreadsheet_name: str = "Yad2 Properties"
     worksheet_name: str = "Properties"
+    spreadsheet_id: Optional[str] = None
+    backend: str = "gspread"  # 'gspread' or 'local' (CSV file stand-in)
+    local_path: str = "data/sheet.csv"
 
 
 @dataclass
@@ -41,6 +104,8 @@ class Settings:
     
     def __init__(self):
         self.scraper = ScraperConfig()
+        self.http = HttpConfig()
+        self.daemon = DaemonConfig()
         self.google_sheets = GoogleSheetsConfig()
         self.database = DatabaseConfig()
         
@@ -58,22 +123,114 @@ class Settings:
             self.google_sheets.worksheet_name = os.getenv('WORKSHEET_NAME')
         if os.getenv('SPREADSHEET_ID'):
             self.google_sheets.spreadsheet_id = os.getenv('SPREADSHEET_ID')
+        if os.getenv('SHEETS_BACKEND'):
+            self.google_sheets.backend = os.getenv('SHEETS_BACKEND')
+        if os.getenv('LOCAL_SHEET_PATH'):
+            self.google_sheets.local_path = os.getenv('LOCAL_SHEET_PATH')
         
         # Scraper settings
         if os.getenv('REQUEST_DELAY'):
             self.scraper.request_delay = float(os.getenv('REQUEST_DELAY'))
+        if os.getenv('SCRAPER_MAX_WORKERS'):
+            self.scraper.max_workers = int(os.getenv('SCRAPER_MAX_WORKERS'))
+        if os.getenv('FEED_WORKERS'):
+            self.scraper.feed_workers = int(os.getenv('FEED_WORKERS'))
+        if os.getenv('MAX_PAGES'):
+            self.scraper.max_pages = int(os.getenv('MAX_PAGES'))
+        if os.getenv('NEW_ONLY_PAGINATION'):
+            self.scraper.new_only = os.getenv('NEW_ONLY_PAGINATION').lower() == 'true'
+        if os.getenv('STOP_AFTER_KNOWN'):
+            self.scraper.stop_after_known = int(os.getenv('STOP_AFTER_KNOWN'))
+        if os.getenv('REQUESTS_PER_SECOND'):
+            self.scraper.requests_per_second = float(os.getenv('REQUESTS_PER_SECOND'))
+        if os.getenv('QUERY_PLANNER'):
+            self.scraper.query_planner = os.getenv('QUERY_PLANNER').lower() == 'true'
+        if os.getenv('PLANNER_FEED_FLAGS'):
+            self.scraper.planner_feed_flags = tuple(
+                flag.strip() for flag in os.getenv('PLANNER_FEED_FLAGS').split(',') if flag.strip()
+            )
+        if os.getenv('INCREMENTAL_SCRAPING'):
+            self.scraper.incremental = os.getenv('INCREMENTAL_SCRAPING').lower() == 'true'
+        if os.getenv('LISTING_STORE_PATH'):
+            self.scraper.listing_store_path = os.getenv('LISTING_STORE_PATH')
+        if os.getenv('LISTING_MAX_AGE_HOURS'):
+            self.scraper.listing_max_age_hours = float(os.getenv('LISTING_MAX_AGE_HOURS'))
+        if os.getenv('RESPONSE_CACHE'):
+            self.scraper.response_cache = os.getenv('RESPONSE_CACHE').lower() == 'true'
+        if os.getenv('RESPONSE_CACHE_PATH'):
+            self.scraper.response_cache_path = os.getenv('RESPONSE_CACHE_PATH')
+        if os.getenv('RESPONSE_CACHE_TTL_HOURS'):
+            self.scraper.response_cache_ttl_hours = float(os.getenv('RESPONSE_CACHE_TTL_HOURS'))
+        if os.getenv('RESPONSE_CACHE_MAX_MB'):
+            self.scraper.response_cache_max_mb = float(os.getenv('RESPONSE_CACHE_MAX_MB'))
+        if os.getenv('STREAMING_MODE'):
+            self.scraper.streaming = os.getenv('STREAMING_MODE').lower() == 'true'
+        if os.getenv('STREAM_QUEUE_SIZE'):
+            self.scraper.stream_queue_size = int(os.getenv('STREAM_QUEUE_SIZE'))
+        if os.getenv('STREAM_NOTIFY_WINDOW'):
+            self.scraper.stream_notify_window = float(os.getenv('STREAM_NOTIFY_WINDOW'))
+        if os.getenv('STREAM_NOTIFY_BATCH'):
+            self.scraper.stream_notify_batch = int(os.getenv('STREAM_NOTIFY_BATCH'))
+        if os.getenv('HISTORY_STORE'):
+            self.scraper.history = os.getenv('HISTORY_STORE').lower() == 'true'
+        if os.getenv('HISTORY_STORE_PATH'):
+            self.scraper.history_path = os.getenv('HISTORY_STORE_PATH')
+        if os.getenv('CHANGE_DETECTION'):
+            self.scraper.change_detection = os.getenv('CHANGE_DETECTION').lower() == 'true'
+        if os.getenv('REMOVED_AFTER_RUNS'):
+            self.scraper.removed_after_runs = int(os.getenv('REMOVED_AFTER_RUNS'))
+        if os.getenv('CLUSTER_DUPLICATES'):
+            self.scraper.cluster_duplicates = os.getenv('CLUSTER_DUPLICATES').lower() == 'true'
+        if os.getenv('CLUSTER_DISTANCE_M'):
+            self.scraper.cluster_distance_m = float(os.getenv('CLUSTER_DISTANCE_M'))
+        if os.getenv('CLUSTER_SIMILARITY'):
+            self.scraper.cluster_similarity = float(os.getenv('CLUSTER_SIMILARITY'))
+        if os.getenv('CLUSTER_PRICE_TOLERANCE'):
+            self.scraper.cluster_price_tolerance = float(os.getenv('CLUSTER_PRICE_TOLERANCE'))
+        
+        # HTTP client settings
+        if os.getenv('HTTP_CONNECT_TIMEOUT'):
+            self.http.connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT'))
+        if os.getenv('HTTP_READ_TIMEOUT'):
+            self.http.read_timeout = float(os.getenv('HTTP_READ_TIMEOUT'))
+        if os.getenv('HTTP_MAX_RETRIES'):
+            self.http.max_retries = int(os.getenv('HTTP_MAX_RETRIES'))
+        if os.getenv('HTTP_RECORD_DIR'):
+            self.http.record_dir = os.getenv('HTTP_RECORD_DIR')
+        
+        # Daemon settings
+        if os.getenv('DAEMON_POLL_INTERVAL_MINUTES'):
+            self.daemon.poll_interval_minutes = float(os.getenv('DAEMON_POLL_INTERVAL_MINUTES'))
+        if os.getenv('DAEMON_POLL_JITTER'):
+            self.daemon.poll_jitter = float(os.getenv('DAEMON_POLL_JITTER'))
+        if os.getenv('DAEMON_SYNC_SHEETS'):
+            self.daemon.sync_sheets = os.getenv('DAEMON_SYNC_SHEETS').lower() == 'true'
         
         # Telegram settings (make sure these are set)
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN', "YOUR_BOT_TOKEN")  # Should not be None
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID', "YOUR_CHAT_ID")      # Should not be None
+        self.telegram_delivery = os.getenv('TELEGRAM_DELIVERY', 'digest')  # individual, digest or albums
+        self.telegram_album_size = int(os.getenv('TELEGRAM_ALBUM_SIZE', '4'))  # photos per album (max 10)
+        self.telegram_queue = os.getenv('TELEGRAM_QUEUE', 'true').lower() == 'true'  # send from a persistent background queue
+        self.telegram_queue_path = os.getenv('TELEGRAM_QUEUE_PATH', 'data/outbound_queue.db')
+        self.telegram_queue_drain_seconds = float(os.getenv('TELEGRAM_QUEUE_DRAIN_SECONDS', '60'))  # wait on exit
 
         # Notification settings
         self.enable_notifications = os.getenv('ENABLE_NOTIFICATIONS', 'true').lower() == 'true'
         self.notify_on_error = os.getenv('NOTIFY_ON_ERROR', 'true').lower() == 'true'
         self.notify_on_new_properties = os.getenv('NOTIFY_ON_NEW_PROPERTIES', 'true').lower() == 'true'
+        # Change events to announce: any of price_drop, price_rise, relisted, removed (empty for none)
+        self.notify_on_changes = [
+            event.strip() for event in os.getenv('NOTIFY_ON_CHANGES', 'price_drop,relisted').split(',') if event.strip()
+        ]
+
+        # Logging and run metrics (Prometheus textfile and/or JSON report, written when a run closes)
+        self.log_level = os.getenv('LOG_LEVEL', 'INFO')  # DEBUG shows per-page and per-listing progress
+        self.metrics_prometheus_path = os.getenv('METRICS_PROMETHEUS_PATH')  # e.g. /var/lib/node_exporter/yad2.prom
+        self.metrics_json_path = os.getenv('METRICS_JSON_PATH')  # e.g. data/run_report.json
 
-        # Database path for property tracking
-        self.database_path = os.getenv('DATABASE_PATH', 'data/seen_properties.json')  # Make sure this path exists or can be created
+        # Database path for property tracking (SQLite; a legacy .json path is migrated automatically)
+        self.database_path = os.getenv('DATABASE_PATH', 'data/seen_properties.db')  # Make sure this path exists or can be created
 
 # Global settings instance
 settings = Settings()
\ No newline at end of file
@@ -1,28 +1,64 @@
-import time
+import argparse
+import logging
 import sys
 import os
 # Add the project root to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from notifications.telegram_notifier import TelegramNotifier
-from src.writers.google_sheets_reader_writer import GoogleSheetsReaderWriter
+from notifications.telegram_notifier import get_telegram_notifier
 from config.settings import settings
 from config.search_configs import SEARCH_CONFIGURATIONS
+from utils.log import configure_logging
+from utils.profiling import RunProfiler, checkpoint, replay_fixtures
 
 from scripts.scraper import Yad2MultiSearchScraper
 
+logger = logging.getLogger(__name__)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Yad2 searches and sync them to Google Sheets")
+    parser.add_argument('--stream', action='store_true', default=settings.scraper.streaming,
+                        help='Notify about each new listing as soon as it is scraped (STREAMING_MODE)')
+    parser.add_argument('--log-level', default=settings.log_level,
+                        help='DEBUG, INFO, WARNING or ERROR (LOG_LEVEL)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the scrape and the sheet upsert (stack samples and memory per stage)')
+    parser.add_argument('--profile-dir', default='data/profile', help='Where --profile writes its reports')
+    parser.add_argument('--profile-top', type=int, default=25, help='Rows in the top-N tables of --profile')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help='Skip tracemalloc snapshots (they slow the run down)')
+    parser.add_argument('--replay', metavar='FIXTURE_DIR',
+                        help='Serve HTTP from saved responses (HTTP_RECORD_DIR) with throwaway state and no notifications')
+    parser.add_argument('--replay-latency-ms', type=float, default=0.0, help='Latency added to replayed responses')
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    
+    replay = replay_fixtures(args.replay, latency_ms=args.replay_latency_ms) if args.replay else None
+    profiler = RunProfiler(args.profile_dir, top_n=args.profile_top,
+                                                  trace_memory=not args.profile_no_memory) if args.profile else None
+    
     # Use the multi-search scraper instead of single scraper
-    scraper = Yad2MultiSearchScraper(SEARCH_CONFIGURATIONS,enable_notifications=True)
+    scraper = Yad2MultiSearchScraper(SEARCH_CONFIGURATIONS, enable_notifications=replay is None)
+    
+    if profiler:
+        profiler.start()
     
     # Run multi-search and get combined dataframe
-    df = scraper.run_multi_search()
+    if args.stream:
+        df = scraper.run_streaming()
+    else:
+        df = scraper.run_multi_search()
+    checkpoint('scraped')
     
     if df.empty:
-        print("No listings found across all searches")
+        logger.warning("⚠️ No listings found across all searches")
+        if profiler:
+            profiler.stop()
+        scraper.close()
         exit(1)
     
-    # Initialize sheets handler
+    # Initialize sheets handler (imported here so runs that stop early skip the Sheets client)
+    from src.writers.google_sheets_reader_writer import GoogleSheetsReaderWriter
     sheets_handler = GoogleSheetsReaderWriter()
     
     # Create backup before updating
@@ -30,30 +66,35 @@ if __name__ == "__main__":
     
     # Perform incremental update (preserves manual columns)
     update_stats = sheets_handler.upsert_listings(df, 'listing_id')
+    if profiler:
+        profiler.stop()
     
     # Send notifications for genuinely new properties
     if not update_stats['new_properties'].empty and settings.notify_on_new_properties:
         if settings.telegram_bot_token and settings.telegram_chat_id:
             try:
-                notifier = TelegramNotifier(bot_token=settings.telegram_bot_token,chat_id=settings.telegram_chat_id)
+                # Same cached notifier the scraper used, so no second connection check
+                notifier = scraper.notifier or get_telegram_notifier()
                 
-                successful_notifications = 0
-                for _, property_data in update_stats['new_properties'].iterrows():
-                    message = notifier.format_property_message(property_data.to_dict())
-                    if notifier.send_message(message):
-                        successful_notifications += 1
-                    time.sleep(1)  # Rate limiting
+                successful_notifications = notifier.notify_new_properties(
+                    update_stats['new_properties'].to_dict('records')
+                )
                 
-                print(f"📱 Sent {successful_notifications}/{len(update_stats['new_properties'])} notifications for new properties")
+                logger.info(f"📱 Sent {successful_notifications}/{len(update_stats['new_properties'])} notifications for new properties")
                 
             except Exception as e:
-                print(f"❌ Error sending notifications: {e}")
+                logger.error(f"❌ Error sending notifications: {e}")
 
     # Get summary including manual column usage
     summary = sheets_handler.get_update_summary()
     manual_summary = sheets_handler.get_manual_columns_summary()
     
-    print(f"✅ Update complete!")
-    print(f"New listings: {update_stats['new']}")
-    print(f"Updated listings: {update_stats['updated']}")
-    print(f"Total listings: {summary['total_listings']}")
+    logger.info("✅ Update complete!")
+    logger.info(f"New listings: {update_stats['new']}")
+    logger.info(f"Updated listings: {update_stats['updated']}")
+    logger.info(f"Total listings: {summary['total_listings']}")
+    
+    # Wait for queued notifications and flush the local stores
+    scraper.close()
+    if replay:
+        replay['server'].stop()
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from utils.http_client import parse_retry_after
+from utils.metrics import get_metrics
+from utils.rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    import requests
+
+
+class OutboundQueue:
+    def __init__(self, queue_path: str = 'data/outbound_queue.db',
+                 per_chat_rate: float = 1.0, global_rate: float = 30.0,
+                 max_attempts: int = 10, max_backoff: float = 300.0):
+        """
+        Initialize a persistent queue of Telegram Bot API calls
+
+        Calls are stored in SQLite before a background worker sends them, so
+        nothing queued is lost if the process exits. Calls are sent in order at
+        no more than per_chat_rate per chat and global_rate overall. On 429 the
+        worker waits the retry_after Telegram asks for. On 5xx or network errors
+        it backs off exponentially. A call is marked failed, and kept, after
+        max_attempts, or straight away on other 4xx errors.
+
+        Args:
+            queue_path: SQLite file holding pending calls
+            per_chat_rate: Messages per second to one chat
+            global_rate: Messages per second across all chats
+            max_attempts: Attempts before a call is marked failed
+            max_backoff: Ceiling in seconds for the retry delay
+        """
+        self.queue_path = queue_path
+        self.per_chat_rate = per_chat_rate
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.global_limiter = RateLimiter(global_rate)
+        self.chat_limiters: Dict[str, RateLimiter] = {}
+        self.sent = 0
+
+        queue_dir = os.path.dirname(self.queue_path)
+        if queue_dir:
+            os.makedirs(queue_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._send = None
+        self._conn = sqlite3.connect(self.queue_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS outbound (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id TEXT,
+                    method TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS outbound_status ON outbound (status, id)')
+
+    def start(self, send: Callable[[str, Dict], requests.Response]):
+        """
+        Start the background worker
+
+        Args:
+            send: Performs one Bot API call, e.g. TelegramNotifier._send_api
+        """
+        if self._thread is not None:
+            return
+        self._send = send
+        self._thread = threading.Thread(target=self._run, name='telegram-outbound', daemon=True)
+        self._thread.start()
+
+    def put(self, method: str, payload: Dict):
+        """Persist a Bot API call for the worker to send"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO outbound (chat_id, method, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)',
+                (str(payload.get('chat_id')), method, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+        self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbound WHERE status = 'pending'").fetchone()[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT status, COUNT(*) FROM outbound GROUP BY status').fetchall())
+        return {'sent': self.sent, 'pending': counts.get('pending', 0), 'failed': counts.get('failed', 0)}
+
+    def _chat_limiter(self, chat_id: str) -> RateLimiter:
+        limiter = self.chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self.chat_limiters[chat_id] = RateLimiter(self.per_chat_rate)
+        return limiter
+
+    def _next_pending(self):
+        """Oldest pending call; later calls wait behind it so messages stay in order"""
+        with self._lock:
+            return self._conn.execute('''
+                SELECT id, chat_id, method, payload, attempts, next_attempt_at
+                FROM outbound WHERE status = 'pending' ORDER BY id LIMIT 1
+            ''').fetchone()
+
+    def _run(self):
+        while not self._stop.is_set():
+            row = None
+            try:
+                row = self._next_pending()
+                if row is None:
+                    self._wakeup.wait(1.0)
+                    self._wakeup.clear()
+                    continue
+                self._process(row)
+            except Exception as e:
+                if self._stop.is_set():
+                    break  # close() shut the database while a call was in flight; it stays pending
+                # One bad call must not stop the worker: count it as a failed attempt and carry on
+                logging.error(f"❌ Telegram queue worker error: {e}", exc_info=True)
+                get_metrics().inc('errors_total', stage='telegram_queue')
+                if row is not None:
+                    try:
+                        self._retry_later(row[0], row[4], f"{type(e).__name__}: {e}")
+                    except sqlite3.Error:
+                        pass  # the database itself failed; the call is attempted again
+                self._stop.wait(1.0)
+
+    def _process(self, row: Tuple):
+        """Send one pending call if it is due and record the outcome"""
+        call_id, chat_id, method, payload, attempts, next_attempt_at = row
+        delay = next_attempt_at - time.time()
+        if delay > 0:
+            self._stop.wait(min(delay, 1.0))
+            return
+
+        try:
+            data = json.loads(payload)
+        except ValueError as e:
+            logging.error(f"Dropping unreadable queued Telegram call {call_id}: {e}")
+            self._mark_failed(call_id, attempts, f"Unreadable payload: {e}")
+            return
+
+        chat_limiter = self._chat_limiter(chat_id)
+        chat_limiter.acquire()
+        self.global_limiter.acquire()
+        try:
+            response = self._send(method, data)
+        except Exception as e:
+            self._retry_later(call_id, attempts, str(e))
+            return
+
+        get_metrics().inc('telegram_api_calls_total', method=method, outcome=response.status_code)
+        if response.status_code == 200:
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM outbound WHERE id = ?', (call_id,))
+            self.sent += 1
+            chat_limiter.record_success()
+        elif response.status_code == 429:
+            # Telegram says how long to wait; the chat limiter holds every call to this chat until then
+            retry_after = parse_retry_after(response)
+            if retry_after is None:
+                retry_after = self._backoff(attempts)
+            chat_limiter.record_throttle(retry_after)
+            # Without a per-chat rate the limiter holds nothing, so the call itself waits
+            delay = 0.0 if chat_limiter.enabled else retry_after
+            self._retry_later(call_id, attempts, response.text[:500], delay=delay)
+        elif response.status_code >= 500:
+            self._retry_later(call_id, attempts, response.text[:500])
+        else:
+            logging.error(f"Telegram rejected queued {method}: {response.text}")
+            self._mark_failed(call_id, attempts + 1, response.text[:500])
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.max_backoff, 2.0 ** attempts)
+
+    def _retry_later(self, call_id: int, attempts: int, error: str, delay: Optional[float] = None):
+        attempts += 1
+        if attempts >= self.max_attempts:
+            logging.error(f"Giving up on queued Telegram call {call_id} after {attempts} attempts: {error}")
+            self._mark_failed(call_id, attempts, error)
+            return
+        if delay is None:
+            delay = self._backoff(attempts)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE outbound SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?',
+                (attempts, time.time() + delay, error, call_id)
+            )
+
+    def _mark_failed(self, call_id: int, attempts: int, error: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbound SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                (attempts, error, call_id)
+            )
+
+    def close(self, timeout: float = 60.0):
+        """
+        Give the worker up to timeout seconds to drain, then stop it
+
+        Calls still pending stay on disk and are sent by the next run. A call
+        in flight when the time runs out stays pending too, so it may be sent
+        twice but is never lost.
+        """
+        if self._thread is not None:
+            deadline = time.monotonic() + timeout
+            while self.pending() and time.monotonic() < deadline:
+                time.sleep(0.1)
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            if self._thread.is_alive():
+                logging.warning("⚠️ Telegram queue worker still busy at shutdown; its call stays queued")
+            self._thread = None
+
+        stats = self.stats()
+        logging.info(f"📨 Telegram queue: {stats['sent']} sent, {stats['pending']} pending, {stats['failed']} failed")
+        with self._lock:
+            self._conn.close()
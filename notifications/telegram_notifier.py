@@ -1,37 +1,100 @@
-import requests
+from __future__ import annotations
+
+import html
 import json
-import pandas as pd
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, List, Dict, Optional, Tuple
 import logging
 from datetime import datetime
 
+from notifications.outbound_queue import OutboundQueue
+from utils.http_client import HttpClient, create_http_client, get_http_client
+from utils.metrics import get_metrics
+
+MESSAGE_LIMIT = 4096  # characters per sendMessage text
+CAPTION_LIMIT = 1024  # characters per photo caption
+MEDIA_GROUP_LIMIT = 10  # photos per sendMediaGroup album
+DELIVERY_MODES = ('individual', 'digest', 'albums')
+CONNECTION_RECHECK_SECONDS = 60.0  # wait after a failed getMe before testing again
+
+if TYPE_CHECKING:
+    import requests
+
+
+def telegram_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units, so emoji count twice)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
 class TelegramNotifier:
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, http_client: Optional[HttpClient] = None,
+                 delivery: str = 'digest', album_size: int = 4, outbox: Optional[OutboundQueue] = None):
         """
         Initialize Telegram notifier
         
         Args:
             bot_token: Bot token from BotFather
             chat_id: Chat ID where messages will be sent
+            http_client: Pooled HTTP client (defaults to the shared one, or with an
+                outbox to a client of its own that does not retry throttled calls)
+            delivery: How notify_new_properties sends a batch: 'individual' (one
+                message per property), 'digest' (properties packed into as few
+                messages as fit) or 'albums' (one photo album per property)
+            album_size: Photos per album in 'albums' delivery (at most 10)
+            outbox: Persistent queue to hand API calls to instead of sending inline
         """
+        if delivery not in DELIVERY_MODES:
+            raise ValueError(f"Unknown Telegram delivery mode: {delivery!r}")
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        if http_client is None:
+            # The outbox retries 429 and 5xx itself; retrying inside the request as well would stall its worker
+            http_client = create_http_client(retry_throttled=False) if outbox else get_http_client()
+        self.http = http_client
+        self.delivery = delivery
+        self.album_size = max(1, min(album_size, MEDIA_GROUP_LIMIT))
+        self.outbox = outbox
         
-        # Test the connection
-        if not self.test_connection():
-            raise ConnectionError("Failed to connect to Telegram API")
+        # The connection is tested on first use, not here, so constructing a notifier costs no round-trip
+        self._connection_ok = False
+        self._connection_retry_at = 0.0
+        self._connection_lock = threading.Lock()
+        
+        if self.outbox:
+            self.outbox.start(self._send_api)
     
     def test_connection(self) -> bool:
         """Test if the bot token and chat ID are valid"""
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url)
+            response = self.http.get(url)
             return response.status_code == 200
         except Exception as e:
             logging.error(f"Telegram connection test failed: {e}")
             return False
     
+    def ensure_connection(self) -> bool:
+        """
+        Test the connection on first use and remember only success
+
+        A failed test is repeated after CONNECTION_RECHECK_SECONDS, so a
+        long-running notifier recovers once Telegram is reachable again. With an
+        outbox, calls are accepted even while the test fails: they wait on disk
+        and the worker sends them once Telegram is back.
+        """
+        if not self._connection_ok:
+            with self._connection_lock:
+                if not self._connection_ok and time.monotonic() >= self._connection_retry_at:
+                    self._connection_ok = self.test_connection()
+                    if not self._connection_ok:
+                        self._connection_retry_at = time.monotonic() + CONNECTION_RECHECK_SECONDS
+                        logging.error(f"Failed to connect to Telegram API - "
+                                      f"{'queueing' if self.outbox else 'skipping'} notifications, "
+                                      f"retrying in {CONNECTION_RECHECK_SECONDS:.0f}s")
+        return self._connection_ok or self.outbox is not None
+    
     def send_message(self, message: str) -> bool:
         """
         Send a text message to the configured chat
@@ -42,25 +105,85 @@ class TelegramNotifier:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            url = f"{self.base_url}/sendMessage"
-            data = {
-                'chat_id': self.chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
+        return self._post_api('sendMessage', {
+            'chat_id': self.chat_id,
+            'text': message,
+            'parse_mode': 'HTML'
+        })
+    
+    def send_photo(self, photo_url: str, caption: str = '') -> bool:
+        """
+        Send a single photo with an HTML caption
+        
+        Args:
+            photo_url: Public URL of the image
+            caption: Caption text (up to 1024 characters)
             
-            response = requests.post(url, data=data)
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return self._post_api('sendPhoto', {
+            'chat_id': self.chat_id,
+            'photo': photo_url,
+            'caption': caption,
+            'parse_mode': 'HTML'
+        })
+    
+    def send_media_group(self, photo_urls: List[str], caption: str = '') -> bool:
+        """
+        Send up to 10 photos as one album, captioned on the first photo
+        
+        Args:
+            photo_urls: Public URLs of the images (2-10)
+            caption: Caption text (up to 1024 characters)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        media = [{'type': 'photo', 'media': url} for url in photo_urls[:MEDIA_GROUP_LIMIT]]
+        if caption:
+            media[0].update(caption=caption, parse_mode='HTML')
+        return self._post_api('sendMediaGroup', {
+            'chat_id': self.chat_id,
+            'media': json.dumps(media)
+        })
+    
+    def _send_api(self, method: str, data: Dict) -> requests.Response:
+        """POST one Bot API call and return the raw response"""
+        return self.http.post(f"{self.base_url}/{method}", data=data)
+    
+    def _post_api(self, method: str, data: Dict) -> bool:
+        """
+        Send one Bot API call, or queue it when an outbox is configured
+        
+        Returns:
+            bool: True on HTTP 200, or once the call is safely queued
+        """
+        metrics = get_metrics()
+        if self.outbox:
+            # Queued even while Telegram is unreachable; the worker retries until it is back
+            self.outbox.put(method, data)
+            metrics.inc('telegram_api_calls_total', method=method, outcome='queued')
+            return True
+        
+        if not self.ensure_connection():
+            return False
+        
+        try:
+            response = self._send_api(method, data)
             
             if response.status_code == 200:
-                logging.info("Message sent successfully to Telegram")
+                logging.debug(f"Telegram {method} sent successfully")
+                metrics.inc('telegram_api_calls_total', method=method, outcome='sent')
                 return True
             else:
-                logging.error(f"Failed to send message: {response.text}")
+                logging.error(f"Failed to {method}: {response.text}")
+                metrics.inc('telegram_api_calls_total', method=method, outcome='rejected')
                 return False
                 
         except Exception as e:
-            logging.error(f"Error sending Telegram message: {e}")
+            logging.error(f"Error calling Telegram {method}: {e}")
+            metrics.inc('telegram_api_calls_total', method=method, outcome='error')
             return False
     
     def format_property_message(self, property_data: Dict) -> str:
@@ -84,19 +207,8 @@ class TelegramNotifier:
         elevator = property_data.get('elevator', None)
         url = property_data.get('link', '')
         
-        # Format price
-        if isinstance(price, (int, float)) and price > 0:
-            price_formatted = f"₪{price:,.0f}"
-        else:
-            price_formatted = "Price not specified"
-        
-        # Format elevator info
-        if elevator is True:
-            elevator_text = "✅ Yes"
-        elif elevator is False:
-            elevator_text = "❌ No"
-        else:
-            elevator_text = "❓ Not specified"
+        price_formatted = self._format_price(price)
+        elevator_text = self._format_elevator(elevator)
         
         # Build message
         message = f"""🏠 <b>New Property Found!</b>
@@ -114,37 +226,197 @@ class TelegramNotifier:
 
         return message
     
+    @staticmethod
+    def _format_price(price) -> str:
+        if isinstance(price, (int, float)) and price > 0:
+            return f"₪{price:,.0f}"
+        return "Price not specified"
+    
+    @staticmethod
+    def _format_elevator(elevator) -> str:
+        if elevator is True:
+            return "✅ Yes"
+        elif elevator is False:
+            return "❌ No"
+        return "❓ Not specified"
+    
+    def format_property_digest_entry(self, property_data: Dict) -> str:
+        """
+        Format a property as a compact block for a digest message
+        
+        Args:
+            property_data: Dictionary containing property information
+            
+        Returns:
+            str: Formatted block (text fields HTML-escaped)
+        """
+        street = html.escape(str(property_data.get('street', 'N/A')))
+        neighborhood = html.escape(str(property_data.get('neighborhood', 'N/A')))
+        url = html.escape(str(property_data.get('link', '')), quote=True)
+        return (
+            f"💰 <b>{self._format_price(property_data.get('rent', 'N/A'))}</b> · "
+            f"{property_data.get('rooms', 'N/A')} rooms · {property_data.get('sqm', 'N/A')} sqm · "
+            f"floor {property_data.get('floor', 'N/A')}\n"
+            f"📍 {street}, {neighborhood}\n"
+            f"🛗 {self._format_elevator(property_data.get('elevator'))} · <a href=\"{url}\">View Property</a>"
+        )
+    
+    def build_digest_messages(self, new_properties: List[Dict]) -> List[Tuple[str, int]]:
+        """
+        Pack properties into as few messages as fit Telegram's 4096-character limit
+        
+        Args:
+            new_properties: List of property dictionaries
+            
+        Returns:
+            List of (message, number of properties in it); the first message is
+            headed with the total count
+        """
+        entries = (self.format_property_digest_entry(property_data) for property_data in new_properties)
+        return self._pack_messages(f"🔔 <b>{len(new_properties)} new properties found!</b>", entries)
+    
+    @staticmethod
+    def _pack_messages(header: str, entries: Iterable[str]) -> List[Tuple[str, int]]:
+        """Join entries under a header, starting a new message whenever the next one would not fit"""
+        messages = []
+        current = header
+        count = 0
+        for entry in entries:
+            if telegram_length(current) + 2 + telegram_length(entry) > MESSAGE_LIMIT:
+                messages.append((current, count))
+                current, count = entry, 1
+            else:
+                current, count = f"{current}\n\n{entry}", count + 1
+        messages.append((current, count))
+        return messages
+    
+    def format_change_entry(self, event: Dict) -> str:
+        """
+        Format a price-change or relisting event as a compact digest block
+        
+        Args:
+            event: Event row from ChangeDetector.detect
+            
+        Returns:
+            str: Formatted block (text fields HTML-escaped)
+        """
+        import pandas as pd  # events come from a DataFrame, so it is already loaded
+        # NaN, NaT and pd.NA from the frame all read as missing; pd.NA would raise in `if change`
+        event = {key: None if pd.api.types.is_scalar(value) and pd.isna(value) else value
+                 for key, value in event.items()}
+        old_price = self._format_price(event.get('old_price'))
+        new_price = self._format_price(event.get('new_price'))
+        change = event.get('price_change')
+        delta = f" ({'+' if change > 0 else '−'}₪{abs(change):,.0f}/month)" if change else ""
+        
+        kind = event.get('event')
+        if kind == 'price_drop':
+            headline = f"📉 <b>{old_price} → {new_price}</b>{delta}"
+        elif kind == 'price_rise':
+            headline = f"📈 <b>{old_price} → {new_price}</b>{delta}"
+        elif kind == 'relisted':
+            if event.get('previous_listing_id') and event.get('previous_listing_id') != event.get('listing_id'):
+                headline = f"🔁 <b>Relisted</b> · was {old_price}, now <b>{new_price}</b>{delta}"
+            else:
+                headline = f"🔁 <b>Back on the market</b> · <b>{new_price}</b>"
+        elif kind == 'removed':
+            return f"🚫 <b>Removed</b> · {html.escape(str(event.get('listing_id')))} (was {old_price})"
+        else:
+            headline = f"🆕 <b>{new_price}</b>"
+        
+        street = html.escape(str(event.get('street') or 'N/A'))
+        neighborhood = html.escape(str(event.get('neighborhood') or 'N/A'))
+        url = html.escape(str(event.get('link') or ''), quote=True)
+        floor = 'N/A' if event.get('floor') is None else event['floor']
+        return (
+            f"{headline}\n"
+            f"{event.get('rooms') or 'N/A'} rooms · {event.get('sqm') or 'N/A'} sqm · floor {floor}\n"
+            f"📍 {street}, {neighborhood} · <a href=\"{url}\">View Property</a>"
+        )
+    
+    def notify_listing_changes(self, events: List[Dict]) -> int:
+        """
+        Send price-change and relisting events as digest messages
+        
+        Args:
+            events: Event rows from ChangeDetector.detect
+            
+        Returns:
+            int: Number of events whose message was delivered
+        """
+        if not events:
+            return 0
+        
+        metrics = get_metrics()
+        delivered = 0
+        with metrics.stage('notify'):
+            entries = (self.format_change_entry(event) for event in events)
+            for message, count in self._pack_messages(f"📊 <b>{len(events)} listing changes</b>", entries):
+                if self.send_message(message):
+                    delivered += count
+        metrics.inc('stage_items_total', len(events), stage='notify')
+        return delivered
+    
+    def send_property_album(self, property_data: Dict) -> bool:
+        """
+        Send a property as a photo album captioned with its details
+        
+        Falls back to a single photo or a plain message when there are fewer images.
+        
+        Args:
+            property_data: Dictionary containing property information
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        images = property_data.get('images')
+        images = [url for url in images if isinstance(url, str)] if isinstance(images, (list, tuple)) else []
+        caption = self.format_property_message(property_data)
+        if telegram_length(caption) > CAPTION_LIMIT:
+            caption = self.format_property_digest_entry(property_data)
+        
+        if len(images) >= 2 and self.album_size >= 2:
+            return self.send_media_group(images[:self.album_size], caption)
+        if images:
+            return self.send_photo(images[0], caption)
+        return self.send_message(self.format_property_message(property_data))
+    
     def notify_new_properties(self, new_properties: List[Dict]) -> int:
         """
-        Send notifications for multiple new properties
+        Send notifications for multiple new properties using the configured delivery
         
         Args:
             new_properties: List of property dictionaries
             
         Returns:
-            int: Number of successfully sent notifications
+            int: Number of properties whose notification was delivered
         """
         if not new_properties:
             return 0
         
-        successful_notifications = 0
+        metrics = get_metrics()
+        with metrics.stage('notify'):
+            delivered = self._deliver(new_properties)
+        metrics.inc('stage_items_total', len(new_properties), stage='notify')
+        return delivered
+    
+    def _deliver(self, new_properties: List[Dict]) -> int:
+        """Send a batch of properties per self.delivery; returns how many were delivered"""
+        if self.delivery == 'albums':
+            return sum(self.send_property_album(property_data) for property_data in new_properties)
         
-        # Send summary message first
-        summary_message = f"🔔 <b>{len(new_properties)} new properties found!</b>"
-        if self.send_message(summary_message):
-            successful_notifications += 1
+        if self.delivery == 'individual' or len(new_properties) == 1:
+            return sum(
+                self.send_message(self.format_property_message(property_data))
+                for property_data in new_properties
+            )
         
-        # Send individual property notifications
-        for property_data in new_properties:
-            message = self.format_property_message(property_data)
+        # Digest: each message carries as many properties as fit
+        delivered = 0
+        for message, count in self.build_digest_messages(new_properties):
             if self.send_message(message):
-                successful_notifications += 1
-            
-            # Small delay between messages to avoid rate limiting
-            import time
-            time.sleep(1)
-        
-        return successful_notifications
+                delivered += count
+        return delivered
     
     def send_error_notification(self, error_message: str) -> bool:
         """
@@ -181,4 +453,28 @@ class TelegramNotifier:
 
 ⏰ <i>{datetime.now().strftime('%Y-%m-%d %H:%M')}</i>"""
 
-        return self.send_message(message)
\ No newline at end of file
+        return self.send_message(message)
+
+
+_default_notifier: Optional[TelegramNotifier] = None
+_default_notifier_lock = threading.Lock()
+
+
+def get_telegram_notifier() -> Optional[TelegramNotifier]:
+    """Return the process-wide notifier configured from settings, or None without credentials"""
+    global _default_notifier
+    if _default_notifier is None:
+        with _default_notifier_lock:
+            if _default_notifier is None:
+                from config.settings import settings
+                if not (settings.telegram_bot_token and settings.telegram_chat_id):
+                    return None
+                outbox = OutboundQueue(settings.telegram_queue_path) if settings.telegram_queue else None
+                _default_notifier = TelegramNotifier(
+                    bot_token=settings.telegram_bot_token,
+                    chat_id=settings.telegram_chat_id,
+                    delivery=settings.telegram_delivery,
+                    album_size=settings.telegram_album_size,
+                    outbox=outbox
+                )
+    return _default_notifier
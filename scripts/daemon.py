@@ -0,0 +1,118 @@
+"""Long-running poller: keeps the scraper warm and polls each search on its own schedule.
+
+Usage:
+    python scripts/daemon.py                      # poll forever
+    python scripts/daemon.py --interval 5 --jitter 0.3
+    python scripts/daemon.py --max-polls 4        # stop after four polls
+"""
+import argparse
+import logging
+import signal
+import sys
+import os
+import threading
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config.settings import settings
+from config.search_configs import SEARCH_CONFIGURATIONS
+from utils.log import configure_logging
+from utils.metrics import export_metrics
+from utils.poll_scheduler import PollScheduler
+
+from scripts.scraper import Yad2MultiSearchScraper
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsSync:
+    """Upserts newly found listings, importing the Sheets writer on first use"""
+
+    def __init__(self):
+        self.handler = None
+
+    def upsert(self, df):
+        try:
+            if self.handler is None:
+                from src.writers.google_sheets_reader_writer import GoogleSheetsReaderWriter
+                self.handler = GoogleSheetsReaderWriter()
+            update_stats = self.handler.upsert_listings(df, 'listing_id')
+            logger.info(f"📄 Sheets: {update_stats['new']} new, {update_stats['updated']} updated")
+        except Exception as e:
+            logger.error(f"❌ Error syncing to Google Sheets: {e}")
+
+
+def run_daemon(search_configs, interval_minutes, jitter, sync_sheets=True, max_polls=None):
+    """
+    Poll every search on its own jittered interval until stopped
+
+    The scraper (HTTP sessions, rate limiters, caches, tracker and notifier) is
+    built once and shared by every poll.
+
+    Args:
+        search_configs: Search configurations to poll
+        interval_minutes: Default poll interval per search
+        jitter: Fraction of the interval to randomize by
+        sync_sheets: Upsert new listings into Google Sheets after each poll
+        max_polls: Stop after this many polls (None = run until SIGINT/SIGTERM)
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    scraper = Yad2MultiSearchScraper(search_configs, enable_notifications=settings.enable_notifications)
+    scheduler = PollScheduler(search_configs, interval_minutes=interval_minutes, jitter=jitter)
+    known_tokens = {config['name']: set() for config in search_configs}
+    sheets = SheetsSync() if sync_sheets else None
+
+    logger.info(f"🕒 Polling {len(search_configs)} searches every ~{interval_minutes:g} min (±{jitter:.0%})")
+    polls = 0
+    try:
+        while not stop.is_set() and (max_polls is None or polls < max_polls):
+            wait_seconds, index, config = scheduler.pop()
+            if wait_seconds and stop.wait(wait_seconds):
+                break
+
+            try:
+                new_df = scraper.poll_search(config, known_tokens[config['name']])
+                if sheets and not new_df.empty:
+                    sheets.upsert(new_df)
+            except Exception as e:
+                logger.error(f"❌ Error polling {config['name']}: {e}")
+                if scraper.enable_notifications and settings.notify_on_error:
+                    scraper.notifier.send_error_notification(f"Error in search '{config['name']}': {str(e)}")
+
+            scheduler.schedule_next(index)
+            polls += 1
+            export_metrics()  # keeps the Prometheus textfile current between polls
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scraper.close()
+        logger.info(f"👋 Daemon stopped after {polls} polls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=settings.daemon.poll_interval_minutes,
+                        help='Default minutes between polls of each search')
+    parser.add_argument('--jitter', type=float, default=settings.daemon.poll_jitter,
+                        help='Randomize each interval by up to this fraction')
+    parser.add_argument('--no-sheets', action='store_true', help='Do not upsert new listings into Google Sheets')
+    parser.add_argument('--max-polls', type=int, help='Stop after this many polls')
+    parser.add_argument('--log-level', default=settings.log_level,
+                        help='DEBUG, INFO, WARNING or ERROR (LOG_LEVEL)')
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+
+    run_daemon(
+        SEARCH_CONFIGURATIONS,
+        interval_minutes=args.interval,
+        jitter=args.jitter,
+        sync_sheets=settings.daemon.sync_sheets and not args.no_sheets,
+        max_polls=args.max_polls,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
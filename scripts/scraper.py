@@ -1,50 +1,101 @@
 import json
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import logging
 import time
 import sys
 import os
+import threading
+import queue
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 # Add the project root to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from config.search_configs import SEARCH_CONFIGURATIONS, SCRAPER_CONFIG
 from config.settings import settings
-from notifications.telegram_notifier import TelegramNotifier
+from notifications.telegram_notifier import get_telegram_notifier
 from utils.property_tracker import PropertyTracker
+from utils.listing_store import ListingStore
+from utils.response_cache import ResponseCache
+from utils.history_store import HistoryStore
+from utils.change_detector import ChangeDetector, EVENT_RELISTED
+from utils.dedup_clusters import ListingClusterer, cluster_listings
+from utils.http_client import get_http_client
+from utils.http_recorder import get_recorder
+from utils.next_data import extract_next_data
+from utils.listing_columns import ListingColumns
+from utils.field_extractor import LISTING_FIELDS, extract_listing, top_level_keys, missing_paths
+from utils.query_planner import plan_queries, feed_fields, detail_fields, matching_searches
+from utils.metrics import get_metrics, export_metrics
+from utils.profiling import checkpoint
+
+logger = logging.getLogger(__name__)
+
+_STREAM_DONE = object()  # end-of-stream marker passed between pipeline stages
 
 
 
 class Yad2Scraper:
-    def __init__(self, url=None, headers=None, params=None):
+    def __init__(self, url=None, headers=None, params=None, http_client=None):
         self.url = url or SCRAPER_CONFIG["url"]
         self.headers = headers if headers is not None else SCRAPER_CONFIG["headers"]
+        # Pooled client; its per-host adaptive rate limiter paces every request
+        self.http = http_client or get_http_client()
+        self.recorder = get_recorder()  # Saves responses for offline replay when HTTP_RECORD_DIR is set
 
-    def fetch_listings(self, params=None):
+    def fetch_listings(self, params=None, max_pages=5, is_known=None, stop_after_known=10, outcome=None):
         all_listings = []
+        for page_listings in self.iter_feed_pages(params, max_pages=max_pages, is_known=is_known,
+                                                  stop_after_known=stop_after_known, outcome=outcome):
+            all_listings.extend(page_listings)
+        
+        logger.debug(f"Total listings found: {len(all_listings)}")
+        return all_listings
+    
+    def iter_feed_pages(self, params=None, max_pages=5, is_known=None, stop_after_known=10, outcome=None):
+        """
+        Yield the listings of each feed page as soon as it is parsed
+
+        Args:
+            params: Search query parameters
+            max_pages: Page limit for this search
+            is_known: Optional token check for new-only paging. The feed is newest
+                first, so once stop_after_known consecutive listings are known the
+                remaining pages hold nothing new. Promoted (platinum) listings are
+                pinned regardless of age and don't count.
+            stop_after_known: Length of the known run that ends paging
+            outcome: Optional dict; its 'exhausted' key is set to True only if
+                paging ended on an empty page, i.e. every listing of the search
+                was seen (not cut off by max_pages, the known run or an error)
+        """
+        import requests
+        metrics = get_metrics()
         current_page = 1
+        known_run = 0
+        if outcome is not None:
+            outcome['exhausted'] = False
         
-        print(f"Fetching listings with params: {params}")
+        logger.debug(f"Fetching listings with params: {params}")
         
-        while current_page <= 5:  # Limit to 5 pages per search to avoid too many requests
-            print(f"Fetching page {current_page}...")
+        while current_page <= max_pages:  # Limit pages per search to avoid too many requests
+            logger.debug(f"Fetching page {current_page}...")
             current_params = {**params, 'page': current_page}
             
             try:
                 # Make the web request for the current page
-                response = requests.get(self.url, params=current_params, headers=self.headers)
+                with metrics.stage('feed_fetch'):
+                    response = self.http.get(self.url, params=current_params, headers=self.headers)
                 response.raise_for_status()
+                metrics.inc('stage_items_total', stage='feed_fetch')
+                if self.recorder:
+                    self.recorder.record(response)
                 
                 # Parse the response
-                soup = BeautifulSoup(response.text, 'html.parser')
-                script_tag = soup.find('script', {'id': '__NEXT_DATA__'})
+                data = extract_next_data(response.content)
                 
-                if not script_tag:
-                    print(f"Could not find data on page {current_page}. Stopping.")
+                if data is None:
+                    logger.info(f"Could not find data on page {current_page}. Stopping.")
                     break
 
-                data = json.loads(script_tag.string)
                 feed = data.get('props', {}).get('pageProps', {}).get('feed', {})
                 
                 # Get listings from this page
@@ -54,24 +105,35 @@ class Yad2Scraper:
                 page_listings.extend(feed.get('agency', []))
                 
                 if not page_listings:
-                    print(f"No listings found on page {current_page}. Stopping.")
+                    logger.info(f"No listings found on page {current_page}. Stopping.")
+                    if outcome is not None:
+                        outcome['exhausted'] = True
                     break
-                    
-                all_listings.extend(page_listings)
-                print(f"Found {len(page_listings)} listings on page {current_page}")
                 
-                current_page += 1
-                time.sleep(1)  # Be respectful to the server
-
+                logger.debug(f"Found {len(page_listings)} listings on page {current_page}")
+                
+                reached_known = False
+                if is_known:
+                    for listing in feed.get('private', []) + feed.get('agency', []):
+                        known_run = known_run + 1 if is_known(listing.get('token')) else 0
+                        if known_run >= stop_after_known:
+                            reached_known = True
+                            break
+                
             except requests.exceptions.RequestException as e:
-                print(f"An error occurred during the request: {e}")
+                logger.error(f"An error occurred during the request: {e}")
+                metrics.inc('errors_total', stage='feed_fetch')
                 break
             except json.JSONDecodeError:
-                print(f"Failed to parse JSON on page {current_page}. Content might be invalid.")
+                metrics.inc('errors_total', stage='json_decode')
+                logger.warning(f"Failed to parse JSON on page {current_page}. Content might be invalid.")
                 break
-        
-        print(f"Total listings found: {len(all_listings)}")
-        return all_listings
+            
+            yield page_listings
+            if reached_known:
+                logger.info(f"Reached {stop_after_known} already-seen listings on page {current_page}. Stopping.")
+                break
+            current_page += 1
     
     def scrape_listings_pages(self, listings):
         all_properties = []
@@ -81,118 +143,60 @@ class Yad2Scraper:
             if property_details:
                 all_properties.append(property_details)
         if all_properties: 
+            import pandas as pd
             df = pd.DataFrame(all_properties)
-            # print(df.head())
+            # logger.debug(df.head())
             
         return df
 
     def scrape_listing_page(self, listing_url):
-        print(f"Scraping individual listing page: {listing_url}")
-        response = requests.get(listing_url, headers=self.headers)
+        logger.debug(f"Scraping individual listing page: {listing_url}")
+        with get_metrics().stage('item_fetch'):
+            response = self.http.get(listing_url, headers=self.headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # print(soup.prettify()[:1000])  # Print the first 1000 characters of the page for inspection
-        # ---
-        # 2. Find all the <li> elements that are individual listings
-        # We use the 'data-nagish' attribute as it's a consistent identifier.
-        # listings = soup.find_all('li', attrs={'data-nagish': 'feed-item-list-box'})
-        try:
-            # Find the specific script tag by its ID
-            script_tag = soup.find('script', {'id': '__NEXT_DATA__'})
+        if self.recorder:
+            self.recorder.record(response)
+        return self.parse_listing_page(response.content, listing_url)
 
-            # Extract the JSON string and parse it into a Python dictionary
-            data = json.loads(script_tag.string)
+    def parse_listing_page(self, content, listing_url):
+        """Build property_details from an item page body, or None if it has no listing data"""
+        try:
+            # Locate the __NEXT_DATA__ script and decode its JSON without building a DOM
+            data = extract_next_data(content)
+            if data is None:
+                raise AttributeError("__NEXT_DATA__ script not found")
 
             # The actual listing data is nested; this path navigates to it
             # Try index 1 first, then fallback to index 0 if it fails
             try:
                 listing_data = data['props']['pageProps']['dehydratedState']['queries'][1]['state']['data']
             except (KeyError, IndexError) as e:
-                print(f"Failed to access index 1: {e}")
+                logger.debug(f"Failed to access index 1: {e}")
                 try:
                     listing_data = data['props']['pageProps']['dehydratedState']['queries'][0]['state']['data']
                 except (KeyError, IndexError) as e:
-                    print(f"Failed to access index 0: {e}")
+                    logger.warning(f"Failed to access index 0: {e}")
                     listing_data = None
 
         except (AttributeError, KeyError, IndexError, TypeError) as e:
-            print(f"Error finding or parsing data: {e}")
+            logger.warning(f"Error finding or parsing data: {e}")
             listing_data = None # Set to None if data can't be found
 
         if listing_data:
-            # Extract images more robustly
-            images_data = listing_data.get('metaData', {}).get('images', [])
-            
-            # Handle different possible image data structures
-            image_urls = []
-            if isinstance(images_data, list):
-                for img in images_data:
-                    if isinstance(img, str):
-                        # If the image is already a URL string
-                        image_urls.append(img)
-                    elif isinstance(img, dict):
-                        # If the image is an object, try to get the URL from common fields
-                        url = img.get('url') or img.get('src') or img.get('href') or img.get('link')
-                        if url:
-                            image_urls.append(url)
-                        # Sometimes images are nested deeper
-                        elif 'original' in img:
-                            image_urls.append(img['original'])
-                        elif 'large' in img:
-                            image_urls.append(img['large'])
-            # Create a dictionary to hold the extracted info for one listing
-            property_details = {
-                'listing_id': listing_data.get('token'),
-                'ad_number': listing_data.get('adNumber'),
-                'city': listing_data.get('address', {}).get('city', {}).get('text'),
-                'created_at': listing_data.get('dates', {}).get('createdAt'),
-                'updated_at': listing_data.get('dates', {}).get('updatedAt'),
-                'neighborhood': listing_data.get('address', {}).get('neighborhood', {}).get('text'),
-                'street': listing_data.get('address', {}).get('street', {}).get('text'),
-                'rent': listing_data.get('price'),
-                # Calculate monthly arnona (it's given for two months)
-                'arnona_month': listing_data.get('propertyTax', 0) / 2 if listing_data.get('propertyTax') and listing_data.get('propertyTax') > 0 else None,
-                'vaad': listing_data.get('houseCommittee'),
-                'rooms': listing_data.get('additionalDetails', {}).get('roomsCount'),
-                'sqm': listing_data.get('additionalDetails', {}).get('squareMeter'),
-                'floor': listing_data.get('address', {}).get('house', {}).get('floor'),
-                'elevator': listing_data.get('inProperty', {}).get('includeElevator'),
-                'total_floors': listing_data.get('additionalDetails', {}).get('buildingTopFloor'),
-                'condition': listing_data.get('additionalDetails', {}).get('propertyCondition', {}).get('text'),
-                'entry_date': listing_data.get('additionalDetails', {}).get('entranceDate', '').split('T')[0],
-                'description': listing_data.get('metaData', {}).get('description'),
-                'search_text': listing_data.get('metaData', {}).get('searchText'),
-                'isLongTermContract': listing_data.get('additionalDetails', {}).get('isLongTermContract'),
-                'parking': listing_data.get('inProperty', {}).get('includeParking'),
-                'balcony': listing_data.get('inProperty', {}).get('includeBalcony'),
-                'mamad': listing_data.get('inProperty', {}).get('includeSecurityRoom'),
-                'AC': listing_data.get('inProperty', {}).get('includeAirconditioner'),
-                'Boiler': listing_data.get('inProperty', {}).get('includeBoiler'),
-                'renovated': listing_data.get('inProperty', {}).get('isRenovated'),
-                'furniture': listing_data.get('furnitureInfo', ''),
-                'pets': listing_data.get('inProperty', {}).get('isPetsAllowed'),
-                'latitude': listing_data.get('address', {}).get('coords', {}).get('lat'),
-                'longitude': listing_data.get('address', {}).get('coords', {}).get('lon'),
-                'tags': listing_data.get('tags', []),
-                'property_type': listing_data.get('additionalDetails', {}).get('property', {}).get('text'),
-                'link': listing_url,
-                'image_count': len(listing_data.get('metaData', {}).get('images', [])),
-                'images': image_urls,  # Now a clean list of URL strings
-                'video_count': len(listing_data.get('metaData', {}).get('videos', [])),
-            }
+            # Compiled from LISTING_FIELDS; each nested dict is walked once
+            metrics = get_metrics()
+            with metrics.stage('extraction'):
+                property_details = extract_listing(listing_data, link=listing_url)
+            metrics.inc('stage_items_total', stage='extraction')
             # self.log_extra_listing_info(listing_data, property_details)
             return property_details
         else:
-            print("No listing data found on this page.")
+            logger.warning("No listing data found on this page.")
             return None
 
     def log_extra_listing_info(self, listing_data, property_details):
         # Print any additional fields not captured in property_details
-        captured_fields = set([
-                'token', 'adNumber', 'address', 'price', 'additionalDetails', 
-                'metaData', 'propertyTax', 'houseCommittee', 'inProperty', 
-                'furnitureInfo', 'dates', 'tags'
-            ])
+        captured_fields = top_level_keys(LISTING_FIELDS)
             
         additional_fields = {}
         for key, value in listing_data.items():
@@ -200,10 +204,15 @@ class Yad2Scraper:
                 additional_fields[key] = value
             
         if additional_fields:
-            print(f"Additional fields found in listing {property_details['listing_id']}:")
+            logger.info(f"Additional fields found in listing {property_details['listing_id']}:")
             for key, value in additional_fields.items():
-                print(f"  {key}: {value}")
-            print()
+                logger.info(f"  {key}: {value}")
+            logger.info("")
+        
+        # And any captured fields Yad2 stopped sending
+        missing = missing_paths(listing_data, LISTING_FIELDS)
+        if missing:
+            logger.info(f"Fields missing from listing {property_details['listing_id']}: {', '.join(missing)}")
 
     def extract_listing_links(self, listings):
         # 3. Create an empty list to hold the links
@@ -212,13 +221,13 @@ class Yad2Scraper:
         # 4. Loop through each listing found
         for listing in listings:
                 full_url = SCRAPER_CONFIG["base_url"] + listing['token']
-                print(full_url)
+                logger.info(full_url)
                 all_listing_links.append(full_url)
 
                 return all_listing_links
 
     def print_listings(self, all_listings):
-        print(f"Found {len(all_listings)} listings.\n---")
+        logger.info(f"Found {len(all_listings)} listings.\n---")
         for listing in all_listings:
                 # Extracting data using .get() to avoid errors if a key is missing
             price = listing.get('price')
@@ -230,29 +239,36 @@ class Yad2Scraper:
             rooms = details.get('roomsCount')
             size = details.get('squareMeter')
                 
-            print(f"Price: ₪{price}")
-            print(f"Address: {street}, {city}")
-            print(f"Rooms: {rooms}, Size: {size} sqm")
-            print("---")
+            logger.info(f"Price: ₪{price}")
+            logger.info(f"Address: {street}, {city}")
+            logger.info(f"Rooms: {rooms}, Size: {size} sqm")
+            logger.info("---")
 
     def check_listing_categories(self, feed):
-        print("\n--- Listing Categories Found on This Page ---")
+        logger.info("\n--- Listing Categories Found on This Page ---")
         all_listings_on_page = []
         if feed:
                         # Iterate through each category (e.g., 'feedItems', 'platinum') in the feed
             for category_name, listings in feed.items():
                             # We only care about categories that are non-empty lists
                 if isinstance(listings, list) and listings:
-                    print(f"-> Category '{category_name}': Found {len(listings)} listings.")
+                    logger.info(f"-> Category '{category_name}': Found {len(listings)} listings.")
                                 # Add the listings from this category to our main list
                     all_listings_on_page.extend(listings)
 
 class Yad2MultiSearchScraper(Yad2Scraper):
-    def __init__(self, search_configs=None, enable_notifications=True):
+    def __init__(self, search_configs=None, enable_notifications=True, max_workers=None, http_client=None):
         # Initialize with base configuration
-        super().__init__()
+        super().__init__(http_client=http_client)
         self.search_configs = search_configs or SEARCH_CONFIGURATIONS
         
+        # Fetch engine: bounded worker pools sharing the HTTP client's rate limiter
+        self.max_workers = max(1, max_workers or settings.scraper.max_workers)
+        self.feed_workers = max(1, settings.scraper.feed_workers)
+        self.query_planner = settings.scraper.query_planner
+        self.new_only = settings.scraper.new_only  # stop paging once the feed reaches seen listings
+        self.cluster_duplicates = settings.scraper.cluster_duplicates  # one listing per apartment across tokens
+        
         # Initialize notification system
         self.enable_notifications = enable_notifications 
         self.notifier = None
@@ -260,6 +276,37 @@ class Yad2MultiSearchScraper(Yad2Scraper):
         
         # Track scraped listings to avoid duplicates
         self.scraped_listings = {}  # Cache for already scraped listings
+        self._cache_lock = threading.Lock()  # Guards scraped_listings across fetch workers
+        
+        # Persistent item-page records, reused while the feed entry is unchanged
+        self.listing_store = None
+        if settings.scraper.incremental:
+            self.listing_store = ListingStore(
+                settings.scraper.listing_store_path,
+                max_age_hours=settings.scraper.listing_max_age_hours
+            )
+        
+        # On-disk item-page responses, revalidated with conditional GETs
+        self.response_cache = None
+        if settings.scraper.response_cache:
+            self.response_cache = ResponseCache(
+                settings.scraper.response_cache_path,
+                ttl_hours=settings.scraper.response_cache_ttl_hours,
+                max_bytes=int(settings.scraper.response_cache_max_mb * 1024 * 1024)
+            )
+        
+        # Append-only Parquet history, one row per listing per run
+        self.history_store = None
+        if settings.scraper.history:
+            try:
+                self.history_store = HistoryStore(settings.scraper.history_path)
+            except ImportError as e:
+                logger.warning(f"⚠️ Listing history disabled: {e}")
+        
+        # Last known price/photos per listing, diffed against every run
+        self.change_detector = None
+        if settings.scraper.change_detection:
+            self.change_detector = ChangeDetector(self.property_tracker, removed_after=settings.scraper.removed_after_runs)
         
         if self.enable_notifications:
             self._setup_notifier()
@@ -267,135 +314,709 @@ class Yad2MultiSearchScraper(Yad2Scraper):
     def _setup_notifier(self):
         """Setup Telegram notifier if credentials are available"""
         try:
-            if settings.telegram_bot_token and settings.telegram_chat_id:
-                self.notifier = TelegramNotifier(
-                    bot_token=settings.telegram_bot_token,
-                    chat_id=settings.telegram_chat_id
-                )
-                print("✅ Telegram notifier initialized successfully")
+            # Shared with main.py; the connection is tested when the first message goes out
+            self.notifier = get_telegram_notifier()
+            if self.notifier:
+                logger.info("✅ Telegram notifier initialized successfully")
             else:
-                print("⚠️ Telegram credentials not found - notifications disabled")
+                logger.warning("⚠️ Telegram credentials not found - notifications disabled")
                 self.enable_notifications = False
         except Exception as e:
-            print(f"❌ Failed to initialize Telegram notifier: {e}")
+            logger.error(f"❌ Failed to initialize Telegram notifier: {e}")
             self.enable_notifications = False
     
-    def _handle_notifications(self, combined_df):
-        """Handle notifications for new and updated properties"""
-        print(f"🔍 DEBUG: Checking notifications...")
-        print(f"🔍 DEBUG: Notifier exists: {self.notifier is not None}")
-        print(f"🔍 DEBUG: Enable notifications: {self.enable_notifications}")
-        print(f"🔍 DEBUG: Total properties in DF: {len(combined_df)}")
+    def _handle_notifications(self, combined_df, change_events=None):
+        """Handle notifications for new properties and for price changes and relistings"""
+        logger.debug(f"🔍 DEBUG: Checking notifications...")
+        logger.debug(f"🔍 DEBUG: Notifier exists: {self.notifier is not None}")
+        logger.debug(f"🔍 DEBUG: Enable notifications: {self.enable_notifications}")
+        logger.debug(f"🔍 DEBUG: Total properties in DF: {len(combined_df)}")
         
         try:
             if not self.notifier:
-                print("🔍 DEBUG: No notifier - returning early")
+                logger.debug("🔍 DEBUG: No notifier - returning early")
+                self._commit_changes()
                 return
             
-            # Track new properties
-            new_properties = []
-            for _, property_data in combined_df.iterrows():
-                property_id = property_data['listing_id']
-                exists = self.property_tracker.property_exists(property_id)
-                print(f"🔍 DEBUG: Property {property_id} exists in DB: {exists}")
-                
-                if not exists:
-                    new_properties.append(property_data)
-                    self.property_tracker.add_property(property_id, property_data.to_dict())
+            # Diff the whole frame against the tracker in one pass and commit the new IDs in one batch
+            new_properties = self.property_tracker.get_new_properties(combined_df).drop_duplicates('listing_id')
+            change_alerts = self._change_alerts(change_events)
+            if (not new_properties.empty or change_alerts) and not self.notifier.ensure_connection():
+                # Leave them unseen so they are announced once Telegram is reachable
+                logger.error("❌ Telegram unreachable - new properties left for the next run")
+                if self.change_detector:
+                    self.change_detector.discard()
+                return
+            self.property_tracker.mark_properties_as_seen(new_properties)
+            self._mark_duplicates_seen(combined_df)
+            self._commit_changes()
             
-            print(f"🔍 DEBUG: Found {len(new_properties)} new properties")
-            print(f"🔍 DEBUG: notify_on_new_properties setting: {getattr(settings, 'notify_on_new_properties', 'NOT_SET')}")
+            # A repost under a new token is announced once, as a relisting
+            if change_events is not None and not change_events.empty:
+                reposts = change_events.loc[change_events['event'] == EVENT_RELISTED, 'listing_id']
+                new_properties = new_properties[~new_properties['listing_id'].astype(str).isin(reposts)]
             
-            # Send notifications for new properties only (no summary)
-            if new_properties and settings.notify_on_new_properties:
-                # Send individual notifications without summary
-                successful_notifications = 0
-                for property_data in new_properties:
-                    message = self.notifier.format_property_message(property_data.to_dict())
-                    if self.notifier.send_message(message):
-                        successful_notifications += 1
-                    
-                    # Small delay between messages to avoid rate limiting
-                    import time
-                    time.sleep(1)
+            logger.debug(f"🔍 DEBUG: Found {len(new_properties)} new properties")
+            logger.debug(f"🔍 DEBUG: notify_on_new_properties setting: {getattr(settings, 'notify_on_new_properties', 'NOT_SET')}")
+            
+            # Send notifications for new properties, batched per settings.telegram_delivery
+            if not new_properties.empty and settings.notify_on_new_properties:
+                successful_notifications = self.notifier.notify_new_properties(new_properties.to_dict('records'))
                 
-                print(f"📱 Sent {successful_notifications}/{len(new_properties)} notifications for new properties")
+                logger.info(f"📱 Sent {successful_notifications}/{len(new_properties)} notifications for new properties")
             else:
-                print(f"📱 No new properties to notify about ({len(new_properties)} new properties found)")
+                logger.info(f"📱 No new properties to notify about ({len(new_properties)} new properties found)")
+            
+            if change_alerts:
+                sent = self.notifier.notify_listing_changes(change_alerts)
+                logger.info(f"📱 Sent {sent}/{len(change_alerts)} price-change and relisting alerts")
                 
         except Exception as e:
-            print(f"❌ Error handling notifications: {e}")
+            logger.error(f"❌ Error handling notifications: {e}")
             if settings.notify_on_error:
                 self.notifier.send_error_notification(f"Notification error: {str(e)}")
     
     def run_multi_search(self):
         """Run scraping across multiple search configurations and combine results"""
+        import pandas as pd
         all_listings = []  # Collect all listings first
+        full_crawl = True  # every search paged to its end, so a missing listing is really gone
         
         try:
             # First pass: Collect all unique listings from all searches
-            for i, config in enumerate(self.search_configs, 1):
-                print(f"\n=== Fetching listings {i}/{len(self.search_configs)}: {config['name']} ===")
-                
-                try:
-                    # Fetch listings for this configuration
-                    listings = self.fetch_listings(config["params"])
-                    
-                    if listings:
-                        # Add search config metadata to each listing
-                        for listing in listings:
-                            listing['search_config'] = config['name']
-                        
-                        all_listings.extend(listings)
-                        print(f"✅ Found {len(listings)} listings for {config['name']}")
-                    else:
-                        print(f"⚠️ No listings found for {config['name']}")
-                        
-                except Exception as e:
-                    print(f"❌ Error processing {config['name']}: {e}")
-                    if self.enable_notifications and settings.notify_on_error:
-                        self.notifier.send_error_notification(f"Error in search '{config['name']}': {str(e)}")
+            if self.query_planner:
+                feed_results = self._fetch_planned_feeds()
+            else:
+                feed_results = self.fetch_all_feeds(self.search_configs)
+            checkpoint('feeds_fetched')
+            
+            for config, listings, elapsed, error, exhausted in feed_results:
+                full_crawl = full_crawl and exhausted
+                if error is not None:
+                    self._report_search_error(config['name'], error)
                     continue
+                
+                if listings:
+                    # Add search config metadata to each listing
+                    for listing in listings:
+                        listing['search_config'] = config['name']
                     
-                # Add delay between searches to be respectful
-                if i < len(self.search_configs):
-                    print("Waiting between searches...")
-                    time.sleep(3)
+                    all_listings.extend(listings)
+                    logger.info(f"✅ Found {len(listings)} listings for {config['name']}")
+                else:
+                    logger.warning(f"⚠️ No listings found for {config['name']}")
             
-            # Deduplicate listings by token before scraping
-            unique_listings = self._deduplicate_listings(all_listings)
-            print(f"\n📊 Total listings found: {len(all_listings)}")
-            print(f"📊 Unique listings to scrape: {len(unique_listings)}")
-            print(f"📊 Duplicates avoided: {len(all_listings) - len(unique_listings)}")
+            # Deduplicate listings by token, then by apartment, before scraping
+            unique_listings = self._collapse_feed_duplicates(self._deduplicate_listings(all_listings))
+            logger.info(f"\n📊 Total listings found: {len(all_listings)}")
+            logger.info(f"📊 Unique listings to scrape: {len(unique_listings)}")
+            logger.info(f"📊 Duplicates avoided: {len(all_listings) - len(unique_listings)}")
             
             # Second pass: Scrape unique listings only
             if unique_listings:
                 combined_df = self.scrape_listings_pages(unique_listings)
+                checkpoint('items_scraped')
+                
+                if self.query_planner and not combined_df.empty:
+                    combined_df = self._confirm_planned_matches(combined_df)
+                combined_df = self._collapse_detail_duplicates(combined_df)
                 
                 if not combined_df.empty:
                     # Add timestamp
                     combined_df['search_timestamp'] = pd.Timestamp.now()
+                    self._record_history(combined_df)
+                    change_events = self._detect_changes(combined_df, full_crawl=full_crawl)
                     
                     # Check for new properties and send notifications
                     if self.enable_notifications:
-                        self._handle_notifications(combined_df)
+                        self._handle_notifications(combined_df, change_events)
+                        checkpoint('notified')
+                    else:
+                        self._commit_changes()
                     
                     self.print_search_summary_v2(all_listings, unique_listings, combined_df)
                     return combined_df
                 else:
-                    print("❌ No data scraped successfully")
+                    logger.error("❌ No data scraped successfully")
                     return pd.DataFrame()
             else:
-                print("❌ No unique listings to scrape")
+                logger.error("❌ No unique listings to scrape")
                 return pd.DataFrame()
                 
         except Exception as e:
             error_msg = f"Critical error in multi-search: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             if self.enable_notifications and settings.notify_on_error:
                 self.notifier.send_error_notification(error_msg)
             raise
     
+    def run_streaming(self):
+        """
+        Run all searches as a pipeline of overlapping stages.
+
+        Feed pages, item pages and the new-vs-seen check run concurrently and are
+        connected by bounded queues, so a slow stage holds back the stages feeding
+        it. A new listing is announced as soon as its item page is parsed instead
+        of after the last search finishes.
+
+        Returns:
+            The same combined DataFrame run_multi_search returns
+        """
+        started = time.perf_counter()
+        self.first_notification_seconds = None
+        queue_size = max(1, settings.scraper.stream_queue_size)
+        listing_queue = queue.Queue(maxsize=queue_size)  # feed entries, one per (search, listing)
+        item_queue = queue.Queue(maxsize=queue_size)  # unique listings waiting for an item page
+        result_queue = queue.Queue(maxsize=queue_size)  # (listing, property_details)
+        
+        all_listings = []
+        unique_listings = []
+        exhausted_feeds = []  # one slot per feed query, filled by the feed stage
+        dispatch_errors = []  # what stopped the dispatcher, re-raised once the workers are done
+        stages = [
+            threading.Thread(target=self._stream_feeds, args=(listing_queue, exhausted_feeds), daemon=True),
+            threading.Thread(
+                target=self._stream_dispatch,
+                args=(listing_queue, item_queue, result_queue, all_listings, unique_listings, dispatch_errors),
+                daemon=True
+            ),
+        ]
+        stages.extend(
+            threading.Thread(target=self._stream_items, args=(item_queue, result_queue), daemon=True)
+            for _ in range(self.max_workers)
+        )
+        
+        logger.info(f"\n=== Streaming {len(self.search_configs)} searches "
+              f"({self.feed_workers} feed workers, {self.max_workers} item workers) ===")
+        
+        results = []
+        new_count = 0
+        sent_count = 0
+        # A new token that may be a repost waits for the end-of-run change detection
+        notify = self.enable_notifications and self.notifier
+        reposts = self.change_detector.repost_index() if notify and self.change_detector else None
+        held_reposts = []
+        # New listings wait up to the window to share one digest; the first batch goes out at once
+        pending = []
+        pending_since = None
+        flushes = 0
+        window = max(0.0, settings.scraper.stream_notify_window)
+        batch_size = max(1, settings.scraper.stream_notify_batch)
+        try:
+            for stage in stages:
+                stage.start()
+            
+            finished_workers = 0
+            while finished_workers < self.max_workers:
+                try:
+                    timeout = max(0.0, pending_since + window - time.perf_counter()) if pending else None
+                    item = result_queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                
+                if item is _STREAM_DONE:
+                    finished_workers += 1
+                elif item is not None:
+                    results.append(item)
+                    if notify:
+                        property_data = self._announcement_if_new(*item, reposts=reposts, held=held_reposts)
+                        new_count += property_data is not None
+                        if property_data is not None and settings.notify_on_new_properties:
+                            pending.append(property_data)
+                            pending_since = pending_since or time.perf_counter()
+                
+                if pending and (not flushes or len(pending) >= batch_size
+                                or time.perf_counter() - pending_since >= window):
+                    sent = self._send_announcements(pending)
+                    sent_count += sent
+                    flushes += 1
+                    pending, pending_since = [], None
+                    if sent and self.first_notification_seconds is None:
+                        self.first_notification_seconds = time.perf_counter() - started
+                        logger.info(f"⚡ First notification sent after {self.first_notification_seconds:.2f}s")
+            
+            if pending:
+                sent_count += self._send_announcements(pending)
+            if dispatch_errors:
+                raise dispatch_errors[0]
+        
+        except Exception as e:
+            error_msg = f"Critical error in streaming search: {str(e)}"
+            logger.error(f"❌ {error_msg}")
+            if self.enable_notifications and settings.notify_on_error:
+                self.notifier.send_error_notification(error_msg)
+            raise
+        finally:
+            if self.listing_store:
+                self.listing_store.save()
+        
+        if notify:
+            logger.info(f"📱 Sent {sent_count}/{new_count} notifications for new properties"
+                  + (f", {len(held_reposts)} possible reposts held back" if held_reposts else ""))
+        checkpoint('streamed')
+        self._print_response_cache_stats()
+        logger.info(f"⏱️ Streaming run finished in {time.perf_counter() - started:.2f}s")
+        
+        # found_in_searches is complete only now that every feed has been read
+        import pandas as pd  # not before the first notification
+        all_properties = ListingColumns()
+        for listing, property_details in results:
+            all_properties.append(property_details, found_in_searches=list(self._found_in_searches(listing)),
+                                  **self._duplicate_fields(listing))
+        combined_df = all_properties.to_frame()
+        
+        if self.query_planner and not combined_df.empty:
+            combined_df = self._confirm_planned_matches(combined_df)
+        combined_df = self._collapse_detail_duplicates(combined_df)
+        
+        if combined_df.empty:
+            logger.error("❌ No data scraped successfully")
+            return pd.DataFrame()
+        
+        combined_df['search_timestamp'] = pd.Timestamp.now()
+        self._record_history(combined_df)
+        if self.enable_notifications and self.notifier:
+            self._mark_duplicates_seen(combined_df)
+        # A slot still None belongs to a feed that died before its paging ended
+        full_crawl = bool(exhausted_feeds) and all(flag is True for flag in exhausted_feeds)
+        change_events = self._detect_changes(combined_df, full_crawl=full_crawl)
+        change_alerts = self._change_alerts(change_events)
+        if (change_alerts or held_reposts) and notify:
+            if self.notifier.ensure_connection():
+                # A held listing is announced as a relisting, like in a batch run, unless it was new after all
+                if change_events is not None:
+                    relisted = set(change_events.loc[change_events['event'] == EVENT_RELISTED, 'listing_id'])
+                else:
+                    relisted = set()
+                late_new = [data for data in held_reposts if str(data['listing_id']) not in relisted]
+                self.property_tracker.add_properties((data['listing_id'], data) for data in held_reposts)
+                self._commit_changes()
+                if late_new and settings.notify_on_new_properties:
+                    sent = self._send_announcements(late_new)
+                    logger.info(f"📱 Sent {sent}/{len(late_new)} notifications for held listings that were not reposts")
+                if change_alerts:
+                    sent = self.notifier.notify_listing_changes(change_alerts)
+                    logger.info(f"📱 Sent {sent}/{len(change_alerts)} price-change and relisting alerts")
+            else:
+                logger.error("❌ Telegram unreachable - changes and held listings left for the next run")
+                if self.change_detector:
+                    self.change_detector.discard()
+        else:
+            self._commit_changes()
+        self.print_search_summary_v2(all_listings, unique_listings, combined_df)
+        return combined_df
+    
+    def _record_history(self, combined_df):
+        """Append this run's listings to the history store; a failed write never fails the run"""
+        if not self.history_store:
+            return
+        try:
+            with get_metrics().stage('history_write'):
+                path = self.history_store.append(combined_df, combined_df['search_timestamp'].iloc[0].to_pydatetime())
+            logger.info(f"🗃️ Recorded {len(combined_df)} listings in history ({path})")
+        except Exception as e:
+            logger.error(f"❌ Failed to record listing history: {e}")
+            get_metrics().inc('errors_total', stage='history_write')
+    
+    def _detect_changes(self, combined_df, full_crawl):
+        """
+        Diff this run against the stored listing fingerprints
+
+        Args:
+            combined_df: The run's listings
+            full_crawl: Whether every search was paged in full, so missing
+                listings may be counted toward removal
+
+        Returns:
+            DataFrame of change events, or None if detection is off or failed
+        """
+        if not self.change_detector:
+            return None
+        try:
+            events = self.change_detector.detect(combined_df, full_crawl=full_crawl)
+        except Exception as e:
+            logger.error(f"❌ Change detection failed: {e}", exc_info=True)
+            get_metrics().inc('errors_total', stage='change_detection')
+            self.change_detector.discard()
+            if self.enable_notifications and self.notifier and settings.notify_on_error:
+                self.notifier.send_error_notification(f"Change detection failed: {e}")
+            return None
+        counts = events['event'].value_counts()
+        changes = ", ".join(f"{count} {name}" for name, count in counts.items() if name != 'new')
+        if changes:
+            logger.info(f"🔎 Listing changes: {changes}")
+        return events
+    
+    def _change_alerts(self, change_events):
+        """Change events of the types in settings.notify_on_changes, as dicts"""
+        if change_events is None or change_events.empty:
+            return []
+        wanted = set(settings.notify_on_changes)
+        return change_events[change_events['event'].isin(wanted)].to_dict('records')
+    
+    def _commit_changes(self):
+        """Persist the fingerprints staged by _detect_changes"""
+        if self.change_detector:
+            self.change_detector.commit()
+    
+    def _stream_feeds(self, listing_queue, exhausted):
+        """
+        Feed stage: paginate every search and queue each listing as its page arrives
+
+        Args:
+            listing_queue: Queue the feed entries go to
+            exhausted: List that gets one slot per feed query, set to True once
+                that query was paged to its empty page and False if it stopped
+                short; a slot left None means the query never finished
+        """
+        if self.query_planner:
+            queries = self._plan_queries()
+            logger.info(f"\n🧭 Query planner: {len(self.search_configs)} searches -> {len(queries)} feed queries")
+        else:
+            queries = self.search_configs
+        exhausted.extend([None] * len(queries))
+        
+        # Listings are marked seen as they are announced, which must not stop the other feeds paging early
+        is_known = self.property_tracker.seen_snapshot().__contains__
+        
+        def stream(index, query):
+            outcome = {}
+            try:
+                for page_listings in self.iter_feed_pages(query["params"], outcome=outcome,
+                                                          **self._pagination_options(query, is_known)):
+                    for listing in page_listings:
+                        if self.query_planner:
+                            names = matching_searches(query['members'], feed_fields(listing))
+                        else:
+                            names = [query['name']]
+                        for name in names:
+                            listing_queue.put(dict(listing, search_config=name))
+            except Exception as e:
+                for member in query.get('members', [query]):
+                    self._report_search_error(member['name'], e)
+            exhausted[index] = outcome.get('exhausted', False)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.feed_workers, max(1, len(queries)))) as executor:
+                list(executor.map(stream, range(len(queries)), queries))
+        finally:
+            listing_queue.put(_STREAM_DONE)
+    
+    def _stream_dispatch(self, listing_queue, item_queue, result_queue, all_listings, unique_listings, errors):
+        """
+        Dedup stage: pass each token and each apartment on once, serving cached details directly
+
+        An exception here is appended to errors for run_streaming to re-raise; the
+        feed stage is drained to its end first so no feed worker blocks on a full queue.
+        """
+        seen_tokens = {}
+        clusterer = self._new_clusterer() if self.cluster_duplicates else None
+        clustered = []  # listing per clusterer index
+        try:
+            while True:
+                listing = listing_queue.get()
+                if listing is _STREAM_DONE:
+                    break
+                
+                all_listings.append(listing)
+                token = listing.get('token')
+                if not token:
+                    continue
+                if token in seen_tokens:
+                    # Already on its way, just add the search config
+                    searches = seen_tokens[token]['found_in_searches']
+                    if listing['search_config'] not in searches:
+                        searches.append(listing['search_config'])
+                    continue
+                
+                listing['found_in_searches'] = [listing['search_config']]
+                seen_tokens[token] = listing
+                if clusterer:
+                    # Another token for an apartment already on its way folds into it
+                    clustered.append(listing)
+                    first = clustered[clusterer.find(clusterer.add(feed_fields(listing)))]
+                    if first is not listing:
+                        self._absorb_duplicate(first, listing)
+                        seen_tokens[token] = first
+                        continue
+                    listing['duplicate_ids'] = []
+                unique_listings.append(listing)
+                
+                cached_property, _ = self._cached_listing_details(token, listing)
+                if cached_property is not None:
+                    result_queue.put((listing, cached_property))
+                else:
+                    item_queue.put(listing)
+        except Exception as e:
+            logger.error(f"❌ Dispatcher failed, draining the feeds: {e}")
+            errors.append(e)
+            while listing_queue.get() is not _STREAM_DONE:
+                pass
+        finally:
+            for _ in range(self.max_workers):
+                item_queue.put(_STREAM_DONE)
+    
+    def _stream_items(self, item_queue, result_queue):
+        """Item stage: scrape queued listings until the dispatcher is done"""
+        try:
+            while True:
+                listing = item_queue.get()
+                if listing is _STREAM_DONE:
+                    break
+                try:
+                    property_details = self._fetch_listing_details(listing['token'], listing)
+                except Exception as e:
+                    logger.error(f"❌ Error scraping listing {listing['token']}: {e}")
+                    get_metrics().inc('errors_total', stage='item_fetch')
+                    continue
+                if property_details:
+                    result_queue.put((listing, property_details))
+        finally:
+            result_queue.put(_STREAM_DONE)
+    
+    def _announcement_if_new(self, listing, property_details, reposts=None, held=None):
+        """
+        Diff stage: mark an unseen listing as seen
+
+        Args:
+            listing: The feed entry
+            property_details: Its scraped item page
+            reposts: Optional RepostIndex; a listing it flags is appended to held,
+                still unseen, for the end-of-run change detection to settle
+            held: List the possible reposts go to
+
+        Returns:
+            The property data to announce, or None if the listing is not new
+            (or Telegram is unreachable, leaving it unseen for the next run)
+        """
+        listing_id = property_details.get('listing_id')
+        if self.property_tracker.property_exists(listing_id) or not self.notifier.ensure_connection():
+            return None
+        
+        searches = list(self._found_in_searches(listing))
+        if self.query_planner:
+            configs_by_name = {config['name']: config for config in self.search_configs}
+            searches = matching_searches((configs_by_name[name] for name in searches), detail_fields(property_details))
+            if not searches:
+                return None
+        
+        property_data = {**property_details, 'found_in_searches': searches, 'search_timestamp': datetime.now()}
+        if reposts is not None and reposts.may_be_repost(property_details):
+            held.append(property_data)
+            return None
+        self.property_tracker.add_property(listing_id, property_data)
+        return property_data
+    
+    def _send_announcements(self, announcements):
+        """Notify a batch of streamed listings through the configured delivery; returns how many were delivered"""
+        try:
+            return self.notifier.notify_new_properties(announcements)
+        except Exception as e:
+            logger.error(f"❌ Error sending notifications for {len(announcements)} properties: {e}")
+            return 0
+    
+    def _report_search_error(self, search_name, error):
+        logger.error(f"❌ Error processing {search_name}: {error}")
+        get_metrics().inc('errors_total', stage='search')
+        if self.enable_notifications and settings.notify_on_error:
+            self.notifier.send_error_notification(f"Error in search '{search_name}': {str(error)}")
+    
+    def poll_search(self, config, known_tokens):
+        """
+        Poll one search for listings not seen before.
+
+        Only page 1 is fetched unless it carries unknown tokens; paging goes on
+        while each page still does, up to the config's max_pages. New listings
+        are scraped and passed to the notification check.
+
+        Args:
+            config: Search configuration to poll
+            known_tokens: Tokens seen by earlier polls of this search, updated in place.
+                New tokens are added only once their listing has been processed,
+                so a failed scrape or notification is retried by the next poll
+
+        Returns:
+            DataFrame of the newly found listings (empty if none)
+        """
+        import pandas as pd
+        new_listings = []
+        pages = self.iter_feed_pages(config["params"], max_pages=config.get("max_pages", settings.scraper.max_pages))
+        try:
+            for page_listings in pages:
+                fresh = []
+                for listing in page_listings:
+                    token = listing.get('token')
+                    if not token or token in known_tokens:
+                        continue
+                    if self.property_tracker.property_exists(token):
+                        known_tokens.add(token)
+                    else:
+                        fresh.append(listing)
+                new_listings.extend(fresh)
+                if not fresh:
+                    break
+        finally:
+            pages.close()
+        
+        if not new_listings:
+            logger.info(f"💤 {config['name']}: nothing new")
+            return pd.DataFrame()
+        
+        for listing in new_listings:
+            listing['search_config'] = config['name']
+        unique_listings = self._collapse_feed_duplicates(self._deduplicate_listings(new_listings))
+        logger.info(f"🆕 {config['name']}: {len(unique_listings)} new listings")
+        
+        combined_df = self._collapse_detail_duplicates(self.scrape_listings_pages(unique_listings))
+        if not combined_df.empty:
+            combined_df['search_timestamp'] = pd.Timestamp.now()
+            # A poll sees only new tokens, so nothing is counted as removed
+            change_events = self._detect_changes(combined_df, full_crawl=False)
+            if self.enable_notifications:
+                self._handle_notifications(combined_df, change_events)
+            else:
+                self._commit_changes()
+            known_tokens.update(self._processed_tokens(combined_df))
+        return combined_df
+    
+    def _processed_tokens(self, combined_df):
+        """
+        Tokens a poll has finished with: every scraped row and the duplicates folded into it
+
+        With notifications on, a token counts only once it is marked seen, so
+        listings left unseen while Telegram is unreachable are polled again.
+        """
+        tokens = set(combined_df['listing_id'].dropna().astype(str))
+        if 'duplicate_ids' in combined_df:
+            tokens.update(
+                duplicate_id for duplicate_ids in combined_df['duplicate_ids']
+                if isinstance(duplicate_ids, list) for duplicate_id in duplicate_ids
+            )
+        if self.enable_notifications and self.notifier:
+            tokens = {token for token in tokens if self.property_tracker.property_exists(token)}
+        return tokens
+    
+    def close(self):
+        """Flush and close the persistent stores, letting queued notifications drain, and write the run metrics"""
+        if self.notifier and self.notifier.outbox:
+            self.notifier.outbox.close(timeout=settings.telegram_queue_drain_seconds)
+        if self.listing_store:
+            self.listing_store.save()
+        if self.response_cache:
+            self.response_cache.close()
+        self.property_tracker.close()
+        self._log_stage_summary()
+        export_metrics()
+    
+    def _log_stage_summary(self):
+        """One line of per-stage time, and the cache hit rates, from the run metrics"""
+        report = get_metrics().report()
+        stages = report['histograms'].get('stage_seconds', {})
+        if stages:
+            logger.info("⏱️ Stages: " + ", ".join(
+                f"{name.split('=', 1)[1]} {summary['count']}× {summary['total_seconds']:.2f}s"
+                for name, summary in sorted(stages.items())
+            ))
+        if report['cache_hit_rates']:
+            logger.info("🎯 Cache hit rates: " + ", ".join(
+                f"{name.split('=', 1)[1]} {rate:.0%}" for name, rate in sorted(report['cache_hit_rates'].items())
+            ))
+    
+    def fetch_all_feeds(self, search_configs):
+        """
+        Paginate the feeds of all search configurations concurrently.
+
+        Each config is paged by its own worker (stopping at its first empty page)
+        while every request is paced by the HTTP client's per-host rate limiter.
+
+        Returns:
+            List of (config, listings, elapsed_seconds, error, exhausted) in config
+            order; exhausted is True when paging ended on the feed's empty page
+        """
+        def fetch(config):
+            start = time.perf_counter()
+            outcome = {}
+            try:
+                listings = self.fetch_listings(config["params"], outcome=outcome, **self._pagination_options(config))
+                return config, listings, time.perf_counter() - start, None, outcome.get('exhausted', False)
+            except Exception as e:
+                return config, [], time.perf_counter() - start, e, False
+        
+        logger.info(f"\n=== Fetching listings for {len(search_configs)} searches ({self.feed_workers} workers) ===")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.feed_workers, max(1, len(search_configs)))) as executor:
+            results = list(executor.map(fetch, search_configs))
+        
+        logger.info("\n⏱️ Feed timing per search:")
+        for config, listings, elapsed, error, _ in results:
+            status = "failed" if error is not None else f"{len(listings)} listings"
+            logger.info(f"   {config['name']}: {status} in {elapsed:.2f}s")
+        logger.info(f"   Total feed wall time: {time.perf_counter() - started:.2f}s")
+        
+        return results
+    
+    def _pagination_options(self, config, is_known=None):
+        """
+        Page limit and new-only stop rule for one search (config keys override settings)
+
+        Args:
+            config: Search configuration or planned feed query
+            is_known: Token check for the new-only stop rule (defaults to the tracker)
+        """
+        options = {'max_pages': config.get('max_pages', settings.scraper.max_pages)}
+        if config.get('new_only', self.new_only):
+            options['is_known'] = is_known or self.property_tracker.property_exists
+            options['stop_after_known'] = config.get('stop_after_known', settings.scraper.stop_after_known)
+        return options
+    
+    def _plan_queries(self):
+        """Merged feed queries for the search configs (see plan_queries)"""
+        return plan_queries(self.search_configs, default_max_pages=settings.scraper.max_pages,
+                            feed_flags=settings.scraper.planner_feed_flags)
+    
+    def _fetch_planned_feeds(self):
+        """
+        Fetch merged feed queries and assign listings back to the original configs.
+
+        Returns results shaped like fetch_all_feeds, one per original config, so
+        deduplication and found_in_searches work exactly as without the planner.
+        """
+        queries = self._plan_queries()
+        logger.info(f"\n🧭 Query planner: {len(self.search_configs)} searches -> {len(queries)} feed queries")
+        
+        per_config = {config['name']: [] for config in self.search_configs}
+        elapsed_by_config = {}
+        errors = {}
+        exhausted_by_config = {}
+        for query, listings, elapsed, error, exhausted in self.fetch_all_feeds(queries):
+            for member in query['members']:
+                elapsed_by_config[member['name']] = elapsed
+                exhausted_by_config[member['name']] = exhausted
+                if error is not None:
+                    errors[member['name']] = error
+            for listing in listings:
+                for name in matching_searches(query['members'], feed_fields(listing)):
+                    per_config[name].append(dict(listing))
+        
+        return [
+            (config, per_config[config['name']], elapsed_by_config.get(config['name'], 0.0), errors.get(config['name']),
+             exhausted_by_config.get(config['name'], False))
+            for config in self.search_configs
+        ]
+    
+    def _confirm_planned_matches(self, combined_df):
+        """Re-check planner assignments against item-page fields the feed did not carry"""
+        configs_by_name = {config['name']: config for config in self.search_configs}
+        confirmed = [
+            matching_searches((configs_by_name[name] for name in row['found_in_searches']), detail_fields(row))
+            for row in combined_df.to_dict('records')
+        ]
+        combined_df = combined_df.assign(found_in_searches=confirmed)
+        keep = combined_df['found_in_searches'].map(bool)
+        if not keep.all():
+            logger.info(f"🧭 Dropped {(~keep).sum()} listings outside every original search")
+        return combined_df[keep].reset_index(drop=True)
+    
     def _deduplicate_listings(self, all_listings):
         """Remove duplicate listings based on token, keeping track of which searches found each property"""
         seen_tokens = {}
@@ -416,47 +1037,301 @@ class Yad2MultiSearchScraper(Yad2Scraper):
         return unique_listings
     
     def scrape_listings_pages(self, listings):
-        """Override to handle the new listing structure with search metadata"""
-        all_properties = []
+        """Override to handle the new listing structure with search metadata.
+
+        Item pages are fetched concurrently by up to ``max_workers`` threads paced
+        by the HTTP client's per-host rate limiter. Rows keep the order of ``listings``.
+        """
+        results = [None] * len(listings)
+        pending = {}  # token -> indices of listings waiting for that token
+        served_from_store = 0
         
-        for listing in listings:
+        for index, listing in enumerate(listings):
             listing_id = listing['token']
+            cached_property, from_store = self._cached_listing_details(listing_id, listing)
+            served_from_store += from_store
             
-            # Check if we've already scraped this listing
-            if listing_id in self.scraped_listings:
-                print(f"📋 Using cached data for listing {listing_id}")
-                cached_property = self.scraped_listings[listing_id].copy()
-                # Update search metadata
-                cached_property['found_in_searches'] = listing.get('found_in_searches', [listing.get('search_config', 'unknown')])
-                all_properties.append(cached_property)
-                continue
-            
-            # Scrape new listing
-            full_url = SCRAPER_CONFIG["base_item_url"] + listing_id
+            if cached_property is not None:
+                results[index] = cached_property
+            else:
+                pending.setdefault(listing_id, []).append(index)
+        
+        if self.listing_store:
+            logger.info(f"💾 Unchanged listings served from store: {served_from_store}, to fetch: {len(pending)}")
+        
+        try:
+            if pending:
+                workers = min(self.max_workers, len(pending))
+                logger.info(f"🚀 Scraping {len(pending)} listing pages with {workers} workers")
+                
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        listing_id: executor.submit(self._fetch_listing_details, listing_id, listings[indices[0]])
+                        for listing_id, indices in pending.items()
+                    }
+                    for listing_id, future in futures.items():
+                        # One failed item page skips that listing, as in streaming mode, not the whole run
+                        try:
+                            property_details = future.result()
+                        except Exception as e:
+                            logger.error(f"❌ Error scraping listing {listing_id}: {e}")
+                            get_metrics().inc('errors_total', stage='item_fetch')
+                            continue
+                        if not property_details:
+                            continue
+                        for index in pending[listing_id]:
+                            results[index] = property_details
+        finally:
+            if self.listing_store:
+                self.listing_store.save()
+        
+        self._print_response_cache_stats()
+        
+        # Cached details are shared, not copied; search metadata goes in as its own column
+        all_properties = ListingColumns()
+        for listing, property_details in zip(listings, results):
+            if property_details is not None:
+                all_properties.append(property_details, found_in_searches=self._found_in_searches(listing),
+                                      **self._duplicate_fields(listing))
+        
+        return all_properties.to_frame()
+    
+    def _cached_listing_details(self, listing_id, listing):
+        """
+        Look up details scraped earlier in this run or stored by a previous one
+
+        Returns:
+            (property_details or None, whether they came from the listing store)
+        """
+        metrics = get_metrics()
+        # Check if we've already scraped this listing
+        with self._cache_lock:
+            cached_property = self.scraped_listings.get(listing_id)
+        metrics.inc('cache_lookups_total', cache='run')
+        if cached_property is not None:
+            metrics.inc('cache_hits_total', cache='run')
+        
+        from_store = False
+        if cached_property is None and self.listing_store:
+            # Unchanged since the last run: serve the stored item page
+            cached_property = self.listing_store.get_unchanged(listing_id, listing)
+            metrics.inc('cache_lookups_total', cache='listing_store')
+            if cached_property is not None:
+                metrics.inc('cache_hits_total', cache='listing_store')
+                from_store = True
+                with self._cache_lock:
+                    cached_property = self.scraped_listings.setdefault(listing_id, cached_property)
+        
+        if cached_property is not None:
+            logger.debug(f"📋 Using cached data for listing {listing_id}")
+        return cached_property, from_store
+    
+    def _print_response_cache_stats(self):
+        if self.response_cache:
+            stats = self.response_cache.stats()
+            logger.info(f"🗄️ Response cache: {stats['hits']} revalidated, {stats['misses']} downloaded, "
+                  f"{stats['entries']} entries ({stats['bytes'] / 1e6:.1f} MB)")
+    
+    def _fetch_listing_details(self, listing_id, listing):
+        """Fetch a single item page and cache the result"""
+        full_url = SCRAPER_CONFIG["base_item_url"] + listing_id
+        if self.response_cache:
+            property_details = self._scrape_listing_page_cached(listing_id, full_url)
+        else:
             property_details = self.scrape_listing_page(full_url)
+        
+        if property_details:
+            with self._cache_lock:
+                # Another worker may have filled the cache first; keep a single entry
+                property_details = self.scraped_listings.setdefault(listing_id, property_details)
+            if self.listing_store:
+                self.listing_store.put(listing_id, listing, property_details)
+        
+        return property_details
+    
+    def _scrape_listing_page_cached(self, listing_id, listing_url):
+        """
+        Fetch an item page through the on-disk response cache.
+
+        Sends a conditional GET when validators are cached. A 304, or a body
+        identical to the cached one, returns the stored details without parsing.
+        """
+        entry = self.response_cache.get(listing_id)
+        headers = self.headers
+        if entry:
+            headers = {**self.headers, **entry.conditional_headers()}
+        
+        logger.debug(f"Scraping individual listing page: {listing_url}")
+        metrics = get_metrics()
+        with metrics.stage('item_fetch'):
+            response = self.http.get(listing_url, headers=headers)
+        
+        metrics.inc('cache_lookups_total', cache='response_cache')
+        if entry and entry.details and (
+            response.status_code == 304
+            or (response.ok and self.response_cache.body_hash(response.content) == entry.body_hash)
+        ):
+            self.response_cache.touch(listing_id)
+            metrics.inc('cache_hits_total', cache='response_cache')
+            return entry.details
+        
+        response.raise_for_status()
+        if self.recorder:
+            self.recorder.record(response)
+        
+        property_details = self.parse_listing_page(response.content, listing_url)
+        if property_details:
+            self.response_cache.put(
+                listing_id,
+                response.content,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                details=property_details,
+            )
+        return property_details
+    
+    @staticmethod
+    def _cluster_options():
+        """ListingClusterer options from settings"""
+        return {
+            'distance_m': settings.scraper.cluster_distance_m,
+            'price_tolerance': settings.scraper.cluster_price_tolerance,
+            'similarity': settings.scraper.cluster_similarity,
+        }
+    
+    def _new_clusterer(self):
+        return ListingClusterer(**self._cluster_options())
+    
+    def _collapse_feed_duplicates(self, unique_listings):
+        """
+        Fold feed entries for the same apartment under different tokens into one
+
+        Private, agency and platinum entries for one apartment are clustered on
+        the feed's coordinates, street, floor, rooms, size and image URLs, so only
+        one item page is fetched per apartment.
+
+        Args:
+            unique_listings: Token-deduplicated feed entries
+
+        Returns:
+            One entry per cluster, carrying the other tokens in duplicate_ids and
+            every member's searches in found_in_searches
+        """
+        if not self.cluster_duplicates:
+            return unique_listings
+        for listing in unique_listings:
+            listing.setdefault('duplicate_ids', [])
+        if len(unique_listings) < 2:
+            return unique_listings
+        
+        with get_metrics().stage('dedup_clusters'):
+            clusters = cluster_listings((feed_fields(listing) for listing in unique_listings), **self._cluster_options())
+            dropped = set()
+            for members in clusters:
+                keep = min(members, key=lambda index: self._representative_rank(
+                    unique_listings[index].get('token'), unique_listings[index].get('price'),
+                    unique_listings[index].get('adType'), index
+                ))
+                for index in members:
+                    if index != keep:
+                        self._absorb_duplicate(unique_listings[keep], unique_listings[index])
+                        dropped.add(index)
+        
+        if not dropped:
+            return unique_listings
+        logger.info(f"🧩 Collapsed {len(dropped)} duplicate listings of {len(clusters)} apartments before scraping")
+        get_metrics().inc('duplicates_collapsed_total', len(dropped), stage='feed')
+        return [listing for index, listing in enumerate(unique_listings) if index not in dropped]
+    
+    def _collapse_detail_duplicates(self, combined_df):
+        """
+        Fold scraped rows for the same apartment into one, now also comparing descriptions
+
+        Args:
+            combined_df: Scraped listings
+
+        Returns:
+            combined_df with one row per cluster; the rows dropped are listed in the
+            kept row's duplicate_ids and their searches merged into found_in_searches
+        """
+        if not self.cluster_duplicates or len(combined_df) < 2:
+            return combined_df
+        
+        with get_metrics().stage('dedup_clusters'):
+            records = combined_df.to_dict('records')
+            clusters = cluster_listings(records, **self._cluster_options())
+            if not clusters:
+                return combined_df
             
-            if property_details:
-                # Add search metadata
-                property_details['found_in_searches'] = listing.get('found_in_searches', [listing.get('search_config', 'unknown')])
-                
-                # Cache the result
-                self.scraped_listings[listing_id] = property_details.copy()
-                all_properties.append(property_details)
+            found = [list(row.get('found_in_searches') or []) for row in records]
+            duplicates = [list(row.get('duplicate_ids') or []) for row in records]
+            dropped = []
+            for members in clusters:
+                keep = min(members, key=lambda index: self._representative_rank(
+                    records[index]['listing_id'], records[index].get('rent'), None, index
+                ))
+                for index in members:
+                    if index == keep:
+                        continue
+                    found[keep].extend(name for name in found[index] if name not in found[keep])
+                    duplicates[keep].extend([records[index]['listing_id'], *duplicates[index]])
+                    dropped.append(index)
             
-            # Small delay between requests
-            time.sleep(0.5)
-        
-        if all_properties: 
-            df = pd.DataFrame(all_properties)
-            return df
+            combined_df = combined_df.assign(found_in_searches=found, duplicate_ids=duplicates)
+            combined_df = combined_df.drop(index=combined_df.index[dropped]).reset_index(drop=True)
         
-        return pd.DataFrame()
+        logger.info(f"🧩 Collapsed {len(dropped)} duplicate listings of {len(clusters)} apartments after scraping")
+        get_metrics().inc('duplicates_collapsed_total', len(dropped), stage='detail')
+        return combined_df
+    
+    def _representative_rank(self, token, price, ad_type, index):
+        """Sort key for the listing that stands for its cluster: known token, private ad, lowest price, first found"""
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            price = None
+        if price is None or not price > 0:
+            price = float('inf')
+        return (not self.property_tracker.property_exists(token), ad_type not in (None, 'private'), price, index)
+    
+    @staticmethod
+    def _absorb_duplicate(listing, duplicate):
+        """Record a duplicate feed entry on the listing that represents its apartment"""
+        searches = listing.setdefault('found_in_searches', [listing.get('search_config', 'unknown')])
+        for name in duplicate.get('found_in_searches', [duplicate.get('search_config', 'unknown')]):
+            if name not in searches:
+                searches.append(name)
+        listing.setdefault('duplicate_ids', []).extend([duplicate['token'], *duplicate.get('duplicate_ids', [])])
+    
+    def _duplicate_fields(self, listing):
+        """duplicate_ids column value for a scraped row, when clustering is on"""
+        if not self.cluster_duplicates:
+            return {}
+        return {'duplicate_ids': list(listing.get('duplicate_ids', []))}
+    
+    def _mark_duplicates_seen(self, combined_df):
+        """Mark collapsed duplicate tokens as seen, so one never gets its own alert once its twin is gone"""
+        if 'duplicate_ids' not in combined_df:
+            return
+        entries = [
+            (duplicate_id, {'listing_id': duplicate_id, 'duplicate_of': listing_id})
+            for listing_id, duplicate_ids in zip(combined_df['listing_id'], combined_df['duplicate_ids'])
+            if isinstance(duplicate_ids, list)
+            for duplicate_id in duplicate_ids
+            if not self.property_tracker.property_exists(duplicate_id)
+        ]
+        if entries:
+            self.property_tracker.add_properties(entries)
+    
+    def _found_in_searches(self, listing):
+        """Names of the searches that found a listing"""
+        return listing.get('found_in_searches', [listing.get('search_config', 'unknown')])
     
     def print_search_summary_v2(self, all_listings, unique_listings, combined_df):
         """Print improved summary of search results"""
-        print("\n" + "="*60)
-        print("SEARCH SUMMARY")
-        print("="*60)
+        logger.info("\n" + "="*60)
+        logger.info("SEARCH SUMMARY")
+        logger.info("="*60)
         
         # Count listings per search config
         search_counts = {}
@@ -465,30 +1340,33 @@ class Yad2MultiSearchScraper(Yad2Scraper):
             search_counts[config] = search_counts.get(config, 0) + 1
         
         for config_name, count in search_counts.items():
-            print(f"{config_name}: {count} listings")
+            logger.info(f"{config_name}: {count} listings")
         
-        print(f"\nTotal listings found: {len(all_listings)}")
-        print(f"Unique listings scraped: {len(unique_listings)}")
-        print(f"Duplicates avoided: {len(all_listings) - len(unique_listings)}")
-        print(f"Successfully processed: {len(combined_df)}")
+        logger.info(f"\nTotal listings found: {len(all_listings)}")
+        logger.info(f"Unique listings scraped: {len(unique_listings)}")
+        logger.info(f"Duplicates avoided: {len(all_listings) - len(unique_listings)}")
+        logger.info(f"Successfully processed: {len(combined_df)}")
         
         # Show which searches had overlaps
         if len(combined_df) > 0:
             overlap_analysis = self._analyze_search_overlaps(combined_df)
             if overlap_analysis:
-                print(f"\n🔄 Search overlaps found:")
+                logger.info(f"\n🔄 Search overlaps found:")
                 for overlap in overlap_analysis:
-                    print(f"   {overlap}")
+                    logger.info(f"   {overlap}")
         
-        print("="*60)
+        logger.info("="*60)
     
     def _analyze_search_overlaps(self, df):
         """Analyze which properties were found in multiple searches"""
         overlaps = []
+        if 'found_in_searches' not in df:
+            return overlaps
         
-        for _, row in df.iterrows():
-            found_in = row.get('found_in_searches', [])
+        for listing_id, found_in in zip(df['listing_id'], df['found_in_searches']):
             if len(found_in) > 1:
-                overlaps.append(f"Property {row['listing_id']} found in: {', '.join(found_in)}")
+                overlaps.append(f"Property {listing_id} found in: {', '.join(found_in)}")
+                if len(overlaps) == 10:
+                    break  # First 10 overlaps are enough, avoid spam
         
-        return overlaps[:10]  # Return first 10 overlaps to avoid spam
\ No newline at end of file
+        return overlaps
\ No newline at end of file
@@ -0,0 +1,410 @@
+import csv
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config.settings import settings
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Columns owned by the user; the scraper never writes them
+MANUAL_COLUMNS = ('decision', 'notes', 'contacted')
+# Columns the scraper maintains per row
+STATUS_COLUMN = 'status'
+LAST_SCRAPED_COLUMN = 'last_scraped_at'
+# Change on every run without the listing changing; not diffed
+VOLATILE_COLUMNS = ('search_timestamp', LAST_SCRAPED_COLUMN)
+
+
+def column_letter(index: int) -> str:
+    """0-based column index -> A1 column letters (0 -> A, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def a1_range(row: int, first_col: int, last_col: int, last_row: Optional[int] = None) -> str:
+    """A1 range for 1-based rows and 0-based columns"""
+    return f"{column_letter(first_col)}{row}:{column_letter(last_col)}{last_row or row}"
+
+
+def parse_a1_range(a1: str) -> Tuple[int, int]:
+    """Top-left corner of an A1 range as (0-based row, 0-based column)"""
+    match = re.match(r"([A-Z]+)(\d+)", a1.split('!')[-1])
+    letters, row = match.groups()
+    col = 0
+    for letter in letters:
+        col = col * 26 + (ord(letter) - ord('A') + 1)
+    return int(row) - 1, col - 1
+
+
+def cell_value(value):
+    """Convert a DataFrame value to what is sent to the sheet (RAW input)"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple, set)) or getattr(value, 'ndim', 0) > 0:
+        return ', '.join(str(item) for item in list(value))
+    if hasattr(value, 'item'):
+        value = value.item()  # numpy scalar
+    if isinstance(value, bool):
+        return value
+    if pd.isna(value):
+        return ''
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def cell_text(value) -> str:
+    """How the sheet displays a value written by cell_value (what get_all_values returns)"""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    return str(value)
+
+
+class GspreadBackend:
+    def __init__(self, credentials_file: str, spreadsheet_name: str, worksheet_name: str,
+                 spreadsheet_id: Optional[str] = None):
+        """
+        Initialize a worksheet backend on the Google Sheets API via gspread
+
+        Args:
+            credentials_file: Service account credentials JSON
+            spreadsheet_name: Spreadsheet title, used when spreadsheet_id is not set
+            worksheet_name: Worksheet (tab) holding the listings; created if missing
+            spreadsheet_id: Spreadsheet key from its URL
+        """
+        import gspread
+
+        client = gspread.service_account(filename=credentials_file)
+        if spreadsheet_id:
+            self.spreadsheet = client.open_by_key(spreadsheet_id)
+        else:
+            self.spreadsheet = client.open(spreadsheet_name)
+        try:
+            self.worksheet = self.spreadsheet.worksheet(worksheet_name)
+        except gspread.WorksheetNotFound:
+            self.worksheet = self.spreadsheet.add_worksheet(worksheet_name, rows=1000, cols=60)
+        self.api_calls = 0
+
+    def read_values(self) -> List[List[str]]:
+        self.api_calls += 1
+        return self.worksheet.get_all_values()
+
+    def ensure_size(self, rows: int, cols: int):
+        """Grow the grid so every written range fits"""
+        if rows > self.worksheet.row_count or cols > self.worksheet.col_count:
+            self.api_calls += 1
+            self.worksheet.resize(rows=max(rows, self.worksheet.row_count), cols=max(cols, self.worksheet.col_count))
+
+    def batch_update(self, updates: List[Dict]):
+        self.api_calls += 1
+        self.worksheet.batch_update(updates, value_input_option='RAW')
+
+    def backup(self) -> str:
+        name = f"{self.worksheet.title} backup {datetime.now().strftime('%Y-%m-%d %H%M')}"
+        self.api_calls += 1
+        self.spreadsheet.duplicate_sheet(self.worksheet.id, new_sheet_name=name)
+        return name
+
+
+class LocalSheetBackend:
+    def __init__(self, path: str = 'data/sheet.csv'):
+        """
+        Initialize a CSV-file stand-in for a worksheet
+
+        Stores cells as the sheet would display them, so tests and offline runs
+        exercise the same read-diff-batch_update path as the real sheet.
+
+        Args:
+            path: CSV file holding the grid
+        """
+        self.path = path
+        self.api_calls = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def read_values(self) -> List[List[str]]:
+        self.api_calls += 1
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return [row for row in csv.reader(f)]
+
+    def ensure_size(self, rows: int, cols: int):
+        pass  # the CSV grid grows as cells are written
+
+    def batch_update(self, updates: List[Dict]):
+        self.api_calls += 1
+        grid = self.read_values()
+        self.api_calls -= 1  # internal read, not a separate call
+        for update in updates:
+            top, left = parse_a1_range(update['range'])
+            for row_offset, row_values in enumerate(update['values']):
+                row_index = top + row_offset
+                while len(grid) <= row_index:
+                    grid.append([])
+                row = grid[row_index]
+                if len(row) < left + len(row_values):
+                    row.extend([''] * (left + len(row_values) - len(row)))
+                for col_offset, value in enumerate(row_values):
+                    row[left + col_offset] = cell_text(value)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(grid)
+        os.replace(tmp_path, self.path)
+
+    def backup(self) -> str:
+        root, extension = os.path.splitext(self.path)
+        backup_path = f"{root}.backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}{extension}"
+        if os.path.exists(self.path):
+            shutil.copyfile(self.path, backup_path)
+        return backup_path
+
+
+class GoogleSheetsReaderWriter:
+    def __init__(self, backend=None):
+        """
+        Initialize the listings sheet writer
+
+        Args:
+            backend: Object with read_values/ensure_size/batch_update/backup
+                (defaults to settings.google_sheets.backend: 'gspread' or 'local')
+        """
+        self.backend = backend or self._backend_from_settings()
+        self._values = None  # grid as of the last read or write
+
+    @staticmethod
+    def _backend_from_settings():
+        config = settings.google_sheets
+        if config.backend == 'local':
+            return LocalSheetBackend(config.local_path)
+        return GspreadBackend(
+            config.credentials_file,
+            config.spreadsheet_name,
+            config.worksheet_name,
+            spreadsheet_id=config.spreadsheet_id,
+        )
+
+    def _read(self) -> List[List[str]]:
+        if self._values is None:
+            self._values = self.backend.read_values()
+        return self._values
+
+    def backup_sheet(self) -> str:
+        """Copy the worksheet before a large update; returns the copy's name"""
+        backup_name = self.backend.backup()
+        logger.info(f"💾 Sheet backed up to {backup_name}")
+        return backup_name
+
+    def upsert_listings(self, df: pd.DataFrame, key: str = 'listing_id', mark_missing: bool = False) -> Dict:
+        """
+        Insert new listings and update changed ones in a single batch_update
+
+        The sheet is read once and diffed in memory against the key column.
+        Only changed cells are written, and manual columns (decision, notes,
+        contacted) and any other user-added columns are never touched.
+
+        Args:
+            df: Scraped listings
+            key: Column identifying a listing
+            mark_missing: Set status to 'missing' on sheet rows absent from df
+                (only meaningful when df is a full crawl)
+
+        Returns:
+            Dict with 'new', 'updated', 'unchanged' and 'missing' counts,
+            'new_properties' (DataFrame of the inserted listings) and 'cells_written'
+        """
+        metrics = get_metrics()
+        api_calls = self.backend.api_calls
+        with metrics.stage('sheet_upsert'):
+            stats = self._upsert(df, key, mark_missing)
+        metrics.inc('stage_items_total', len(df), stage='sheet_upsert')
+        metrics.inc('sheets_api_calls_total', self.backend.api_calls - api_calls)
+        metrics.inc('sheets_cells_written_total', stats['cells_written'])
+        return stats
+
+    def _upsert(self, df: pd.DataFrame, key: str, mark_missing: bool) -> Dict:
+        values = [list(row) for row in self.backend.read_values()]
+        header = values[0] if values else []
+        rows = values[1:]
+
+        data_columns = [column for column in df.columns if column not in MANUAL_COLUMNS]
+        header_changed = False
+        if not header:
+            header = list(data_columns) + [STATUS_COLUMN, LAST_SCRAPED_COLUMN] + list(MANUAL_COLUMNS)
+            header_changed = True
+        else:
+            for column in data_columns + [STATUS_COLUMN, LAST_SCRAPED_COLUMN]:
+                if column not in header:
+                    header.append(column)
+                    header_changed = True
+        col_index = {column: index for index, column in enumerate(header)}
+        if key not in col_index:
+            raise ValueError(f"Key column {key!r} is missing from the listings")
+        key_col = col_index[key]
+
+        row_by_key = {}
+        for row_number, row in enumerate(rows):
+            if len(row) > key_col and row[key_col] and row[key_col] not in row_by_key:
+                row_by_key[row[key_col]] = row_number
+
+        now = cell_value(pd.Timestamp.now())
+        df = df.drop_duplicates(key, keep='last')
+        updates = []
+        new_rows = []
+        new_mask = []
+        updated = 0
+        cells_written = 0
+        seen_keys = set()
+
+        for record in df[data_columns].to_dict('records'):
+            listing_key = cell_text(cell_value(record[key]))
+            seen_keys.add(listing_key)
+            row_number = row_by_key.get(listing_key)
+
+            if row_number is None:
+                new_mask.append(True)
+                record_values = {column: cell_value(value) for column, value in record.items()}
+                record_values[STATUS_COLUMN] = 'new'
+                record_values[LAST_SCRAPED_COLUMN] = now
+                new_rows.append([record_values.get(column, '') for column in header])
+                continue
+
+            new_mask.append(False)
+            existing = rows[row_number]
+            changed = {}
+            for column, value in record.items():
+                if column in VOLATILE_COLUMNS:
+                    continue
+                value = cell_value(value)
+                index = col_index[column]
+                current = existing[index] if index < len(existing) else ''
+                if cell_text(value) != current:
+                    changed[index] = value
+            if not changed:
+                continue
+
+            updated += 1
+            for column, value in record.items():
+                if column in VOLATILE_COLUMNS:
+                    changed[col_index[column]] = cell_value(value)
+            changed[col_index[STATUS_COLUMN]] = 'updated'
+            changed[col_index[LAST_SCRAPED_COLUMN]] = now
+            updates.extend(self._row_ranges(row_number + 2, changed))
+            cells_written += len(changed)
+            self._apply(existing, changed)
+
+        missing = 0
+        if mark_missing:
+            status_col = col_index[STATUS_COLUMN]
+            for listing_key, row_number in row_by_key.items():
+                existing = rows[row_number]
+                current = existing[status_col] if status_col < len(existing) else ''
+                if listing_key not in seen_keys and current != 'missing':
+                    missing += 1
+                    updates.extend(self._row_ranges(row_number + 2, {status_col: 'missing'}))
+                    cells_written += 1
+                    self._apply(existing, {status_col: 'missing'})
+
+        if header_changed:
+            updates.insert(0, {'range': a1_range(1, 0, len(header) - 1), 'values': [header]})
+            cells_written += len(header)
+        if new_rows:
+            first_row = len(rows) + 2
+            updates.append({
+                'range': a1_range(first_row, 0, len(header) - 1, first_row + len(new_rows) - 1),
+                'values': new_rows,
+            })
+            cells_written += len(new_rows) * len(header)
+
+        if updates:
+            self.backend.ensure_size(len(rows) + len(new_rows) + 1, len(header))
+            self.backend.batch_update(updates)
+
+        self._values = [header] + rows + [[cell_text(value) for value in row] for row in new_rows]
+        new_properties = df[pd.Series(new_mask, index=df.index, dtype=bool)] if len(df) else df
+        stats = {
+            'new': len(new_rows),
+            'updated': updated,
+            'unchanged': len(df) - len(new_rows) - updated,
+            'missing': missing,
+            'new_properties': new_properties,
+            'cells_written': cells_written,
+        }
+        logger.info(f"📄 Sheet upsert: {stats['new']} new, {stats['updated']} updated, {stats['unchanged']} unchanged; "
+              f"{cells_written} cells in {1 if updates else 0} batch_update")
+        return stats
+
+    @staticmethod
+    def _row_ranges(row: int, changed: Dict[int, object]) -> List[Dict]:
+        """One range per run of adjacent changed columns in a row"""
+        ranges = []
+        columns = sorted(changed)
+        start = previous = columns[0]
+        for column in columns[1:] + [None]:
+            if column is not None and column == previous + 1:
+                previous = column
+                continue
+            ranges.append({
+                'range': a1_range(row, start, previous),
+                'values': [[changed[index] for index in range(start, previous + 1)]],
+            })
+            if column is not None:
+                start = previous = column
+        return ranges
+
+    @staticmethod
+    def _apply(row: List[str], changed: Dict[int, object]):
+        """Mirror written cells into the in-memory grid"""
+        for index, value in changed.items():
+            if len(row) <= index:
+                row.extend([''] * (index + 1 - len(row)))
+            row[index] = cell_text(value)
+
+    def get_update_summary(self) -> Dict:
+        """Row and status counts of the sheet (no extra read right after an upsert)"""
+        values = self._read()
+        header = values[0] if values else []
+        rows = values[1:]
+        status_counts = {}
+        if STATUS_COLUMN in header:
+            status_col = header.index(STATUS_COLUMN)
+            for row in rows:
+                status = row[status_col] if status_col < len(row) else ''
+                status_counts[status] = status_counts.get(status, 0) + 1
+        return {'total_listings': len(rows), 'status_counts': status_counts}
+
+    def get_manual_columns_summary(self) -> Dict:
+        """How many rows have each manual column filled in, plus the decision breakdown"""
+        values = self._read()
+        header = values[0] if values else []
+        rows = values[1:]
+        summary = {}
+        for column in MANUAL_COLUMNS:
+            if column not in header:
+                continue
+            index = header.index(column)
+            filled = [row[index] for row in rows if index < len(row) and row[index].strip()]
+            summary[column] = {'filled': len(filled)}
+            if column == 'decision':
+                breakdown = {}
+                for decision in filled:
+                    breakdown[decision] = breakdown.get(decision, 0) + 1
+                summary[column]['values'] = breakdown
+        return summary
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Run from anywhere: the packages live at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    """Build Yad2MultiSearchScraper instances whose state lives in tmp_path, with no optional stores"""
+    from config.settings import settings
+    from scripts.scraper import Yad2MultiSearchScraper
+
+    monkeypatch.setattr(settings, 'database_path', str(tmp_path / 'seen.db'))
+    for name in ('incremental', 'response_cache', 'history', 'change_detection', 'cluster_duplicates', 'query_planner'):
+        monkeypatch.setattr(settings.scraper, name, False)
+    scrapers = []
+
+    def make(search_configs=(), **options):
+        options.setdefault('enable_notifications', False)
+        scraper = Yad2MultiSearchScraper(list(search_configs), **options)
+        scrapers.append(scraper)
+        return scraper
+
+    yield make
+    for scraper in scrapers:
+        scraper.property_tracker.close()
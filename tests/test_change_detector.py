@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.change_detector import ChangeDetector, _address_key, address_key, image_hash
+from utils.listing_columns import ListingColumns
+from utils.property_tracker import PropertyTracker
+
+RUN = datetime(2026, 10, 1, 9)
+
+
+def listing(listing_id, rent, images=('a.jpg', 'b.jpg'), street='Herzl', floor=2, rooms=3, sqm=70):
+    return {
+        'listing_id': listing_id, 'rent': rent, 'vaad': 100, 'arnona_month': 300,
+        'entry_date': '2026-11-01', 'images': list(images), 'street': street,
+        'floor': floor, 'rooms': rooms, 'sqm': sqm, 'link': f'https://example.com/{listing_id}',
+    }
+
+
+def frame(*rows):
+    """Build the run frame the way the scraper does (street is Categorical)"""
+    columns = ListingColumns()
+    for row in rows:
+        columns.append(row)
+    return columns.to_frame()
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = PropertyTracker(str(tmp_path / 'seen.db'))
+    yield tracker
+    tracker.close()
+
+
+def run(detector, *rows, day=0, full_crawl=True):
+    events = detector.detect(frame(*rows), full_crawl=full_crawl, now=RUN + timedelta(days=day))
+    detector.commit()
+    return {(event.event, event.listing_id): event for event in events.itertuples()}
+
+
+def test_listing_without_street_does_not_break_detection(tracker):
+    detector = ChangeDetector(tracker)
+    events = run(detector, listing('a', 5000), listing('b', 6000, street=None))
+    assert set(events) == {('new', 'a'), ('new', 'b')}
+
+    events = run(detector, listing('a', 4200), listing('b', 6000, street=None), day=1)
+    assert set(events) == {('price_drop', 'a')}
+    assert events['price_drop', 'a'].price_change == -800
+
+
+def test_price_rise_uses_monthly_total(tracker):
+    detector = ChangeDetector(tracker)
+    run(detector, listing('a', 5000))
+    rising = dict(listing('a', 5000), vaad=250)
+    events = run(detector, rising, day=1)
+    assert events['price_rise', 'a'].old_price == 5400
+    assert events['price_rise', 'a'].new_price == 5550
+
+
+def test_repost_with_same_photos_is_relisted(tracker):
+    detector = ChangeDetector(tracker)
+    run(detector, listing('a', 5000), listing('b', 6000, images=('c.jpg',), street='Dizengoff'))
+    # 'a' disappears and comes back under a new token with the same photos in another order
+    events = run(detector, listing('a2', 4800, images=('b.jpg?w=800', 'a.jpg')),
+                 listing('b', 6000, images=('c.jpg',), street='Dizengoff'), day=1)
+    relisted = events['relisted', 'a2']
+    assert relisted.previous_listing_id == 'a'
+    assert relisted.old_price == 5400 and relisted.new_price == 5200
+    assert ('new', 'a2') not in events
+
+
+def test_photos_shared_with_a_live_listing_are_not_a_relisting(tracker):
+    detector = ChangeDetector(tracker)
+    run(detector, listing('a', 5000))
+    events = run(detector, listing('a', 5000), listing('stock', 5200, street='Dizengoff'), day=1)
+    assert set(events) == {('new', 'stock')}
+
+
+def test_removed_after_consecutive_full_crawls_only(tracker):
+    detector = ChangeDetector(tracker, removed_after=2)
+    run(detector, listing('a', 5000), listing('b', 6000, images=('c.jpg',)))
+    assert run(detector, listing('b', 6000, images=('c.jpg',)), day=1) == {}
+    # Partial runs never count a listing as missing
+    assert run(detector, listing('b', 6000, images=('c.jpg',)), day=2, full_crawl=False) == {}
+    events = run(detector, listing('b', 6000, images=('c.jpg',)), day=3)
+    assert set(events) == {('removed', 'a')}
+
+
+def test_discarded_state_is_compared_again(tracker):
+    detector = ChangeDetector(tracker)
+    run(detector, listing('a', 5000))
+    detector.detect(frame(listing('a', 4000)), now=RUN + timedelta(days=1))
+    detector.discard()
+    events = run(detector, listing('a', 4000), day=2)
+    assert set(events) == {('price_drop', 'a')}
+
+
+def test_image_hash_ignores_order_and_query():
+    assert image_hash(['x.jpg?a=1', 'y.jpg']) == image_hash(['y.jpg', 'x.jpg'])
+    assert image_hash([]) is None and image_hash(None) is None
+
+
+def test_scalar_address_key_matches_the_frame_one():
+    rows = [listing('a', 5000), listing('b', 5000, floor=None, sqm='72.5'), listing('c', 5000, street='  '),
+            listing('d', 5000, street=' Herzl ', rooms=3.5)]
+    expected = [key if isinstance(key, str) else None for key in _address_key(frame(*rows))]
+    assert [address_key(row) for row in rows] == expected
@@ -0,0 +1,64 @@
+import pytest
+
+from utils.dedup_clusters import ListingClusterer, cluster_listings, content_tokens
+
+AGENCY_TEXT = ('Spacious renovated apartment in a quiet building close to the park, '
+               'bright living room, new kitchen, air conditioning in every room')
+STOCK_PHOTOS = ['https://img.yad2.co.il/agency/lobby.jpg', 'https://img.yad2.co.il/agency/facade.jpg']
+
+
+def unit(**fields):
+    record = {
+        'latitude': 32.0800, 'longitude': 34.7800, 'street': 'Herzl', 'floor': 3,
+        'rooms': 3, 'sqm': 75, 'rent': 6500, 'description': AGENCY_TEXT, 'images': STOCK_PHOTOS,
+    }
+    record.update(fields)
+    return record
+
+
+def test_same_unit_under_two_tokens_is_merged():
+    private = unit(description='Lovely flat', images=['https://img.yad2.co.il/p/1.jpg'])
+    agency = unit(latitude=32.08005, sqm=78, rent=6800)  # ~6 m away, size and rent within 10%
+    assert cluster_listings([private, agency]) == [[0, 1]]
+
+
+@pytest.mark.parametrize('other', [
+    {'rooms': 4, 'sqm': 95, 'rent': 8200},  # bigger unit on the same floor
+    {'sqm': 60},  # same rooms, clearly smaller
+    {'rent': 7600},  # same layout, 17% dearer
+])
+def test_distinct_units_sharing_agency_text_are_not_merged(other):
+    assert cluster_listings([unit(), unit(**other)]) == []
+
+
+def test_unknown_size_is_never_merged():
+    assert cluster_listings([unit(), unit(sqm=None)]) == []
+
+
+def test_repost_without_coordinates_or_floor_merges_on_content():
+    original = unit(latitude=None, longitude=None, floor=None)
+    repost = unit(latitude=None, longitude=None, floor=None,
+                  images=[url.replace('img.yad2.co.il', 'cdn.yad2.co.il') + '?w=800' for url in STOCK_PHOTOS])
+    assert cluster_listings([original, repost]) == [[0, 1]]
+    assert cluster_listings([original, dict(repost, street='Dizengoff')]) == []
+
+
+def test_clusters_are_transitive_and_rooted_at_the_first_listing():
+    clusterer = ListingClusterer()
+    far = unit(latitude=32.0900, description='Other building', images=[])
+    indices = [clusterer.add(record) for record in (
+        far,
+        unit(latitude=32.08000),
+        unit(latitude=32.08020, description='x', images=[]),  # 22 m from the first
+        unit(latitude=32.08040, description='y', images=[]),  # 22 m from the second, 44 m from the first
+    )]
+    assert indices == [0, 1, 2, 3]
+    assert clusterer.clusters() == [[1, 2, 3]]
+    assert {clusterer.find(index) for index in (1, 2, 3)} == {1}
+    assert clusterer.find(0) == 0
+
+
+def test_content_tokens_ignore_image_host_and_query():
+    assert content_tokens(None, ['https://a.example/x/1.jpg?w=100']) == \
+        content_tokens('', ['http://b.example/x/1.jpg'])
+    assert content_tokens(None, None) == []
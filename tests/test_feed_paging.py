@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from benchmarks.fixtures import make_feed_page
+from config.settings import settings
+from scripts.scraper import Yad2Scraper
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class _FeedClient:
+    """Serves feed pages from a list; pages past the end are empty"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, params=None, headers=None):
+        page = params['page']
+        self.requested.append(page)
+        tokens = self.pages[page - 1] if page <= len(self.pages) else []
+        return _Response(make_feed_page(tokens, seed=page))
+
+
+@pytest.mark.parametrize('max_pages, exhausted', [(2, False), (3, True)])
+def test_exhausted_only_when_paging_reaches_the_empty_page(max_pages, exhausted):
+    client = _FeedClient([['a1', 'a2', 'a3'], ['b1', 'b2', 'b3']])
+    outcome = {}
+    listings = Yad2Scraper(http_client=client).fetch_listings({}, max_pages=max_pages, outcome=outcome)
+    assert len(listings) == 6
+    assert outcome['exhausted'] is exhausted
+
+
+def test_known_run_stop_is_not_exhausted():
+    client = _FeedClient([['a1', 'a2', 'a3'], ['b1', 'b2', 'b3']])
+    outcome = {}
+    Yad2Scraper(http_client=client).fetch_listings(
+        {}, max_pages=5, is_known=lambda token: True, stop_after_known=2, outcome=outcome
+    )
+    assert client.requested == [1]
+    assert outcome['exhausted'] is False
+
+
+class _MarkingQueue:
+    """Listing queue that marks each listing seen as it is queued, as the streaming diff stage would"""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def put(self, listing):
+        if isinstance(listing, dict):
+            self.tracker.add_property(listing['token'])
+
+
+def test_streaming_feeds_judge_known_tokens_from_run_start(make_scraper, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'feed_workers', 1)  # the second search pages after the first
+    client = _FeedClient([['a1', 'a2', 'a3'], ['b1', 'b2', 'b3']])
+    configs = [{'name': name, 'params': {}, 'new_only': True, 'stop_after_known': 2, 'max_pages': 5}
+               for name in ('first', 'second')]
+    scraper = make_scraper(configs, http_client=client)
+    exhausted = []
+    scraper._stream_feeds(_MarkingQueue(scraper.property_tracker), exhausted)
+    # Listings the first search announced do not cut the second one short
+    assert client.requested == [1, 2, 3, 1, 2, 3]
+    assert exhausted == [True, True]
+
+
+def test_dispatcher_failure_drains_the_feeds_and_is_raised(make_scraper, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'stream_queue_size', 1)  # feed workers block unless drained
+    client = _FeedClient([[f'a{index}' for index in range(10)], [f'b{index}' for index in range(10)]])
+    scraper = make_scraper([{'name': 'only', 'params': {}, 'max_pages': 5}], http_client=client)
+
+    def broken(token, listing):
+        raise RuntimeError('cache read failed')
+
+    monkeypatch.setattr(scraper, '_cached_listing_details', broken)
+    raised = []
+
+    def run():
+        try:
+            scraper.run_streaming()
+        except RuntimeError as e:
+            raised.append(e)
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(timeout=10)
+    assert not runner.is_alive()
+    assert [str(e) for e in raised] == ['cache read failed']
+    assert client.requested == [1, 2, 3]  # the feed was paged to its end, not left blocked
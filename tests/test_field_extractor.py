@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from benchmarks.fixtures import make_feed_entry, make_listing_data
+from utils.field_extractor import (FEED_FIELDS, LISTING_FIELDS, extract_feed_entry, extract_listing,
+                                   missing_paths)
+
+
+def walk(data, fields, **caller_fields):
+    """The spec read field by field, the slow obvious way the compiled extractor must match"""
+    row = {}
+    for field in fields:
+        if not field.path:
+            row[field.name] = caller_fields.get(field.name)
+            continue
+        node = data
+        for key in field.path[:-1]:
+            node = node.get(key) if type(node) is dict else None
+        value = node.get(field.path[-1], field.default) if type(node) is dict else field.default
+        row[field.name] = field.transform(value) if field.transform else value
+    return row
+
+
+def mangled(data):
+    """Yad2 shape drift: nested objects replaced by null, strings or lists"""
+    data = dict(data, address=None, inProperty='n/a', metaData=[])
+    data['additionalDetails'] = dict(data['additionalDetails'], propertyCondition=None, roomsCount=None)
+    return data
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_listing_extractor_matches_the_spec(seed):
+    data = make_listing_data(f'tok{seed}', random.Random(seed))
+    for document in (data, mangled(data), {}):
+        assert extract_listing(document, link='https://x/1') == walk(document, LISTING_FIELDS, link='https://x/1')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_feed_extractor_matches_the_spec(seed):
+    entry = make_feed_entry(f'tok{seed}', random.Random(seed))
+    for document in (entry, mangled(dict(entry, additionalDetails={}))):
+        assert extract_feed_entry(document) == walk(document, FEED_FIELDS)
+
+
+def test_transforms_and_defaults():
+    data = make_listing_data('tok', random.Random(0))
+    data['metaData']['images'] = ['a.jpg', {'src': 'b.jpg'}, {'original': 'c.jpg'}, {}]
+    data.pop('furnitureInfo')
+    row = extract_listing(data, link='https://x/1')
+    assert row['arnona_month'] == data['propertyTax'] / 2
+    assert row['entry_date'] == '2025-11-01'
+    assert row['images'] == ['a.jpg', 'b.jpg', 'c.jpg']
+    assert row['image_count'] == 4 and row['video_count'] == 0
+    assert row['furniture'] == '' and row['link'] == 'https://x/1'
+    assert list(row) == [field.name for field in LISTING_FIELDS]
+
+
+def test_missing_paths_reports_renamed_fields():
+    data = make_listing_data('tok', random.Random(0))
+    data['priceValue'] = data.pop('price')
+    assert missing_paths(data, LISTING_FIELDS) == ['price']
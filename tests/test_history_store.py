@@ -0,0 +1,70 @@
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from utils.history_store import HistoryStore  # noqa: E402
+
+FLORENTIN = {'city': 'Tel Aviv', 'neighborhood': 'Florentin'}
+OLD_NORTH = {'city': 'Tel Aviv', 'neighborhood': 'Old North'}
+
+
+def run(*rows):
+    return pd.DataFrame([{'listing_id': listing_id, 'rent': rent, 'sqm': sqm, 'arnona_month': 400, **area}
+                         for listing_id, rent, sqm, area in rows])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history'))
+    store.append(run(('a', 5000, 50, FLORENTIN), ('b', 6000, 60, FLORENTIN), ('c', 8000, 80, OLD_NORTH)),
+                 datetime(2026, 10, 1, 9))
+    store.append(run(('a', 4800, 50, FLORENTIN), ('b', 6000, 60, FLORENTIN), ('d', 7000, 70, FLORENTIN)),
+                 datetime(2026, 10, 2, 9))
+    store.append(run(('a', 4800, 50, FLORENTIN)), datetime(2026, 10, 3, 9))
+    return store
+
+
+def by_neighborhood(aggregates):
+    return {row['neighborhood']: row for row in aggregates.to_dict('records')}
+
+
+def test_aggregates_fold_across_run_files(store):
+    assert store.run_dates() == ['2026-10-01', '2026-10-02', '2026-10-03']
+    florentin = by_neighborhood(store.neighborhood_aggregates())['Florentin']
+    assert (florentin['listings'], florentin['observations']) == (3, 6)  # a, b and d, over three files
+    assert (florentin['min_rent'], florentin['max_rent']) == (4800, 7000)
+    assert florentin['mean_rent'] == pytest.approx((5000 + 6000 + 4800 + 6000 + 7000 + 4800) / 6)
+    assert florentin['mean_rent_per_sqm'] == pytest.approx((100 + 100 + 96 + 100 + 100 + 96) / 6)
+    assert (florentin['first_seen'], florentin['last_seen']) == ('2026-10-01', '2026-10-03')
+
+
+def test_date_bounds_prune_partitions(store):
+    # A corrupt file in a pruned partition is never opened
+    broken = os.path.join(store.root, 'run_date=2026-09-01')
+    os.makedirs(broken)
+    with open(os.path.join(broken, 'part-broken.parquet'), 'wb') as f:
+        f.write(b'not parquet')
+    with pytest.raises(pa.ArrowInvalid):
+        store.neighborhood_aggregates()
+
+    aggregates = by_neighborhood(store.neighborhood_aggregates(since='2026-10-02', until=date(2026, 10, 2)))
+    assert list(aggregates) == ['Florentin']
+    florentin = aggregates['Florentin']
+    assert (florentin['listings'], florentin['observations'], florentin['min_rent']) == (3, 3, 4800)
+    assert florentin['first_seen'] == florentin['last_seen'] == '2026-10-02'
+
+    until = by_neighborhood(store.neighborhood_aggregates(since='2026-10-01', until='2026-10-01'))
+    assert until['Florentin']['max_rent'] == 6000 and until['Old North']['listings'] == 1
+
+
+def test_price_history_keeps_only_changes(store):
+    history = store.price_history('a')
+    assert list(history['rent']) == [5000, 4800, 4800]
+
+    changes = store.price_history('a', changes_only=True)
+    assert list(changes['run_date']) == ['2026-10-01', '2026-10-02']  # the vaad NaN in every run is no change
+    assert list(store.price_history('a', since='2026-10-02', changes_only=True)['rent']) == [4800]
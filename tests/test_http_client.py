@@ -0,0 +1,53 @@
+import pytest
+
+from utils import http_client
+from utils.http_client import HttpClient
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b''
+
+
+class _Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(http_client.time, 'sleep', slept.append)
+    return slept
+
+
+def client_with(session, **options):
+    client = HttpClient(**options)  # default limiters are disabled (rate 0)
+    client._sessions['example.com'] = session
+    return client
+
+
+def test_unlimited_host_still_waits_for_retry_after(sleeps):
+    session = _Session(_Response(429, {'Retry-After': '7'}), _Response(200))
+    response = client_with(session).get('https://example.com/feed')
+    assert response.status_code == 200 and session.calls == 2
+    assert sleeps == [7.0]
+
+
+def test_unlimited_host_backs_off_exponentially(sleeps):
+    session = _Session(_Response(503), _Response(503), _Response(200))
+    client_with(session, backoff_factor=0.5).get('https://example.com/feed')
+    assert sleeps == [0.5, 1.0]
+
+
+def test_throttled_response_is_returned_when_retries_are_off(sleeps):
+    session = _Session(_Response(429, {'Retry-After': '7'}))
+    response = client_with(session, retry_throttled=False).post('https://example.com/send')
+    assert response.status_code == 429 and session.calls == 1 and sleeps == []
@@ -0,0 +1,33 @@
+import requests
+
+from benchmarks.fixtures import make_item_page
+
+
+class _Response:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+
+class _ItemClient:
+    """Serves generated item pages; tokens in `failing` answer 500"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def get(self, url, params=None, headers=None):
+        token = url.rsplit('/', 1)[-1]
+        if token in self.failing:
+            return _Response(b'', status_code=500)
+        return _Response(make_item_page(token))
+
+
+def test_failed_item_page_skips_only_that_listing(make_scraper):
+    scraper = make_scraper(http_client=_ItemClient(failing={'bad'}))
+    listings = [{'token': token, 'search_config': 'search'} for token in ('a', 'bad', 'c')]
+    df = scraper.scrape_listings_pages(listings)
+    assert list(df['listing_id']) == ['a', 'c']
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from notifications.outbound_queue import OutboundQueue
+
+
+class _Response:
+    def __init__(self, status_code, text='', retry_after=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+
+
+class _Sender:
+    """Answers Bot API calls with the queued responses, then with 200"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, method, data):
+        self.calls.append(data['text'])
+        response = self.responses.pop(0) if self.responses else _Response(200)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = OutboundQueue(str(tmp_path / 'outbox.db'), per_chat_rate=1000, global_rate=1000, max_attempts=3)
+    yield outbox
+    outbox.close(timeout=0)
+
+
+def step(outbox, sender):
+    """Process the oldest pending call now, whenever it is due"""
+    outbox._send = sender
+    row = outbox._next_pending()
+    outbox._process(row[:5] + (0.0,))
+
+
+def rows(outbox):
+    return outbox._conn.execute('SELECT status, attempts FROM outbound ORDER BY id').fetchall()
+
+
+def test_sent_call_is_deleted(outbox):
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'hi'})
+    step(outbox, _Sender())
+    assert rows(outbox) == [] and outbox.sent == 1
+
+
+def test_rate_limited_call_waits_for_retry_after(outbox):
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'hi'})
+    step(outbox, _Sender(_Response(429, retry_after=30)))
+    assert rows(outbox) == [('pending', 1)]
+    assert outbox._chat_limiter('1')._blocked_until > time.monotonic() + 25
+
+
+def test_server_errors_back_off_until_max_attempts(outbox):
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'hi'})
+    sender = _Sender(_Response(502), ConnectionError('reset'), _Response(503))
+    step(outbox, sender)
+    assert rows(outbox) == [('pending', 1)]
+    next_attempt_at = outbox._conn.execute('SELECT next_attempt_at FROM outbound').fetchone()[0]
+    assert next_attempt_at > time.time() + 1
+    step(outbox, sender)
+    step(outbox, sender)
+    assert rows(outbox) == [('failed', 3)]
+
+
+def test_client_error_fails_at_once(outbox):
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'hi'})
+    step(outbox, _Sender(_Response(400, 'chat not found')))
+    assert rows(outbox) == [('failed', 1)]
+
+
+def test_bad_row_does_not_stop_the_worker(outbox):
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'broken'})
+    outbox._conn.execute("UPDATE outbound SET payload = '{not json'")
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'after'})
+    sender = _Sender()
+    outbox.start(sender)
+    deadline = time.monotonic() + 5
+    while outbox.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sender.calls == ['after']
+    assert rows(outbox) == [('failed', 0)]
+
+
+def test_close_leaves_unsent_calls_for_the_next_start(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    release = threading.Event()
+
+    def stuck(method, data):
+        release.wait(5)
+        return _Response(200)
+
+    outbox = OutboundQueue(path, per_chat_rate=0, global_rate=0)
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'first'})
+    outbox.put('sendMessage', {'chat_id': 1, 'text': 'second'})
+    outbox.start(stuck)
+    started = time.monotonic()
+    outbox.close(timeout=0.3)
+    assert time.monotonic() - started < 2  # the stuck worker is not waited for
+    release.set()
+
+    restarted = OutboundQueue(path, per_chat_rate=0, global_rate=0)
+    try:
+        assert restarted.pending() == 2
+    finally:
+        restarted.close(timeout=0)
+
+
+def test_unlimited_chat_still_waits_for_retry_after(tmp_path):
+    outbox = OutboundQueue(str(tmp_path / 'outbox.db'), per_chat_rate=0, global_rate=0)
+    try:
+        outbox.put('sendMessage', {'chat_id': 1, 'text': 'hi'})
+        step(outbox, _Sender(_Response(429, retry_after=30)))
+        next_attempt_at = outbox._conn.execute('SELECT next_attempt_at FROM outbound').fetchone()[0]
+        assert next_attempt_at > time.time() + 25
+    finally:
+        outbox.close(timeout=0)
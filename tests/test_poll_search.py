@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+
+class _Notifier:
+    outbox = None
+
+    def __init__(self, reachable):
+        self.reachable = reachable
+        self.announced = []
+
+    def ensure_connection(self):
+        return self.reachable
+
+    def notify_new_properties(self, properties):
+        self.announced.extend(row['listing_id'] for row in properties)
+        return len(properties)
+
+
+def feed(params, max_pages):
+    yield [{'token': 'a'}, {'token': 'b'}]
+
+
+@pytest.fixture
+def scraper(make_scraper):
+    scraper = make_scraper()
+    scraper.enable_notifications = True
+    scraper.notifier = _Notifier(reachable=False)
+    scraper.iter_feed_pages = feed
+    scraped = {'a'}  # 'b' fails on its item page
+    scraper.scrape_listings_pages = lambda listings: pd.DataFrame(
+        [{'listing_id': listing['token']} for listing in listings if listing['token'] in scraped]
+    )
+    return scraper
+
+
+def test_tokens_are_known_only_once_processed(scraper):
+    config = {'name': 'search', 'params': {}}
+    known_tokens = set()
+
+    # Telegram is down: 'a' stays unseen, so the next poll picks it up again
+    scraper.poll_search(config, known_tokens)
+    assert known_tokens == set()
+
+    scraper.notifier.reachable = True
+    scraper.poll_search(config, known_tokens)
+    assert scraper.notifier.announced == ['a']
+    assert known_tokens == {'a'}
@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils.property_tracker import PropertyTracker
+
+
+@pytest.fixture
+def open_tracker():
+    trackers = []
+
+    def make(path):
+        tracker = PropertyTracker(str(path))
+        trackers.append(tracker)
+        return tracker
+
+    yield make
+    for tracker in trackers:
+        tracker.close()
+
+
+def test_legacy_json_is_migrated_once_and_kept(tmp_path, open_tracker):
+    legacy = tmp_path / 'seen_properties.json'
+    legacy.write_text(json.dumps({'seen_ids': ['a', 'b', 1234], 'last_updated': '2025-01-01T00:00:00'}))
+
+    tracker = open_tracker(legacy)
+    assert tracker.database_path == str(tmp_path / 'seen_properties.db')
+    assert tracker.seen_properties == {'a', 'b', '1234'}
+    assert tracker.get_stats()['last_updated'] == '2025-01-01T00:00:00'
+    assert legacy.exists()  # left in place as a backup
+    tracker.close()
+
+    # IDs added to the JSON later are not imported again
+    legacy.write_text(json.dumps({'seen_ids': ['a', 'b', 1234, 'late']}))
+    assert open_tracker(tmp_path / 'seen_properties.db').seen_properties == {'a', 'b', '1234'}
+
+
+def test_marked_properties_persist_across_reopen(tmp_path, open_tracker):
+    tracker = open_tracker(tmp_path / 'seen.db')
+    tracker.mark_properties_as_seen(pd.DataFrame({'listing_id': ['x', 'y'], 'rent': [5000, pd.NA]}))
+    assert tracker.property_exists('x')
+    tracker.close()
+
+    reopened = open_tracker(tmp_path / 'seen.db')
+    assert reopened.seen_properties == {'x', 'y'}
+    assert reopened.get_property_data('y') == {'listing_id': 'y', 'rent': None}
@@ -0,0 +1,32 @@
+from utils.query_planner import config_matches, matching_searches, plan_queries
+
+
+def config(name, **params):
+    return {'name': name, 'params': {'city': '6400', **params}}
+
+
+def test_ranges_are_widened_and_budgets_summed():
+    configs = [config('cheap', minPrice='4000', maxPrice='6000'),
+               dict(config('dear', minPrice='5500', maxPrice='9000'), max_pages=2)]
+    [query] = plan_queries(configs, default_max_pages=5)
+    assert query['params'] == {'city': '6400', 'minPrice': '4000', 'maxPrice': '9000'}
+    assert query['max_pages'] == 7
+    assert [member['name'] for member in query['members']] == ['cheap', 'dear']
+
+
+def test_amenity_filters_the_feed_lacks_are_not_merged():
+    configs = [config('lift', maxPrice='8000', elevator='1'), config('any', maxPrice='6000')]
+    queries = plan_queries(configs)
+    assert [query['params'].get('elevator') for query in queries] == ['1', None]
+
+
+def test_amenity_filters_the_feed_carries_are_merged_and_rechecked():
+    configs = [config('lift', maxPrice='8000', elevator='1'), config('any', maxPrice='6000')]
+    [query] = plan_queries(configs, feed_flags=['elevator'])
+    assert 'elevator' not in query['params']
+    assert matching_searches(query['members'], {'rent': 5000, 'elevator': False}) == ['any']
+
+
+def test_unknown_fields_pass_until_the_item_page_confirms_them():
+    assert config_matches({'minRooms': '3', 'elevator': '1'}, {'rooms': None, 'elevator': None})
+    assert not config_matches({'minRooms': '3'}, {'rooms': 2})
@@ -0,0 +1,79 @@
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import HostRateLimiters, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleeping advances it and is recorded"""
+    class Clock:
+        now = 100.0
+        sleeps = []
+
+        def monotonic(self):
+            return self.now
+
+        def sleep(self, seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+    fake = Clock()
+    fake.sleeps = []
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_requests_are_spaced_at_the_rate(clock):
+    limiter = RateLimiter(2.0)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == pytest.approx([0.5, 0.5, 0.5])
+
+
+def test_idle_time_refills_up_to_the_burst(clock):
+    limiter = RateLimiter(1.0, burst=3)
+    clock.now += 60
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_zero_rate_disables_limiting(clock):
+    limiter = RateLimiter(0)
+    for _ in range(10):
+        limiter.acquire()
+    limiter.record_throttle(30)
+    limiter.acquire()
+    assert clock.sleeps == []
+
+
+def test_rate_adapts_between_floor_and_ceiling(clock):
+    limiter = RateLimiter(1.0, max_rate=1.2, min_rate=0.3)
+    for _ in range(10):
+        limiter.record_success()
+    assert limiter.rate == pytest.approx(1.2)
+    limiter.record_throttle()
+    assert limiter.rate == pytest.approx(0.6)
+    limiter.record_throttle()
+    limiter.record_throttle()
+    assert limiter.rate == pytest.approx(0.3)
+
+
+def test_retry_after_blocks_every_caller(clock):
+    limiter = RateLimiter(10.0)
+    limiter.acquire()
+    limiter.record_throttle(retry_after=5)
+    limiter.acquire()
+    assert sum(clock.sleeps) == pytest.approx(5)  # the bucket refilled while blocked
+
+
+def test_host_limiters_are_per_host_with_overrides():
+    limiters = HostRateLimiters(default_limits=(1.0, 2.0), host_limits={'api.telegram.org': (30.0, 30.0)})
+    yad2 = limiters.for_host('www.yad2.co.il')
+    assert limiters.for_host('www.yad2.co.il') is yad2
+    assert (yad2.rate, yad2.max_rate) == (1.0, 2.0)
+    assert limiters.for_host('api.telegram.org').rate == 30.0
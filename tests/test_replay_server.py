@@ -0,0 +1,44 @@
+import pytest
+import requests
+
+from utils.http_recorder import ResponseRecorder
+from utils.replay_server import ReplayServer
+
+
+@pytest.fixture
+def serve(tmp_path):
+    fixtures = tmp_path / 'fixtures'
+    recorder = ResponseRecorder(str(fixtures))
+    recorder.save('/realestate/rent?city=5000&page=1', b'<html>feed</html>')
+    recorder.save('/realestate/item/tok1', b'<html>item</html>')
+    servers = []
+
+    def start(**options):
+        server = ReplayServer(str(fixtures), **options)
+        servers.append(server)
+        return server, server.start()
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_recorded_pages_are_replayed_by_path_and_sorted_query(serve):
+    server, base_url = serve()
+    assert requests.get(f'{base_url}/realestate/rent?page=1&city=5000').content == b'<html>feed</html>'
+    assert requests.get(f'{base_url}/realestate/item/tok2').status_code == 404
+    assert server.requests_served == 2
+
+
+def test_etag_revalidation_answers_304(serve):
+    _, base_url = serve()
+    first = requests.get(f'{base_url}/realestate/item/tok1')
+    again = requests.get(f'{base_url}/realestate/item/tok1', headers={'If-None-Match': first.headers['ETag']})
+    assert (again.status_code, again.content) == (304, b'')
+
+
+def test_injected_errors_follow_the_rate(serve):
+    server, base_url = serve(error_rate=0.5, error_status=429, seed=7)
+    statuses = [requests.get(f'{base_url}/realestate/item/tok1').status_code for _ in range(40)]
+    assert set(statuses) == {200, 429}
+    assert statuses.count(429) == server.errors_injected
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from benchmarks.fixtures import make_item_page
+from config.search_configs import SCRAPER_CONFIG
+from config.settings import settings
+from utils import response_cache
+from utils.http_client import get_http_client
+from utils.http_recorder import ResponseRecorder
+from utils.replay_server import ReplayServer, point_scraper_at
+from utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    caches = []
+
+    def make(**options):
+        cache = ResponseCache(str(tmp_path / 'responses.db'), **options)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+class _RecordingClient:
+    """Passes requests through and records the validators sent and the status received"""
+
+    def __init__(self, client):
+        self.client = client
+        self.exchanges = []
+
+    def get(self, url, headers=None, **kwargs):
+        response = self.client.get(url, headers=headers, **kwargs)
+        self.exchanges.append(((headers or {}).get('If-None-Match'), response.status_code))
+        return response
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    fixtures = tmp_path / 'fixtures'
+    ResponseRecorder(str(fixtures)).save('/realestate/item/tok1', make_item_page('tok1'))
+    server = ReplayServer(str(fixtures))
+    for name in ('url', 'base_url', 'base_item_url'):
+        monkeypatch.setitem(SCRAPER_CONFIG, name, SCRAPER_CONFIG[name])
+    point_scraper_at(server.start())
+    yield server
+    server.stop()
+
+
+def test_304_serves_the_cached_details(make_scraper, replay, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'response_cache', True)
+    monkeypatch.setattr(settings.scraper, 'response_cache_path', str(tmp_path / 'responses.db'))
+    client = _RecordingClient(get_http_client())
+    scraper = make_scraper(http_client=client)
+    url = SCRAPER_CONFIG['base_item_url'] + 'tok1'
+
+    first = scraper._scrape_listing_page_cached('tok1', url)
+    second = scraper._scrape_listing_page_cached('tok1', url)
+    etag = scraper.response_cache.get('tok1').etag
+    assert etag and client.exchanges == [(None, 200), (etag, 304)]
+    assert second == first and second['listing_id'] == 'tok1'
+    assert scraper.response_cache.stats()['hits'] == 1
+    scraper.response_cache.close()
+
+
+def test_validators_become_conditional_headers(cache):
+    responses = cache()
+    responses.put('a', b'body', etag='"v1"', last_modified='Wed, 01 Oct 2025 10:00:00 GMT', details={'rent': 1})
+    responses.put('b', b'body', details={'rent': 2})
+    assert responses.get('a').conditional_headers() == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 Oct 2025 10:00:00 GMT',
+    }
+    assert responses.get('b').conditional_headers() == {}
+
+
+def test_entries_expire_unless_revalidated(cache, clock):
+    responses = cache(ttl_hours=1)
+    responses.put('old', b'old body', details={})
+    responses.put('kept', b'kept body', details={})
+    clock[0] += 3000
+    responses.touch('kept')
+    clock[0] += 1000  # 'old' was validated 4000s ago, 'kept' 1000s ago
+    assert responses.get('old') is None
+    assert responses.get('kept') is not None
+    assert responses.stats()['entries'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_first(cache, clock):
+    bodies = {token: random.Random(token).randbytes(1000) for token in 'abcd'}  # incompressible
+    responses = cache()
+    responses.put('a', bodies['a'])
+    responses.max_bytes = 3 * responses.stats()['bytes']  # room for three entries
+    for token in 'abc':
+        responses.put(token, bodies[token])
+        clock[0] += 1
+    responses.touch('a')  # 'b' is now the least recently used
+    clock[0] += 1
+    responses.put('d', bodies['d'])
+    assert [token for token in 'abcd' if responses.get(token)] == ['a', 'c', 'd']
+    assert responses.get_body('a') == bodies['a']
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from src.writers.google_sheets_reader_writer import (GoogleSheetsReaderWriter, GspreadBackend, LocalSheetBackend,
+                                                     column_letter)
+
+
+def listings(*rows):
+    return pd.DataFrame([{'listing_id': listing_id, 'rent': rent, 'street': 'Herzl'} for listing_id, rent in rows])
+
+
+def as_dicts(values):
+    header, *rows = values
+    return {row[header.index('listing_id')]: dict(zip(header, row)) for row in rows}
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    return LocalSheetBackend(str(tmp_path / 'sheet.csv'))
+
+
+def test_upsert_counts_and_single_round_trip(sheet):
+    writer = GoogleSheetsReaderWriter(sheet)
+    stats = writer.upsert_listings(listings(('a', 5000), ('b', 6000)))
+    assert (stats['new'], stats['updated'], stats['unchanged']) == (2, 0, 0)
+    assert list(stats['new_properties']['listing_id']) == ['a', 'b']
+    assert sheet.api_calls == 2  # one read, one batch_update
+
+    stats = writer.upsert_listings(listings(('a', 5000), ('b', 5800), ('c', 7000)))
+    assert (stats['new'], stats['updated'], stats['unchanged']) == (1, 1, 1)
+    assert sheet.api_calls == 4
+    rows = as_dicts(sheet.read_values())
+    assert (rows['a']['status'], rows['b']['status'], rows['c']['status']) == ('new', 'updated', 'new')
+    assert rows['b']['rent'] == '5800'
+
+
+def test_unchanged_run_writes_nothing(sheet):
+    writer = GoogleSheetsReaderWriter(sheet)
+    writer.upsert_listings(listings(('a', 5000)))
+    stats = writer.upsert_listings(listings(('a', 5000)))
+    assert (stats['unchanged'], stats['cells_written']) == (1, 0)
+    assert sheet.api_calls == 3  # the second run only read
+
+
+def test_manual_and_user_columns_are_preserved(sheet):
+    writer = GoogleSheetsReaderWriter(sheet)
+    writer.upsert_listings(listings(('a', 5000), ('b', 6000)))
+    header = sheet.read_values()[0]
+    # The user fills in notes and adds a column of their own
+    agent = column_letter(len(header))
+    sheet.batch_update([
+        {'range': f"{column_letter(header.index('notes'))}2", 'values': [['call back']]},
+        {'range': f'{agent}1:{agent}2', 'values': [['agent'], ['Dana']]},
+    ])
+
+    writer.upsert_listings(listings(('a', 4500), ('b', 6000)))
+    rows = as_dicts(sheet.read_values())
+    assert rows['a']['notes'] == 'call back' and rows['a']['agent'] == 'Dana'
+    assert rows['a']['rent'] == '4500' and rows['a']['status'] == 'updated'
+
+
+def test_new_scraped_column_grows_the_header(sheet):
+    writer = GoogleSheetsReaderWriter(sheet)
+    writer.upsert_listings(listings(('a', 5000)))
+    stats = writer.upsert_listings(listings(('a', 5000)).assign(elevator=True))
+    values = sheet.read_values()
+    assert values[0][-1] == 'elevator'
+    assert as_dicts(values)['a']['elevator'] == 'TRUE'
+    assert stats['updated'] == 1
+
+
+class _Worksheet:
+    """gspread Worksheet stand-in that counts API calls"""
+
+    def __init__(self):
+        self.values = []
+        self.row_count, self.col_count = 1000, 60
+        self.calls = []
+
+    def get_all_values(self):
+        self.calls.append('get_all_values')
+        return [list(row) for row in self.values]
+
+    def resize(self, rows, cols):
+        self.calls.append('resize')
+        self.row_count, self.col_count = rows, cols
+
+    def batch_update(self, updates, value_input_option=None):
+        self.calls.append('batch_update')
+        self.updates = updates
+
+
+def test_gspread_upsert_is_one_read_and_one_write():
+    worksheet = _Worksheet()
+    backend = GspreadBackend.__new__(GspreadBackend)  # skip the service-account login
+    backend.worksheet, backend.api_calls = worksheet, 0
+    writer = GoogleSheetsReaderWriter(backend)
+
+    writer.upsert_listings(listings(*((f'id{index}', 5000 + index) for index in range(50))))
+    assert worksheet.calls == ['get_all_values', 'batch_update']
+    assert len(worksheet.updates) == 2  # header and the appended rows, in the one call
+    writer.get_update_summary()
+    writer.get_manual_columns_summary()
+    assert worksheet.calls == ['get_all_values', 'batch_update']  # summaries reuse the upsert's grid
+    assert backend.api_calls == 2
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from benchmarks.fixtures import make_feed_page, make_item_page, make_listing_data, render_page
+from config.settings import settings
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class _SiteClient:
+    """Serves one search's feed pages and an item page for every token; a token in reposts copies another's ad"""
+
+    def __init__(self, pages, reposts=None):
+        self.pages = pages
+        self.reposts = reposts or {}
+
+    def get(self, url, params=None, headers=None):
+        if params and 'page' in params:
+            page = params['page']
+            return _Response(make_feed_page(self.pages[page - 1] if page <= len(self.pages) else [], seed=page))
+        token = url.rsplit('/', 1)[-1]
+        if token in self.reposts:
+            original = self.reposts[token]
+            listing = dict(make_listing_data(original, random.Random(f'{original}-0')), token=token)
+            next_data = {'props': {'pageProps': {'dehydratedState': {'queries': [
+                {'state': {'data': {'user': {}}}}, {'state': {'data': listing}},
+            ]}}}}
+            return _Response(render_page(next_data))
+        return _Response(make_item_page(token))
+
+
+class _Notifier:
+    """Records the size of every batch of new properties it is asked to announce"""
+
+    def __init__(self):
+        self.batches = []
+        self.changes = []
+
+    def ensure_connection(self):
+        return True
+
+    def notify_new_properties(self, new_properties):
+        self.batches.append([property_data['listing_id'] for property_data in new_properties])
+        return len(new_properties)
+
+    def notify_listing_changes(self, events):
+        self.changes.extend((event['event'], event['listing_id']) for event in events)
+        return len(events)
+
+
+@pytest.fixture
+def streaming_scraper(make_scraper, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'max_workers', 1)  # results arrive one at a time, in feed order
+    monkeypatch.setattr(settings, 'notify_on_new_properties', True)
+
+    def make(pages, **client_options):
+        client = _SiteClient(pages, **client_options)
+        scraper = make_scraper([{'name': 'only', 'params': {}, 'max_pages': 5}], http_client=client)
+        scraper.notifier = _Notifier()
+        scraper.enable_notifications = True
+        return scraper
+
+    return make
+
+
+def test_streamed_listings_share_digests_after_the_first(streaming_scraper, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'stream_notify_window', 60)
+    monkeypatch.setattr(settings.scraper, 'stream_notify_batch', 3)
+    scraper = streaming_scraper([[f'a{index}' for index in range(4)], [f'b{index}' for index in range(4)]])
+    scraper.run_streaming()
+    # The first listing goes out alone, then batches of three, then whatever is left at the end
+    assert [len(batch) for batch in scraper.notifier.batches] == [1, 3, 3, 1]
+    assert sorted(sum(scraper.notifier.batches, [])) == sorted(f'{page}{index}' for page in 'ab' for index in range(4))
+    assert scraper.first_notification_seconds is not None
+
+
+def test_zero_window_announces_each_listing_at_once(streaming_scraper, monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'stream_notify_window', 0)
+    scraper = streaming_scraper([['a1', 'a2', 'a3']])
+    scraper.run_streaming()
+    assert scraper.notifier.batches == [['a1'], ['a2'], ['a3']]
+
+
+@pytest.fixture
+def detecting(monkeypatch):
+    monkeypatch.setattr(settings.scraper, 'change_detection', True)
+    monkeypatch.setattr(settings, 'notify_on_changes', ['relisted'])
+
+
+def test_streamed_repost_is_announced_as_relisted_not_new(streaming_scraper, detecting):
+    scraper = streaming_scraper([['a1', 'a2', 'a3']])
+    scraper.run_streaming()
+    assert sum(scraper.notifier.batches, []) == ['a1', 'a2', 'a3']
+
+    # a1 left the feed and came back as r1 with the same photos
+    scraper.http.pages = [['a2', 'a3', 'r1']]
+    scraper.http.reposts = {'r1': 'a1'}
+    scraper.notifier.batches = []
+    scraper.run_streaming()
+    assert scraper.notifier.batches == []
+    assert scraper.notifier.changes == [('relisted', 'r1')]
+    assert scraper.property_tracker.property_exists('r1')
+
+
+def test_held_listing_whose_twin_is_still_up_is_announced_as_new(streaming_scraper, detecting):
+    scraper = streaming_scraper([['a1', 'a2']])
+    scraper.run_streaming()
+
+    # s1 shares a1's photos while a1 is still listed, so it is not a repost
+    scraper.http.pages = [['a1', 'a2', 's1']]
+    scraper.http.reposts = {'s1': 'a1'}
+    scraper.notifier.batches = []
+    scraper.run_streaming()
+    assert scraper.notifier.batches == [['s1']]
+    assert scraper.notifier.changes == []
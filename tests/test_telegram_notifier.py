@@ -0,0 +1,85 @@
+import pytest
+
+from notifications import telegram_notifier
+from notifications.outbound_queue import OutboundQueue
+from notifications.telegram_notifier import TelegramNotifier
+
+
+class _Response:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+
+class _TelegramClient:
+    """getMe answers with get_status; every Bot API call answers with post_status"""
+
+    def __init__(self, get_status=200, post_status=200):
+        self.get_status = get_status
+        self.post_status = post_status
+        self.gets = 0
+        self.posts = []
+
+    def get(self, url, **kwargs):
+        self.gets += 1
+        return _Response(self.get_status)
+
+    def post(self, url, data=None, **kwargs):
+        self.posts.append(url.rsplit('/', 1)[-1])
+        return _Response(self.post_status)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(telegram_notifier.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_failed_connection_is_rechecked_after_backoff(clock):
+    client = _TelegramClient(get_status=502)
+    notifier = TelegramNotifier('token', 'chat', http_client=client)
+
+    assert notifier.send_message('hello') is False
+    assert notifier.ensure_connection() is False
+    assert client.gets == 1  # no getMe storm while backing off
+
+    client.get_status = 200
+    clock[0] += telegram_notifier.CONNECTION_RECHECK_SECONDS
+    assert notifier.send_message('hello') is True
+    assert client.gets == 2 and client.posts == ['sendMessage']
+
+    notifier.send_message('again')
+    assert client.gets == 2  # success is remembered
+
+
+def test_unreachable_telegram_queues_to_outbox(tmp_path, clock):
+    client = _TelegramClient(get_status=502, post_status=502)
+    outbox = OutboundQueue(str(tmp_path / 'outbox.db'), max_backoff=3600)
+    notifier = TelegramNotifier('token', 'chat', http_client=client, outbox=outbox)
+
+    assert notifier.ensure_connection() is True
+    assert notifier.send_message('hello') is True
+    assert outbox.stats()['pending'] == 1
+    outbox.close(timeout=0)
+
+
+def test_outbox_notifier_leaves_throttling_to_the_outbox(tmp_path):
+    outbox = OutboundQueue(str(tmp_path / 'outbox.db'))
+    notifier = TelegramNotifier('token', 'chat', outbox=outbox)
+    assert notifier.http.retry_throttled is False
+    outbox.close(timeout=0)
+
+
+def test_change_entry_treats_pd_na_as_missing():
+    import pandas as pd
+
+    notifier = TelegramNotifier('token', 'chat', http_client=_TelegramClient())
+    event = {
+        'event': 'relisted', 'listing_id': 'new', 'previous_listing_id': 'old', 'old_price': pd.NA,
+        'new_price': 5400, 'price_change': pd.NA, 'street': 'Herzl', 'floor': pd.NA, 'sqm': float('nan'),
+    }
+    entry = notifier.format_change_entry(event)
+    assert entry.startswith('🔁 <b>Relisted</b>') and '/month' not in entry
+    assert 'floor N/A' in entry
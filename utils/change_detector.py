@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from utils.property_tracker import PropertyTracker
+
+EVENT_NEW = 'new'
+EVENT_PRICE_DROP = 'price_drop'
+EVENT_PRICE_RISE = 'price_rise'
+EVENT_RELISTED = 'relisted'
+EVENT_REMOVED = 'removed'
+EVENT_TYPES = (EVENT_NEW, EVENT_PRICE_DROP, EVENT_PRICE_RISE, EVENT_RELISTED, EVENT_REMOVED)
+
+STATUS_ACTIVE = 'active'
+STATUS_REMOVED = 'removed'
+STATUS_RELISTED = 'relisted'  # superseded by a repost under a new token
+
+FINGERPRINT_COLUMNS = ('rent', 'vaad', 'arnona_month', 'entry_date', 'image_hash')
+PRICE_COLUMNS = ('rent', 'vaad', 'arnona_month')
+# Listing columns copied onto events so they can be shown without another lookup
+EVENT_DETAIL_COLUMNS = ('link', 'street', 'neighborhood', 'city', 'rooms', 'sqm', 'floor')
+EVENT_COLUMNS = (
+    'event', 'listing_id', 'previous_listing_id', 'old_price', 'new_price', 'price_change',
+    'old_rent', 'new_rent', *EVENT_DETAIL_COLUMNS,
+)
+
+
+def image_hash(images) -> Optional[str]:
+    """
+    Hash a listing's image URLs, ignoring order and query strings
+
+    Yad2 keeps the uploaded photos when a listing is reposted, so the same
+    photo set under a new token marks a relisting.
+
+    Args:
+        images: List of image URLs (anything else counts as no images)
+
+    Returns:
+        16-character hex digest, or None if the listing has no images
+    """
+    if not isinstance(images, (list, tuple)) or not images:
+        return None
+    urls = sorted({str(url).split('?', 1)[0] for url in images if url})
+    if not urls:
+        return None
+    return hashlib.sha1('\n'.join(urls).encode('utf-8')).hexdigest()[:16]
+
+
+def _address_key(df: pd.DataFrame):
+    """street|floor|rooms|sqm per row, None where the street is unknown"""
+    import pandas as pd
+
+    def part(name):
+        if name not in df:
+            return pd.Series('', index=df.index)
+        column = df[name]
+        if name == 'street':
+            # Categorical in ListingColumns frames, where fillna('') would need '' as a category
+            column = column.astype(object).where(column.notna(), '')
+        else:
+            column = pd.to_numeric(column, errors='coerce').map(lambda value: '' if pd.isna(value) else f'{value:g}')
+        return column.astype(str).str.strip()
+
+    street = part('street')
+    key = street + '|' + part('floor') + '|' + part('rooms') + '|' + part('sqm')
+    return key.where(street != '', None)
+
+
+def address_key(record: Dict) -> Optional[str]:
+    """The street|floor|rooms|sqm key _address_key builds, for one listing dict"""
+    street = record.get('street')
+    street = '' if street is None or street != street else str(street).strip()
+    if not street:
+        return None
+
+    def number(name):
+        try:
+            value = float(record.get(name))
+        except (TypeError, ValueError):
+            return ''
+        return '' if math.isnan(value) else f'{value:g}'
+
+    return '|'.join((street, number('floor'), number('rooms'), number('sqm')))
+
+
+class RepostIndex:
+    def __init__(self, rows):
+        """
+        Stored photo hashes and removed listings' addresses, for telling a
+        possible repost from a new listing before the run is complete
+
+        detect() only calls a new token a repost if the listing it matches is
+        missing from the whole run, which a streaming run knows only at the end.
+        This index flags every new token that could turn out to be one.
+
+        Args:
+            rows: (image_hash, address_key, status) per stored listing
+        """
+        self.images = {image for image, _, _ in rows if image}
+        self.addresses = {key for _, key, status in rows if key and status != STATUS_ACTIVE}
+
+    def may_be_repost(self, record: Dict) -> bool:
+        """Whether a listing's photos match a stored listing or its address a removed one"""
+        return image_hash(record.get('images')) in self.images or address_key(record) in self.addresses
+
+
+class ChangeDetector:
+    def __init__(self, tracker: PropertyTracker, removed_after: int = 2):
+        """
+        Initialize the price-change and relisting detector
+
+        Keeps the last known fingerprint per listing (rent, vaad, arnona_month,
+        entry_date and a hash of the image URLs) in the tracker's database and
+        compares each run against it with one merge, so a run costs O(rows).
+
+        Args:
+            tracker: PropertyTracker whose database holds the listing_state table
+            removed_after: Consecutive full crawls a listing must be missing
+                before it is reported as removed
+        """
+        self.tracker = tracker
+        self.removed_after = max(1, removed_after)
+        self._pending: List[Tuple] = []
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduce scraped listings to the columns that are compared between runs
+
+        Args:
+            df: Listings with at least a listing_id column
+
+        Returns:
+            DataFrame of listing_id, the fingerprint columns, address_key and
+            price (monthly total of rent, vaad and arnona; NaN without a rent)
+        """
+        import pandas as pd
+
+        df = df.drop_duplicates('listing_id', keep='last')
+        current = pd.DataFrame({'listing_id': df['listing_id'].astype(str)}, index=df.index)
+        for name in PRICE_COLUMNS:
+            current[name] = pd.to_numeric(df[name], errors='coerce') if name in df else float('nan')
+        entry_date = df['entry_date'] if 'entry_date' in df else pd.Series(None, index=df.index, dtype=object)
+        current['entry_date'] = entry_date.where(entry_date.notna(), None).map(
+            lambda value: None if value is None else str(value)
+        )
+        images = df['images'] if 'images' in df else pd.Series(None, index=df.index, dtype=object)
+        current['image_hash'] = images.map(image_hash)
+        current['address_key'] = _address_key(df)
+        current['price'] = current['rent'] + current['vaad'].fillna(0) + current['arnona_month'].fillna(0)
+        return current.reset_index(drop=True)
+
+    def detect(self, df: pd.DataFrame, full_crawl: bool = True, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Compare a run's listings against the stored fingerprints
+
+        Events:
+            new: token never seen before and not a repost
+            price_drop / price_rise: monthly total changed for a known token
+            relisted: new token whose photos match a stored listing, or whose
+                street/floor/rooms/sqm match a removed one; also a removed token
+                that came back
+            removed: active listing missing from this many full crawls in a row
+
+        The updated state is staged, not written; call commit() once the events
+        have been handled so nothing is lost if, say, Telegram is unreachable.
+
+        Args:
+            df: The run's combined listings
+            full_crawl: Whether df covers every configured search in full, i.e.
+                each feed was paged to its empty page. Partial runs (a search cut
+                off by max_pages or new-only paging, failed searches, single
+                daemon polls) never count listings as missing.
+            now: Run time (defaults to now)
+
+        Returns:
+            DataFrame with EVENT_COLUMNS, one row per event
+        """
+        import numpy as np
+        import pandas as pd
+
+        with get_metrics().stage('change_detection'):
+            timestamp = (now or datetime.now()).isoformat()
+            current = self.fingerprint(df) if not df.empty else self.fingerprint(pd.DataFrame({'listing_id': []}))
+            state = self.tracker.load_listing_state()
+            for name in PRICE_COLUMNS:
+                state[name] = pd.to_numeric(state[name], errors='coerce')
+            state['price'] = state['rent'] + state['vaad'].fillna(0) + state['arnona_month'].fillna(0)
+
+            merged = current.merge(state, on='listing_id', how='outer', suffixes=('', '_old'), indicator=True)
+            seen = (merged['_merge'] == 'both').to_numpy()
+            fresh = (merged['_merge'] == 'left_only').to_numpy()
+            gone = (merged['_merge'] == 'right_only').to_numpy()
+            old_status = merged['status'].to_numpy()
+
+            # Known tokens: came back after being removed, or changed price
+            returned = seen & (old_status != STATUS_ACTIVE)
+            price, old_price = merged['price'].to_numpy(), merged['price_old'].to_numpy()
+            priced = seen & ~returned & ~np.isnan(price) & ~np.isnan(old_price)
+            dropped = priced & (price < old_price)
+            rose = priced & (price > old_price)
+
+            # New tokens: a repost carries the photos of a listing that is gone from the feed,
+            # or lands on a removed listing's address. Photos shared with a listing that is
+            # still up (an agent's stock shots) do not count.
+            vanished = state[~state['listing_id'].isin(current['listing_id'])]
+            by_image = vanished.dropna(subset=['image_hash']).drop_duplicates('image_hash', keep='last')
+            by_image = by_image.set_index('image_hash')['listing_id']
+            removed_state = state[(state['status'] != STATUS_ACTIVE) & state['address_key'].notna()]
+            by_address = removed_state.drop_duplicates('address_key', keep='last').set_index('address_key')['listing_id']
+            previous = merged['image_hash'].map(by_image).fillna(merged['address_key'].map(by_address))
+            previous = previous.where(fresh, None)
+            previous = previous.where(previous.notna(), merged['listing_id'].where(returned, None))
+            reposted = fresh & previous.notna().to_numpy()
+            relisted = reposted | returned
+            new = fresh & ~reposted
+            # A repost is priced against the listing it replaces
+            stored = state.set_index('listing_id')
+            for name in ('price', 'rent'):
+                merged[f'{name}_old'] = merged[f'{name}_old'].where(~reposted, previous.map(stored[name]))
+            superseded = merged['listing_id'].isin(set(previous[reposted])).to_numpy() & gone
+
+            # Missing tokens only count on full crawls
+            missed = merged['missed_runs'].fillna(0).to_numpy(dtype=np.int64)
+            missing = gone & (old_status == STATUS_ACTIVE) & full_crawl
+            missed = np.where(missing, missed + 1, missed)
+            removed = missing & (missed >= self.removed_after) & ~superseded
+
+            event = np.select([new, dropped, rose, relisted, removed],
+                              [EVENT_NEW, EVENT_PRICE_DROP, EVENT_PRICE_RISE, EVENT_RELISTED, EVENT_REMOVED],
+                              default='')
+            merged['event'] = event
+            merged['previous_listing_id'] = previous
+            events = self._events(merged[event != ''], df)
+
+            self._pending = self._state_rows(merged, seen | fresh, missing & ~superseded, removed, superseded, timestamp)
+            metrics = get_metrics()
+            metrics.inc('stage_items_total', len(current), stage='change_detection')
+            for name, count in events['event'].value_counts().items():
+                metrics.inc('change_events_total', int(count), event=name)
+        return events
+
+    @staticmethod
+    def _events(changed: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+        import pandas as pd
+
+        events = pd.DataFrame({
+            'event': changed['event'],
+            'listing_id': changed['listing_id'],
+            'previous_listing_id': changed['previous_listing_id'],
+            'old_price': changed['price_old'],
+            'new_price': changed['price'],
+            'price_change': changed['price'] - changed['price_old'],
+            'old_rent': changed['rent_old'],
+            'new_rent': changed['rent'],
+        }).reset_index(drop=True)
+        details = [name for name in EVENT_DETAIL_COLUMNS if name in df]
+        if details and not events.empty:
+            lookup = df.drop_duplicates('listing_id', keep='last')
+            lookup = lookup.assign(listing_id=lookup['listing_id'].astype(str))
+            events = events.merge(lookup[['listing_id', *details]], on='listing_id', how='left')
+        for name in EVENT_DETAIL_COLUMNS:
+            if name not in events:
+                events[name] = None
+        return events[list(EVENT_COLUMNS)]
+
+    @staticmethod
+    def _state_rows(merged: pd.DataFrame, present, missing, removed, superseded,
+                    timestamp: str) -> List[Tuple]:
+        """Rows for every listing whose stored state changes this run"""
+        import pandas as pd
+
+        current = merged[list(FINGERPRINT_COLUMNS)]
+        stored = merged[[f'{name}_old' for name in FINGERPRINT_COLUMNS]].set_axis(list(FINGERPRINT_COLUMNS), axis=1)
+        changed = (current.ne(stored) & ~(current.isna() & stored.isna())).any(axis=1).to_numpy()
+        touched = present | missing | superseded
+        merged = merged.assign(_changed=changed, _present=present, _superseded=superseded, _removed=removed)
+
+        def value(row, name):
+            item = row[name]
+            return None if not isinstance(item, str) and pd.isna(item) else item
+
+        rows = []
+        for row in merged[touched].to_dict('records'):
+            if row['_present']:
+                last_changed = timestamp if row['_changed'] or row['_merge'] == 'left_only' else row['last_changed']
+                rows.append((
+                    row['listing_id'], value(row, 'rent'), value(row, 'vaad'), value(row, 'arnona_month'),
+                    value(row, 'entry_date'), value(row, 'image_hash'), value(row, 'address_key'),
+                    STATUS_ACTIVE, 0, value(row, 'first_seen') or timestamp, timestamp, last_changed,
+                ))
+                continue
+            missed_runs = int(value(row, 'missed_runs') or 0)
+            if row['_superseded']:
+                status = STATUS_RELISTED
+            else:
+                status = STATUS_REMOVED if row['_removed'] else STATUS_ACTIVE
+                missed_runs += 1
+            rows.append((
+                row['listing_id'], value(row, 'rent_old'), value(row, 'vaad_old'), value(row, 'arnona_month_old'),
+                value(row, 'entry_date_old'), value(row, 'image_hash_old'), value(row, 'address_key_old'),
+                status, missed_runs, row['first_seen'], row['last_seen'],
+                row['last_changed'] if status == STATUS_ACTIVE else timestamp,
+            ))
+        return rows
+
+    def commit(self):
+        """Persist the state staged by the last detect() in one transaction"""
+        rows, self._pending = self._pending, []
+        self.tracker.save_listing_state(rows)
+
+    def repost_index(self) -> RepostIndex:
+        """Index the stored fingerprints for RepostIndex.may_be_repost checks"""
+        return RepostIndex(self.tracker.load_repost_keys())
+
+    def discard(self):
+        """Drop the staged state; the next run compares against the old fingerprints again"""
+        self._pending = []
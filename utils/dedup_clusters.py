@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_METERS_PER_DEGREE = 111_320.0
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _number(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def _text(value) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    value = ' '.join(value.split()).lower()
+    return value or None
+
+
+def content_tokens(description: Any, images: Any, shingle_size: int = 3) -> List[int]:
+    """
+    Hashed word shingles of a description plus one token per image
+
+    Image URLs are reduced to their path, so CDN hosts and resize parameters
+    do not hide a reused photo. Tokens use Python's string hash, so they are
+    comparable only within one process; signatures are never stored.
+
+    Args:
+        description: Listing description (anything else counts as none)
+        images: List of image URLs (anything else counts as none)
+        shingle_size: Words per description shingle
+
+    Returns:
+        Distinct 32-bit token hashes (empty if the listing has no content)
+    """
+    tokens = set()
+    words = _WORD.findall(description.lower()) if isinstance(description, str) else []
+    if words:
+        shingles = zip(*(words[start:] for start in range(min(shingle_size, len(words)))))
+        tokens.update(hash(shingle) & 0xFFFFFFFF for shingle in shingles)
+    if isinstance(images, (list, tuple)):
+        for url in images:
+            if isinstance(url, str) and url:
+                path = url.split('?', 1)[0].split('://', 1)[-1]
+                tokens.add(hash(('img', path.split('/', 1)[-1])) & 0xFFFFFFFF)
+    return list(tokens)
+
+
+class ListingClusterer:
+    def __init__(self, distance_m: float = 30.0, sqm_tolerance: float = 0.1, price_tolerance: float = 0.1,
+                 similarity: float = 0.5, num_perm: int = 64, bands: int = 16, max_bucket: int = 50, seed: int = 1):
+        """
+        Initialize an incremental near-duplicate clusterer for listings
+
+        Two listings are the same apartment only if both state rooms and size,
+        and rooms agree, size is within sqm_tolerance and rent, when both state
+        one, is within price_tolerance. Floors must not differ. Then either:
+            - floor is known on both and they sit within distance_m of each
+              other (or on the same street when coordinates are missing), or
+            - their description shingles and image paths overlap by at least
+              similarity (estimated with MinHash) and they are on the same
+              street or within 500 m.
+        A shared agency template or stock photos therefore never merge two
+        different units of one building.
+
+        Candidates come only from blocking indexes: a (coordinate cell, floor,
+        rooms) grid, a (street, floor, rooms) key for listings that lack
+        coordinates and MinHash LSH bands. Buckets stop growing
+        at max_bucket, so each add compares against a bounded number of
+        listings and a run stays close to linear.
+
+        Args:
+            distance_m: Coordinates this close count as the same building
+            sqm_tolerance: Relative size difference still counted as equal
+            price_tolerance: Relative rent difference still counted as equal
+            similarity: Content Jaccard similarity that counts as a match
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must divide evenly)
+            max_bucket: Listings kept per blocking bucket
+            seed: Seed for the MinHash permutations
+        """
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.distance_m = distance_m
+        self.sqm_tolerance = sqm_tolerance
+        self.price_tolerance = price_tolerance
+        self.similarity = similarity
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.max_bucket = max_bucket
+        self._cell_degrees = 2 * max(distance_m, 1.0) / _METERS_PER_DEGREE  # wide enough for longitude at any latitude Yad2 covers
+
+        rng = np.random.default_rng(seed)
+        self._perm_a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._perm_b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._parent: List[int] = []
+        self._records: List[Tuple] = []
+        self._signatures: List[Optional[np.ndarray]] = []
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self.comparisons = 0
+        self.overflowed = 0  # bucket insertions skipped because the bucket was full
+
+    def __len__(self):
+        return len(self._parent)
+
+    def signature(self, tokens: List[int]) -> Optional[np.ndarray]:
+        """MinHash signature of a token set, or None if it is empty"""
+        import numpy as np
+        if not tokens:
+            return None
+        values = np.fromiter(tokens, dtype=np.uint64, count=len(tokens))
+        return ((self._perm_a * values + self._perm_b) % _MERSENNE_PRIME).min(axis=1)
+
+    def add(self, record: Dict) -> int:
+        """
+        Add a listing and merge it into every cluster it duplicates
+
+        Args:
+            record: Listing fields: latitude, longitude, street, floor, rooms,
+                sqm, rent, description and images (any may be missing)
+
+        Returns:
+            Index of the listing (insertion order)
+        """
+        index = len(self._parent)
+        latitude, longitude = _number(record.get('latitude')), _number(record.get('longitude'))
+        if latitude is None or longitude is None or (latitude == 0 and longitude == 0):
+            latitude = longitude = None
+        rent = _number(record.get('rent'))
+        key = (
+            latitude, longitude, _text(record.get('street')), _number(record.get('floor')),
+            _number(record.get('rooms')), _number(record.get('sqm')), rent if rent and rent > 0 else None,
+        )
+        signature = self.signature(content_tokens(record.get('description'), record.get('images')))
+        self._parent.append(index)
+        self._records.append(key)
+        self._signatures.append(signature)
+
+        candidates = set()
+        for bucket_key in self._lookup_keys(key, signature):
+            candidates.update(self._buckets.get(bucket_key, ()))
+        for other in candidates:
+            if self.find(other) != self.find(index) and self._is_duplicate(index, other):
+                self._union(index, other)
+
+        for bucket_key in self._insert_keys(key, signature):
+            bucket = self._buckets.setdefault(bucket_key, [])
+            if len(bucket) < self.max_bucket:
+                bucket.append(index)
+            else:
+                self.overflowed += 1
+        return index
+
+    def _insert_keys(self, key: Tuple, signature) -> Iterable[Tuple]:
+        latitude, longitude, street, floor, rooms = key[:5]
+        if latitude is not None:
+            yield ('geo', int(latitude // self._cell_degrees), int(longitude // self._cell_degrees), floor, rooms)
+        if street is not None:
+            # Listings without coordinates can only be placed by street
+            yield ('street' if latitude is None else 'street_located', street, floor, rooms)
+        if signature is not None:
+            for band in range(self.bands):
+                start = band * self.rows_per_band
+                yield ('lsh', band, signature[start:start + self.rows_per_band].tobytes())
+
+    def _lookup_keys(self, key: Tuple, signature) -> Iterable[Tuple]:
+        latitude, longitude, street, floor, rooms = key[:5]
+        for bucket_key in self._insert_keys(key, signature):
+            if bucket_key[0] == 'lsh':
+                yield bucket_key
+        if street is not None:
+            yield ('street', street, floor, rooms)
+            if latitude is None:
+                yield ('street_located', street, floor, rooms)
+        if latitude is not None:
+            # Neighbouring cells too, so a boundary between two cells hides nothing
+            cell_x, cell_y = int(latitude // self._cell_degrees), int(longitude // self._cell_degrees)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    yield ('geo', cell_x + dx, cell_y + dy, floor, rooms)
+
+    def _is_duplicate(self, left: int, right: int) -> bool:
+        self.comparisons += 1
+        lat1, lon1, street1, floor1, rooms1, sqm1, rent1 = self._records[left]
+        lat2, lon2, street2, floor2, rooms2, sqm2, rent2 = self._records[right]
+
+        # The unit itself must match: rooms and size known and equal, rent and floor not contradicting
+        if None in (rooms1, rooms2, sqm1, sqm2) or rooms1 != rooms2:
+            return False
+        if abs(sqm1 - sqm2) > self.sqm_tolerance * max(sqm1, sqm2):
+            return False
+        if rent1 is not None and rent2 is not None and abs(rent1 - rent2) > self.price_tolerance * max(rent1, rent2):
+            return False
+        if floor1 is not None and floor2 is not None and floor1 != floor2:
+            return False
+
+        distance = None
+        if lat1 is not None and lat2 is not None:
+            dx = (lon1 - lon2) * math.cos(math.radians((lat1 + lat2) / 2))
+            distance = math.hypot(lat1 - lat2, dx) * _METERS_PER_DEGREE
+        same_street = street1 is not None and street1 == street2
+
+        if None not in (floor1, floor2) and (distance <= self.distance_m if distance is not None else same_street):
+            return True
+
+        signature1, signature2 = self._signatures[left], self._signatures[right]
+        if signature1 is None or signature2 is None:
+            return False
+        nearby = same_street or (distance is not None and distance <= 500)
+        return nearby and float((signature1 == signature2).mean()) >= self.similarity
+
+    def find(self, index: int) -> int:
+        """Earliest listing in the cluster holding index"""
+        parent = self._parent
+        root = index
+        while parent[root] != root:
+            root = parent[root]
+        while parent[index] != root:
+            parent[index], index = root, parent[index]
+        return root
+
+    def _union(self, left: int, right: int):
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            # The earlier listing stays the root, so a cluster's first member never changes
+            self._parent[max(left, right)] = min(left, right)
+
+    def clusters(self) -> List[List[int]]:
+        """Every cluster with more than one listing, members in insertion order"""
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(self._parent)):
+            groups.setdefault(self.find(index), []).append(index)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+def cluster_listings(records: Iterable[Dict], **options) -> List[List[int]]:
+    """
+    Group near-duplicate listings
+
+    Args:
+        records: Listing field dicts (see ListingClusterer.add)
+        **options: ListingClusterer options
+
+    Returns:
+        Clusters of two or more record indices
+    """
+    clusterer = ListingClusterer(**options)
+    for record in records:
+        clusterer.add(record)
+    return clusterer.clusters()
@@ -0,0 +1,196 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class Field(NamedTuple):
+    """One output column: where it lives in the source JSON and how to convert it.
+
+    An empty path marks a value supplied by the caller as a keyword argument
+    of the same name (e.g. ``link``).
+    """
+    name: str
+    path: Tuple[str, ...]
+    transform: Optional[Callable[[Any], Any]] = None
+    default: Any = None
+
+
+def _monthly_arnona(value):
+    """Arnona is quoted for two months"""
+    return value / 2 if value and value > 0 else None
+
+
+def _date_part(value):
+    return value.split('T')[0] if isinstance(value, str) else ''
+
+
+def _count(value):
+    return len(value) if value else 0
+
+
+def _list_or_empty(value):
+    return value if value is not None else []
+
+
+def _image_urls(images):
+    """Normalize the different image shapes Yad2 uses into a list of URL strings"""
+    image_urls = []
+    if isinstance(images, list):
+        for img in images:
+            if isinstance(img, str):
+                image_urls.append(img)
+            elif isinstance(img, dict):
+                url = img.get('url') or img.get('src') or img.get('href') or img.get('link')
+                if url:
+                    image_urls.append(url)
+                # Sometimes images are nested deeper
+                elif 'original' in img:
+                    image_urls.append(img['original'])
+                elif 'large' in img:
+                    image_urls.append(img['large'])
+    return image_urls
+
+
+# Item-page listing -> property_details. Adding a column is one line here.
+LISTING_FIELDS: List[Field] = [
+    Field('listing_id', ('token',)),
+    Field('ad_number', ('adNumber',)),
+    Field('city', ('address', 'city', 'text')),
+    Field('created_at', ('dates', 'createdAt')),
+    Field('updated_at', ('dates', 'updatedAt')),
+    Field('neighborhood', ('address', 'neighborhood', 'text')),
+    Field('street', ('address', 'street', 'text')),
+    Field('rent', ('price',)),
+    Field('arnona_month', ('propertyTax',), _monthly_arnona),
+    Field('vaad', ('houseCommittee',)),
+    Field('rooms', ('additionalDetails', 'roomsCount')),
+    Field('sqm', ('additionalDetails', 'squareMeter')),
+    Field('floor', ('address', 'house', 'floor')),
+    Field('elevator', ('inProperty', 'includeElevator')),
+    Field('total_floors', ('additionalDetails', 'buildingTopFloor')),
+    Field('condition', ('additionalDetails', 'propertyCondition', 'text')),
+    Field('entry_date', ('additionalDetails', 'entranceDate'), _date_part),
+    Field('description', ('metaData', 'description')),
+    Field('search_text', ('metaData', 'searchText')),
+    Field('isLongTermContract', ('additionalDetails', 'isLongTermContract')),
+    Field('parking', ('inProperty', 'includeParking')),
+    Field('balcony', ('inProperty', 'includeBalcony')),
+    Field('mamad', ('inProperty', 'includeSecurityRoom')),
+    Field('AC', ('inProperty', 'includeAirconditioner')),
+    Field('Boiler', ('inProperty', 'includeBoiler')),
+    Field('renovated', ('inProperty', 'isRenovated')),
+    Field('furniture', ('furnitureInfo',), default=''),
+    Field('pets', ('inProperty', 'isPetsAllowed')),
+    Field('latitude', ('address', 'coords', 'lat')),
+    Field('longitude', ('address', 'coords', 'lon')),
+    Field('tags', ('tags',), _list_or_empty),
+    Field('property_type', ('additionalDetails', 'property', 'text')),
+    Field('link', ()),
+    Field('image_count', ('metaData', 'images'), _count),
+    Field('images', ('metaData', 'images'), _image_urls),
+    Field('video_count', ('metaData', 'videos'), _count),
+]
+
+# Feed entry -> fields usable before the item page is fetched
+FEED_FIELDS: List[Field] = [
+    Field('listing_id', ('token',)),
+    Field('rent', ('price',)),
+    Field('updated_at', ('dates', 'updatedAt')),
+    Field('rooms', ('additionalDetails', 'roomsCount')),
+    Field('sqm', ('additionalDetails', 'squareMeter')),
+    Field('floor', ('address', 'house', 'floor')),
+    Field('street', ('address', 'street', 'text')),
+    Field('neighborhood', ('address', 'neighborhood', 'text')),
+    Field('latitude', ('address', 'coords', 'lat')),
+    Field('longitude', ('address', 'coords', 'lon')),
+    Field('elevator', ('inProperty', 'includeElevator')),
+    Field('balcony', ('inProperty', 'includeBalcony')),
+    Field('renovated', ('inProperty', 'isRenovated')),
+    Field('parking', ('inProperty', 'includeParking')),
+    Field('mamad', ('inProperty', 'includeSecurityRoom')),
+    Field('images', ('metaData', 'images'), _image_urls),
+]
+
+
+def compile_extractor(fields: List[Field]) -> Callable[..., Dict[str, Any]]:
+    """
+    Compile a field spec into a single flat extraction function
+
+    Every intermediate dict and every leaf is looked up once, no matter how
+    many fields share it; non-dict intermediates are treated as empty.
+
+    Args:
+        fields: Field spec, in output column order
+
+    Returns:
+        ``extract(data, **caller_fields) -> dict``
+    """
+    namespace: Dict[str, Any] = {'_EMPTY': {}}
+    lines: List[str] = []
+    variables: Dict[Tuple[str, ...], str] = {(): 'data'}
+    leaves: Dict[Tuple[Tuple[str, ...], Any], str] = {}
+    outputs: List[str] = []
+    caller_fields: List[str] = []
+
+    def parent_var(prefix: Tuple[str, ...]) -> str:
+        if prefix not in variables:
+            parent = parent_var(prefix[:-1])
+            var = f"d{len(variables)}"
+            lines.append(f"    {var} = {parent}.get({prefix[-1]!r})")
+            lines.append(f"    if {var}.__class__ is not dict: {var} = _EMPTY")
+            variables[prefix] = var
+        return variables[prefix]
+
+    for index, field in enumerate(fields):
+        if not field.path:
+            caller_fields.append(field.name)
+            outputs.append(f"{field.name!r}: {field.name}")
+            continue
+
+        leaf_key = (field.path, field.default)
+        if leaf_key not in leaves:
+            parent = parent_var(field.path[:-1])
+            var = f"v{len(leaves)}"
+            if field.default is None:
+                lines.append(f"    {var} = {parent}.get({field.path[-1]!r})")
+            else:
+                namespace[f"_default{index}"] = field.default
+                lines.append(f"    {var} = {parent}.get({field.path[-1]!r}, _default{index})")
+            leaves[leaf_key] = var
+
+        expression = leaves[leaf_key]
+        if field.transform is not None:
+            namespace[f"_transform{index}"] = field.transform
+            expression = f"_transform{index}({expression})"
+        outputs.append(f"{field.name!r}: {expression}")
+
+    signature = ", ".join(['data'] + [f"{name}=None" for name in caller_fields])
+    source = "\n".join(
+        [f"def extract({signature}):"]
+        + lines
+        + ["    return {" + ", ".join(outputs) + "}"]
+    )
+    exec(compile(source, '<field_extractor>', 'exec'), namespace)
+    extract = namespace['extract']
+    extract.source = source
+    return extract
+
+
+def top_level_keys(fields: List[Field]) -> Set[str]:
+    """Source keys a spec reads from, for detecting fields it does not capture"""
+    return {field.path[0] for field in fields if field.path}
+
+
+def missing_paths(data: Dict, fields: List[Field]) -> List[str]:
+    """Spec paths absent from a document, e.g. after Yad2 renames a field"""
+    missing = []
+    for path in dict.fromkeys(field.path for field in fields if field.path):
+        node = data
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                missing.append(".".join(path))
+                break
+            node = node[key]
+    return missing
+
+
+extract_listing = compile_extractor(LISTING_FIELDS)
+extract_feed_entry = compile_extractor(FEED_FIELDS)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import uuid
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+# Columns kept per listing per run: (name, kind). 'category' columns are
+# dictionary-encoded, so a city or neighborhood is stored once per file.
+HISTORY_COLUMNS = (
+    ('listing_id', 'category'),
+    ('scraped_at', 'timestamp'),
+    ('city', 'category'),
+    ('neighborhood', 'category'),
+    ('street', 'category'),
+    ('property_type', 'category'),
+    ('condition', 'category'),
+    ('rent', 'number'),
+    ('vaad', 'number'),
+    ('arnona_month', 'number'),
+    ('rooms', 'number'),
+    ('sqm', 'number'),
+    ('floor', 'number'),
+    ('latitude', 'number'),
+    ('longitude', 'number'),
+    ('entry_date', 'category'),
+    ('updated_at', 'string'),
+    ('found_in_searches', 'category'),
+)
+PARTITION_COLUMN = 'run_date'
+PRICE_COLUMNS = ('rent', 'vaad', 'arnona_month')
+
+DateLike = Union[str, date, datetime]
+
+
+def _partition_value(value: Optional[DateLike]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime('%Y-%m-%d')
+
+
+class HistoryStore:
+    def __init__(self, root: str = 'data/history'):
+        """
+        Initialize an append-only Parquet history of scraped listings
+
+        Every run adds one file under ``run_date=YYYY-MM-DD/`` with one row per
+        listing. Files are never rewritten, and a half-written file is never
+        visible. Queries read through pyarrow.dataset, so they load only the
+        needed columns and partitions, filtered batch by batch.
+
+        Args:
+            root: Directory holding the partitioned dataset
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("pyarrow is required for the history store (pip install pyarrow)")
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def schema() -> pa.Schema:
+        import pyarrow as pa
+        types = {
+            'category': pa.dictionary(pa.int32(), pa.string()),
+            'string': pa.string(),
+            'number': pa.float64(),
+            'timestamp': pa.timestamp('us'),
+        }
+        return pa.schema([(name, types[kind]) for name, kind in HISTORY_COLUMNS])
+
+    def append(self, df: pd.DataFrame, scraped_at: Optional[datetime] = None) -> Optional[str]:
+        """
+        Write one run's listings as a new Parquet file
+
+        Args:
+            df: The run's combined listings (one row per listing_id)
+            scraped_at: Run time (defaults to now); also picks the date partition
+
+        Returns:
+            Path of the written file, or None if df is empty
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if df.empty:
+            return None
+        scraped_at = scraped_at or datetime.now()
+        df = df.drop_duplicates('listing_id', keep='last')
+
+        arrays = []
+        for name, kind in HISTORY_COLUMNS:
+            arrays.append(self._column(df, name, kind, scraped_at))
+        table = pa.Table.from_arrays(arrays, schema=self.schema())
+
+        partition_dir = os.path.join(self.root, f"{PARTITION_COLUMN}={_partition_value(scraped_at)}")
+        os.makedirs(partition_dir, exist_ok=True)
+        file_name = f"part-{scraped_at.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(partition_dir, file_name)
+        tmp_path = os.path.join(partition_dir, f".{file_name}.tmp")  # dot files are ignored by readers
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def _column(df: pd.DataFrame, name: str, kind: str, scraped_at: datetime) -> pa.Array:
+        import pandas as pd
+        import pyarrow as pa
+
+        if name == 'scraped_at':
+            return pa.array([scraped_at] * len(df), type=pa.timestamp('us'))
+        if name not in df:
+            null_type = pa.float64() if kind == 'number' else pa.string()
+            array = pa.nulls(len(df), type=null_type)
+            return array.dictionary_encode() if kind == 'category' else array
+
+        column = df[name]
+        if kind == 'number':
+            values = pd.to_numeric(column, errors='coerce').astype('float64')
+            return pa.array(values.to_numpy(), type=pa.float64(), from_pandas=True)
+
+        if name == 'found_in_searches':
+            column = column.map(lambda value: ', '.join(value) if isinstance(value, (list, tuple)) else value)
+        values = [None if value is None or value is pd.NA or value != value else str(value) for value in column]
+        array = pa.array(values, type=pa.string())
+        return array.dictionary_encode() if kind == 'category' else array
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+        return ds.dataset(self.root, format='parquet', partitioning=partitioning,
+                          schema=self.schema().append(pa.field(PARTITION_COLUMN, pa.string())))
+
+    @staticmethod
+    def _date_filter(expression, since: Optional[DateLike], until: Optional[DateLike]):
+        """AND partition bounds onto a filter; prunes whole date directories before any file is opened"""
+        import pyarrow.dataset as ds
+        if since is not None:
+            bound = ds.field(PARTITION_COLUMN) >= _partition_value(since)
+            expression = bound if expression is None else expression & bound
+        if until is not None:
+            bound = ds.field(PARTITION_COLUMN) <= _partition_value(until)
+            expression = bound if expression is None else expression & bound
+        return expression
+
+    def price_history(self, listing_id: str, since: Optional[DateLike] = None,
+                      changes_only: bool = False) -> pd.DataFrame:
+        """
+        Rent, vaad and arnona of one listing in every run that saw it
+
+        Args:
+            listing_id: Listing token
+            since: Earliest run date to include
+            changes_only: Keep only the first run and runs where a price changed
+
+        Returns:
+            DataFrame of scraped_at, run_date and the price columns, oldest first.
+            Its first and last rows give how long the listing has been up.
+        """
+        import pyarrow.dataset as ds
+
+        columns = ['scraped_at', PARTITION_COLUMN, *PRICE_COLUMNS]
+        expression = self._date_filter(ds.field('listing_id') == str(listing_id), since, None)
+        history = self._dataset().to_table(columns=columns, filter=expression).to_pandas()
+        history = history.sort_values('scraped_at').reset_index(drop=True)
+
+        if changes_only and len(history) > 1:
+            prices = history[list(PRICE_COLUMNS)]
+            changed = prices.ne(prices.shift()) & ~(prices.isna() & prices.shift().isna())
+            history = history[changed.any(axis=1)].reset_index(drop=True)
+        return history
+
+    def neighborhood_aggregates(self, city: Optional[str] = None, since: Optional[DateLike] = None,
+                                until: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Rent statistics per (city, neighborhood) over the stored runs
+
+        Aggregated one record batch at a time from the city, neighborhood,
+        listing_id, rent and sqm columns, so memory stays bounded by the number
+        of neighborhoods and listings, not by the number of stored rows.
+
+        Args:
+            city: Only this city
+            since: Earliest run date to include
+            until: Latest run date to include
+
+        Returns:
+            DataFrame with listings (distinct tokens), observations (listing-runs),
+            mean/min/max rent, mean rent per sqm and the first/last run dates,
+            most listed neighborhoods first
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        expression = ds.field('city') == city if city is not None else None
+        expression = self._date_filter(expression, since, until)
+        columns = ['city', 'neighborhood', 'listing_id', 'rent', 'sqm', PARTITION_COLUMN]
+
+        groups: Dict[tuple, Dict] = {}
+        for batch in self._dataset().to_batches(columns=columns, filter=expression):
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch])
+            sqm = table['sqm']
+            per_sqm = pc.if_else(pc.greater(sqm, 0), pc.divide(table['rent'], sqm), None)
+            table = table.append_column('rent_per_sqm', per_sqm).select(
+                ['city', 'neighborhood', 'listing_id', 'rent', 'rent_per_sqm', PARTITION_COLUMN]
+            )
+            # Dictionary keys group as plain strings
+            table = table.set_column(0, 'city', table['city'].cast(pa.string()))
+            table = table.set_column(1, 'neighborhood', table['neighborhood'].cast(pa.string()))
+            table = table.set_column(2, 'listing_id', table['listing_id'].cast(pa.string()))
+            partial = table.group_by(['city', 'neighborhood']).aggregate([
+                ('listing_id', 'count'),
+                ('listing_id', 'distinct'),
+                ('rent', 'count'),
+                ('rent', 'sum'),
+                ('rent', 'min'),
+                ('rent', 'max'),
+                ('rent_per_sqm', 'count'),
+                ('rent_per_sqm', 'sum'),
+                (PARTITION_COLUMN, 'min'),
+                (PARTITION_COLUMN, 'max'),
+            ])
+            for row in partial.to_pylist():
+                self._merge_group(groups, row)
+
+        rows = [
+            {
+                'city': key[0],
+                'neighborhood': key[1],
+                'listings': len(group['listing_ids']),
+                'observations': group['observations'],
+                'mean_rent': group['rent_sum'] / group['rent_count'] if group['rent_count'] else None,
+                'min_rent': group['rent_min'],
+                'max_rent': group['rent_max'],
+                'mean_rent_per_sqm': group['per_sqm_sum'] / group['per_sqm_count'] if group['per_sqm_count'] else None,
+                'first_seen': group['first_seen'],
+                'last_seen': group['last_seen'],
+            }
+            for key, group in groups.items()
+        ]
+        columns = ['city', 'neighborhood', 'listings', 'observations', 'mean_rent', 'min_rent', 'max_rent',
+                   'mean_rent_per_sqm', 'first_seen', 'last_seen']
+        result = pd.DataFrame(rows, columns=columns)
+        return result.sort_values(['listings', 'observations'], ascending=False).reset_index(drop=True)
+
+    @staticmethod
+    def _merge_group(groups: Dict[tuple, Dict], row: Dict):
+        """Fold one batch's partial aggregates for a neighborhood into the running totals"""
+        key = (row['city'], row['neighborhood'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'listing_ids': set(), 'observations': 0, 'rent_count': 0, 'rent_sum': 0.0,
+                'rent_min': None, 'rent_max': None, 'per_sqm_count': 0, 'per_sqm_sum': 0.0,
+                'first_seen': None, 'last_seen': None,
+            }
+        group['listing_ids'].update(row['listing_id_distinct'])
+        group['listing_ids'].discard(None)
+        group['observations'] += row['listing_id_count']
+        group['rent_count'] += row['rent_count']
+        group['rent_sum'] += row['rent_sum'] or 0.0
+        group['per_sqm_count'] += row['rent_per_sqm_count']
+        group['per_sqm_sum'] += row['rent_per_sqm_sum'] or 0.0
+        for field, value, pick in (
+            ('rent_min', row['rent_min'], min), ('rent_max', row['rent_max'], max),
+            ('first_seen', row[f'{PARTITION_COLUMN}_min'], min), ('last_seen', row[f'{PARTITION_COLUMN}_max'], max),
+        ):
+            if value is not None:
+                group[field] = value if group[field] is None else pick(group[field], value)
+
+    def run_dates(self) -> List[str]:
+        """Dates that have at least one stored run"""
+        prefix = f"{PARTITION_COLUMN}="
+        return sorted(
+            name[len(prefix):] for name in os.listdir(self.root)
+            if name.startswith(prefix) and os.path.isdir(os.path.join(self.root, name))
+        )
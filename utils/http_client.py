@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import email.utils
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.metrics import get_metrics
+from utils.rate_limiter import HostRateLimiters
+
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
+
+# Markers of the bot-protection page Yad2 serves instead of content
+BLOCKED_PAGE_MARKERS = (b'shieldsquare', b'perfdrive.com', b'captcha-delivery', b'are you a robot')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header or a Telegram 'retry_after' body"""
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                retry_at = email.utils.parsedate_to_datetime(header)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    if 'json' in response.headers.get('Content-Type', ''):
+        try:
+            return float(response.json().get('parameters', {}).get('retry_after'))
+        except (ValueError, TypeError, AttributeError):
+            pass
+    return None
+
+
+def is_blocked_page(response: requests.Response) -> bool:
+    """True for a 200 response that is actually a captcha/bot-protection page"""
+    if 'html' not in response.headers.get('Content-Type', ''):
+        return False
+    head = response.content[:65536].lower()
+    return b'__next_data__' not in head and any(marker in head for marker in BLOCKED_PAGE_MARKERS)
+
+
+class HttpClient:
+    def __init__(self,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 20.0,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 default_pool_size: int = 4,
+                 host_pool_sizes: Optional[Dict[str, int]] = None,
+                 rate_limiters: Optional[HostRateLimiters] = None,
+                 retry_throttled: bool = True):
+        """
+        Initialize a pooled HTTP client shared by the scraper and the notifier
+
+        Args:
+            connect_timeout: Seconds to wait for a TCP/TLS connection
+            read_timeout: Seconds to wait for the server to send data
+            max_retries: Retries for connection errors and throttled responses
+            backoff_factor: Exponential backoff factor between retries
+            default_pool_size: Keep-alive connections kept per unknown host
+            host_pool_sizes: Per-host overrides for the keep-alive pool size
+            rate_limiters: Per-host adaptive limiters every request goes through
+            retry_throttled: Retry throttled responses in request(); turn off when
+                the caller schedules its own retries (e.g. the Telegram outbox)
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.default_pool_size = default_pool_size
+        self.host_pool_sizes = host_pool_sizes or {}
+        self.rate_limiters = rate_limiters or HostRateLimiters(default_limits=(0, 0))
+        self.retry_throttled = retry_throttled
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _build_retry(self) -> Retry:
+        """Connection-level retries; throttled responses are retried in request()"""
+        from urllib3.util.retry import Retry
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=0,
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False,
+        )
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the keep-alive session that owns connections to the URL's host"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                # requests is imported with the first session, not at startup
+                import requests
+                from requests.adapters import HTTPAdapter
+                pool_size = self.host_pool_sizes.get(host, self.default_pool_size)
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=pool_size,
+                    max_retries=self._build_retry(),
+                )
+                session = requests.Session()
+                session.mount(f"{parsed.scheme}://{host}", adapter)
+                self._sessions[host] = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the host's rate limiter and pooled session
+
+        Throttled responses (429, 5xx, captcha pages) slow the host's limiter
+        down and are retried with backoff, honouring Retry-After (slept here
+        when the host has no rate limit to hold it). POST requests
+        are only retried on 429, where the server guarantees nothing was done.
+        With retry_throttled off, throttled responses are returned as they are.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+        limiter = self.rate_limiters.for_host(host)
+        session = self.session_for(url)
+
+        metrics = get_metrics()
+        attempt = 0
+        while True:
+            limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except Exception:
+                metrics.inc('http_requests_total', host=host, status='error')
+                raise
+            metrics.observe('http_request_seconds', time.perf_counter() - start, host=host)
+            metrics.inc('http_requests_total', host=host, status=response.status_code)
+            metrics.inc('http_bytes_received_total', len(response.content), host=host)
+
+            throttled = response.status_code == 429 or response.status_code >= 500 or is_blocked_page(response)
+            if not throttled:
+                limiter.record_success()
+                return response
+
+            retry_after = parse_retry_after(response)
+            if retry_after is None:
+                retry_after = self.backoff_factor * (2 ** attempt)
+            limiter.record_throttle(retry_after)
+            metrics.inc('http_throttled_total', host=host)
+
+            retryable = self.retry_throttled and (method.upper() != 'POST' or response.status_code == 429)
+            if not retryable or attempt >= self.max_retries:
+                return response
+
+            attempt += 1
+            if limiter.enabled:
+                pacing = f"at {limiter.rate:.2f} req/s"
+            else:
+                # An unlimited host's limiter ignores record_throttle, so wait here instead
+                pacing = "unpaced"
+            logger.warning(f"⏳ {host} throttled (HTTP {response.status_code}); retry {attempt}/{self.max_retries} "
+                  f"in {retry_after:.1f}s {pacing}")
+            if not limiter.enabled:
+                time.sleep(retry_after)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+
+def create_http_client(**options) -> HttpClient:
+    """
+    Build a new HTTP client configured from settings
+
+    Args:
+        **options: HttpClient arguments overriding the settings
+
+    Returns:
+        A client with its own sessions and rate limiters
+    """
+    from config.settings import settings
+    http = settings.http
+    scraper = settings.scraper
+    initial_rate = 1.0 / scraper.request_delay if scraper.request_delay > 0 else 0
+    arguments = dict(
+        connect_timeout=http.connect_timeout,
+        read_timeout=http.read_timeout,
+        max_retries=http.max_retries,
+        backoff_factor=http.backoff_factor,
+        default_pool_size=http.default_pool_size,
+        host_pool_sizes=http.host_pool_sizes,
+        rate_limiters=HostRateLimiters(
+            default_limits=(initial_rate, scraper.requests_per_second),
+            host_limits=http.host_rate_limits,
+        ),
+    )
+    arguments.update(options)
+    return HttpClient(**arguments)
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client configured from settings"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = create_http_client()
+    return _default_client
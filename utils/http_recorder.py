@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+INDEX_FILE = 'index.jsonl'
+
+
+def fixture_key(url: str) -> str:
+    """Host-independent key for a request: path plus sorted query string"""
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return f"{parsed.path}?{query}" if query else parsed.path
+
+
+class ResponseRecorder:
+    def __init__(self, directory: str):
+        """
+        Initialize a recorder that saves responses as replayable fixtures
+
+        Args:
+            directory: Directory receiving one body file per response plus index.jsonl
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def save(self, key: str, body: bytes, status: int = 200, content_type: str = 'text/html; charset=utf-8'):
+        """Write a response body and append its index entry"""
+        file_name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + '.html'
+        entry = {'key': key, 'file': file_name, 'status': status, 'content_type': content_type}
+        with self._lock:
+            with open(os.path.join(self.directory, file_name), 'wb') as f:
+                f.write(body)
+            with open(os.path.join(self.directory, INDEX_FILE), 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def record(self, response):
+        """Save a requests.Response fetched from a feed or item page"""
+        self.save(
+            fixture_key(response.url),
+            response.content,
+            status=response.status_code,
+            content_type=response.headers.get('Content-Type', 'text/html; charset=utf-8'),
+        )
+
+
+def load_fixture_index(directory: str) -> Dict[str, Dict]:
+    """
+    Load recorded fixtures
+
+    Returns:
+        Mapping of fixture key to its index entry; later recordings win
+    """
+    index = {}
+    index_path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                index[entry['key']] = entry
+    return index
+
+
+_default_recorder: Optional[ResponseRecorder] = None
+
+
+def get_recorder() -> Optional[ResponseRecorder]:
+    """Return the recorder configured by HTTP_RECORD_DIR, if any"""
+    global _default_recorder
+    if _default_recorder is None:
+        from config.settings import settings
+        if settings.http.record_dir:
+            _default_recorder = ResponseRecorder(settings.http.record_dir)
+    return _default_recorder
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Column families of property_details; any other key is kept as an object column
+NUMERIC_COLUMNS = (
+    'rent', 'sqm', 'rooms', 'floor', 'total_floors', 'vaad', 'arnona_month',
+    'latitude', 'longitude', 'image_count', 'video_count',
+)
+CATEGORICAL_COLUMNS = ('city', 'neighborhood', 'street', 'condition', 'property_type')
+BOOLEAN_COLUMNS = (
+    'elevator', 'parking', 'balcony', 'mamad', 'AC', 'Boiler', 'renovated', 'pets', 'isLongTermContract',
+)
+
+
+class _NumericColumn:
+    """float64 values plus a null mask; emitted as Int64 when every value is integral"""
+
+    def __init__(self, size: int):
+        self.values = array('d', bytes(8 * size))
+        self.mask = bytearray(b'\x01' * size)
+        self.integral = True
+
+    def __len__(self):
+        return len(self.mask)
+
+    def append(self, value):
+        if value is None or isinstance(value, bool):
+            self.values.append(0.0)
+            self.mask.append(1)
+            return
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = float('nan')
+        if number != number:
+            self.values.append(0.0)
+            self.mask.append(1)
+            return
+        if self.integral and not number.is_integer():
+            self.integral = False
+        self.values.append(number)
+        self.mask.append(0)
+
+    def build(self):
+        import numpy as np
+        import pandas as pd
+        values = np.frombuffer(self.values, dtype=np.float64)
+        mask = np.frombuffer(self.mask, dtype=np.bool_)
+        if self.integral and np.all(np.abs(values) < 2 ** 53):
+            return pd.arrays.IntegerArray(values.astype(np.int64), mask)
+        return pd.arrays.FloatingArray(values, mask)
+
+
+class _CategoricalColumn:
+    """int32 codes into a list of distinct values (-1 is missing)"""
+
+    def __init__(self, size: int):
+        self.codes = array('i', [-1]) * size
+        self.categories: Dict[Any, int] = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value):
+        if value is None or value != value:
+            self.codes.append(-1)
+            return
+        code = self.categories.get(value)
+        if code is None:
+            code = self.categories[value] = len(self.categories)
+        self.codes.append(code)
+
+    def build(self):
+        import numpy as np
+        import pandas as pd
+        codes = np.frombuffer(self.codes, dtype=np.int32)
+        return pd.Categorical.from_codes(codes, categories=list(self.categories))
+
+
+class _BooleanColumn:
+    """bool values plus a null mask"""
+
+    def __init__(self, size: int):
+        self.values = bytearray(size)
+        self.mask = bytearray(b'\x01' * size)
+
+    def __len__(self):
+        return len(self.mask)
+
+    def append(self, value):
+        if value is None or value != value:
+            self.values.append(0)
+            self.mask.append(1)
+        else:
+            self.values.append(1 if value else 0)
+            self.mask.append(0)
+
+    def build(self):
+        import numpy as np
+        import pandas as pd
+        values = np.frombuffer(self.values, dtype=np.bool_)
+        mask = np.frombuffer(self.mask, dtype=np.bool_)
+        return pd.arrays.BooleanArray(values, mask)
+
+
+class _ObjectColumn:
+    """References to the original Python objects (strings, image/tag lists)"""
+
+    def __init__(self, size: int):
+        self.values: List[Any] = [None] * size
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def build(self):
+        return self.values
+
+
+class ListingColumns:
+    def __init__(self):
+        """
+        Initialize a columnar accumulator for scraped listings
+
+        Numeric fields go into typed arrays, low-cardinality strings into
+        categorical codes and amenity flags into nullable booleans. Rows are
+        never copied: list and string values are kept by reference.
+        """
+        self.columns: Dict[str, Any] = {}
+        self.row_count = 0
+
+    def _column_for(self, name: str):
+        column = self.columns.get(name)
+        if column is None:
+            if name in NUMERIC_COLUMNS:
+                column = _NumericColumn(self.row_count)
+            elif name in CATEGORICAL_COLUMNS:
+                column = _CategoricalColumn(self.row_count)
+            elif name in BOOLEAN_COLUMNS:
+                column = _BooleanColumn(self.row_count)
+            else:
+                column = _ObjectColumn(self.row_count)
+            self.columns[name] = column
+        return column
+
+    def append(self, row: Dict, **extra):
+        """
+        Append one listing
+
+        Args:
+            row: property_details dict (left unmodified)
+            **extra: Additional per-row values, e.g. found_in_searches
+        """
+        seen = 0
+        for source in (row, extra):
+            for name, value in source.items():
+                self._column_for(name).append(value)
+                seen += 1
+
+        self.row_count += 1
+        if seen != len(self.columns):
+            # Pad columns this row did not have
+            for column in self.columns.values():
+                if len(column) < self.row_count:
+                    column.append(None)
+
+    def __len__(self):
+        return self.row_count
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build the DataFrame directly from the accumulated buffers (no appends afterwards)"""
+        import pandas as pd  # only needed once rows are turned into a frame
+        if not self.row_count:
+            return pd.DataFrame()
+        return pd.DataFrame({name: column.build() for name, column in self.columns.items()}, copy=False)
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+
+class ListingStore:
+    def __init__(self, store_path: str = 'data/listing_store.json', max_age_hours: float = 24.0):
+        """
+        Initialize the per-token store of previously scraped item pages
+
+        Args:
+            store_path: Path to JSON file holding the scraped records
+            max_age_hours: Records older than this are refetched even if the feed is unchanged
+        """
+        self.store_path = store_path
+        self.max_age = timedelta(hours=max_age_hours)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.records = self._load_records()
+
+        store_dir = os.path.dirname(self.store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def _load_records(self) -> Dict[str, Dict]:
+        """Load scraped records from file"""
+        if os.path.exists(self.store_path):
+            try:
+                with open(self.store_path, 'r') as f:
+                    return json.load(f).get('listings', {})
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+        return {}
+
+    @staticmethod
+    def feed_fingerprint(listing: Dict) -> Dict:
+        """Feed-side fields that change whenever the item page needs refetching"""
+        return {
+            'updated_at': (listing.get('dates') or {}).get('updatedAt'),
+            'price': listing.get('price'),
+        }
+
+    def get_unchanged(self, token: str, listing: Dict) -> Optional[Dict]:
+        """
+        Return stored property details if the feed entry has not changed since the last scrape
+
+        Args:
+            token: Listing token
+            listing: Feed entry for the listing
+
+        Returns:
+            The stored property_details, or None if the item page must be refetched
+        """
+        with self._lock:
+            record = self.records.get(token)
+        if not record:
+            return None
+
+        fingerprint = self.feed_fingerprint(listing)
+        if record.get('updated_at') != fingerprint['updated_at'] or record.get('price') != fingerprint['price']:
+            return None
+
+        try:
+            scraped_at = datetime.fromisoformat(record['scraped_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if datetime.now() - scraped_at > self.max_age:
+            return None
+
+        return record.get('property_details')
+
+    def put(self, token: str, listing: Dict, property_details: Dict):
+        """Record freshly scraped details together with the feed fingerprint they belong to"""
+        record = {
+            **self.feed_fingerprint(listing),
+            'scraped_at': datetime.now().isoformat(),
+            'property_details': property_details,
+        }
+        with self._lock:
+            self.records[token] = record
+            self._dirty = True
+
+    def save(self):
+        """Write the store to disk if anything changed, dropping long-expired records"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            cutoff = datetime.now() - self.max_age * 30
+            for token in [t for t, r in self.records.items() if r.get('scraped_at', '') < cutoff.isoformat()]:
+                del self.records[token]
+
+            data = {
+                'listings': self.records,
+                'last_updated': datetime.now().isoformat()
+            }
+            tmp_path = f"{self.store_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.store_path)
+            self._dirty = False
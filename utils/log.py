@@ -0,0 +1,37 @@
+import logging
+import sys
+from typing import Optional, Union
+
+_configured = False
+
+
+def configure_logging(level: Optional[Union[str, int]] = None):
+    """
+    Send log records to stdout as bare messages, filtered by level
+
+    Messages keep their emoji prefixes, so INFO output looks like the old
+    prints. Per-page and per-listing chatter is logged at DEBUG and is dropped
+    before formatting at the default INFO level.
+
+    Args:
+        level: Level name or number (defaults to settings.log_level / LOG_LEVEL)
+    """
+    global _configured
+    if level is None:
+        from config.settings import settings
+        level = settings.log_level
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if not _configured:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        root.addHandler(handler)
+        _configured = True
+    # Third-party clients log every connection at DEBUG
+    for noisy in ('urllib3', 'requests', 'google', 'gspread'):
+        logging.getLogger(noisy).setLevel(max(level, logging.WARNING))
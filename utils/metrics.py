@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Histogram upper bounds in seconds; spans a cache hit to a throttled request
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Initialize an in-process registry of counters and latency histograms
+
+        Metrics are keyed by name plus labels (e.g. stage='feed_fetch'). Updates
+        take one lock and a dict lookup, so instrumenting hot paths is cheap.
+        """
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        """Set the HELP line written for a metric"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add value to a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the enclosed block into a histogram (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, stage: str):
+        """Time the enclosed block as one run of a pipeline stage"""
+        return self.timer('stage_seconds', stage=stage)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self.started_at = time.time()
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full_name = f"yad2_{name}"
+                lines.append(f"# HELP {full_name} {self._help.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{full_name}{_format_labels(key)} {_format_value(value)}")
+
+            for name in sorted(self._histograms):
+                full_name = f"yad2_{name}"
+                lines.append(f"# HELP {full_name} {self._help.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> Dict:
+        """Run report: counters, per-stage latency summaries and cache hit rates"""
+        with self._lock:
+            counters = {
+                name: {self._series_name(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: {
+                    self._series_name(key): {
+                        'count': histogram.count,
+                        'total_seconds': round(histogram.sum, 6),
+                        'mean_seconds': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                        'p50_seconds': histogram.quantile(0.5),
+                        'p95_seconds': histogram.quantile(0.95),
+                        'max_seconds': round(histogram.max, 6),
+                    }
+                    for key, histogram in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+
+        cache_hit_rates = {}
+        for cache, lookups in counters.get('cache_lookups_total', {}).items():
+            hits = counters.get('cache_hits_total', {}).get(cache, 0)
+            cache_hit_rates[cache] = round(hits / lookups, 4) if lookups else 0.0
+
+        return {
+            'started_at': self.started_at,
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'counters': counters,
+            'histograms': histograms,
+            'cache_hit_rates': cache_hit_rates,
+        }
+
+    @staticmethod
+    def _series_name(key: LabelKey) -> str:
+        return ','.join(f"{name}={value}" for name, value in key) or 'total'
+
+    def write_prometheus(self, path: str):
+        """Write the textfile-collector file atomically so a scrape never sees half of it"""
+        self._write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path: str):
+        self._write_atomic(path, json.dumps(self.report(), indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def _write_atomic(path: str, text: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def export(self, prometheus_path: Optional[str] = None, json_path: Optional[str] = None):
+        """Write whichever of the two exports has a path"""
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+        if json_path:
+            self.write_json(json_path)
+
+
+_default_metrics = Metrics()
+_default_metrics.describe('stage_seconds', 'Time spent per run of each pipeline stage')
+_default_metrics.describe('stage_items_total', 'Items processed per pipeline stage')
+_default_metrics.describe('http_requests_total', 'HTTP responses by host and status code')
+_default_metrics.describe('http_bytes_received_total', 'Response body bytes received by host')
+_default_metrics.describe('http_request_seconds', 'HTTP request latency by host')
+_default_metrics.describe('http_throttled_total', 'Throttled responses (429, 5xx, captcha) by host')
+_default_metrics.describe('cache_lookups_total', 'Lookups per cache layer')
+_default_metrics.describe('cache_hits_total', 'Hits per cache layer')
+_default_metrics.describe('errors_total', 'Errors by stage')
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics registry"""
+    return _default_metrics
+
+
+def export_metrics():
+    """Write the metrics files configured in settings (METRICS_PROMETHEUS_PATH, METRICS_JSON_PATH)"""
+    from config.settings import settings
+    try:
+        _default_metrics.export(settings.metrics_prometheus_path, settings.metrics_json_path)
+    except OSError as e:
+        import logging
+        logging.getLogger(__name__).error(f"❌ Could not write metrics: {e}")
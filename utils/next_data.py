@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Any, Dict, Optional, Union
+
+from utils.metrics import get_metrics
+
+# Matches the opening tag of the Next.js data script regardless of attribute order/quoting
+_NEXT_DATA_TAG = re.compile(rb'<script\b[^>]*\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>', re.IGNORECASE)
+_SCRIPT_CLOSE = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+
+def find_next_data_payload(content: Union[bytes, str]) -> Optional[bytes]:
+    """
+    Locate the raw JSON payload of the <script id="__NEXT_DATA__"> tag
+
+    Scans the page bytes directly instead of building a DOM, so the cost is a
+    substring search rather than a full HTML parse.
+
+    Args:
+        content: Page body (response.content or response.text)
+
+    Returns:
+        The script body as bytes, or None if the tag is missing
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    # Cheap pre-check before running the regex over the whole page
+    marker = content.find(b'__NEXT_DATA__')
+    if marker == -1:
+        return None
+
+    tag_start = content.rfind(b'<', 0, marker)
+    match = _NEXT_DATA_TAG.match(content, tag_start) if tag_start != -1 else None
+    if match is None:
+        match = _NEXT_DATA_TAG.search(content)
+        if match is None:
+            return None
+
+    close = _SCRIPT_CLOSE.search(content, match.end())
+    if close is None:
+        return None
+
+    return content[match.end():close.start()]
+
+
+def _find_next_data_lxml(content: Union[bytes, str]) -> Optional[str]:
+    """Fallback for markup the byte scan cannot handle"""
+    try:
+        import lxml.html
+    except ImportError:
+        return None
+
+    try:
+        tree = lxml.html.fromstring(content)
+    except (ValueError, TypeError):
+        return None
+
+    scripts = tree.xpath('//script[@id="__NEXT_DATA__"]/text()')
+    return scripts[0] if scripts else None
+
+
+def extract_next_data(content: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+    """
+    Extract and decode the __NEXT_DATA__ JSON embedded in a Yad2 page
+
+    Args:
+        content: Page body (response.content or response.text)
+
+    Returns:
+        The decoded JSON document, or None if the script tag is missing
+
+    Raises:
+        json.JSONDecodeError: If the tag is present but its payload is not valid JSON
+    """
+    metrics = get_metrics()
+    with metrics.stage('html_parse'):
+        payload = find_next_data_payload(content)
+        if payload is None or not payload.strip():
+            payload = _find_next_data_lxml(content)
+            if payload is None:
+                return None
+
+    with metrics.stage('json_decode'):
+        return json.loads(payload)
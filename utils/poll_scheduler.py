@@ -0,0 +1,50 @@
+import heapq
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class PollScheduler:
+    def __init__(self, search_configs: List[Dict], interval_minutes: float = 10.0,
+                 jitter: float = 0.2, seed: Optional[int] = None, clock=time.monotonic):
+        """
+        Initialize a per-search poll schedule
+
+        Every search is due immediately once, then again after its own interval
+        (the config's ``poll_interval_minutes`` or ``interval_minutes``) scaled by
+        a random factor in [1 - jitter, 1 + jitter] so polls don't fall into lockstep.
+
+        Args:
+            search_configs: Search configurations to schedule
+            interval_minutes: Default poll interval
+            jitter: Fraction of the interval to randomize by
+            seed: Seed for the jitter generator
+            clock: Monotonic time source in seconds
+        """
+        self.search_configs = list(search_configs)
+        self.interval_minutes = interval_minutes
+        self.jitter = max(0.0, min(jitter, 1.0))
+        self.random = random.Random(seed)
+        self.clock = clock
+
+        now = self.clock()
+        # (due_at, index) keeps configs with equal due times in their configured order
+        self._heap = [(now, index) for index in range(len(self.search_configs))]
+        heapq.heapify(self._heap)
+
+    def interval_seconds(self, config: Dict) -> float:
+        return float(config.get('poll_interval_minutes', self.interval_minutes)) * 60
+
+    def pop(self) -> Tuple[float, int, Dict]:
+        """Remove and return (seconds until due, index, config) of the next search due"""
+        due_at, index = heapq.heappop(self._heap)
+        return max(0.0, due_at - self.clock()), index, self.search_configs[index]
+
+    def schedule_next(self, index: int):
+        """Schedule a search's next poll one jittered interval from now"""
+        interval = self.interval_seconds(self.search_configs[index])
+        factor = 1.0 + self.random.uniform(-self.jitter, self.jitter)
+        heapq.heappush(self._heap, (self.clock() + interval * factor, index))
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,301 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Where a sample's time went, decided by the innermost frame that matches.
+# Order matters: the first rule matching a frame wins for that frame.
+CATEGORY_RULES = (
+    ('json_decode', re.compile(r'[/\\]json[/\\]')),
+    ('html_parse', re.compile(r'next_data\.py|[/\\](lxml|bs4)[/\\]')),
+    ('extraction', re.compile(r'field_extractor\.py|listing_columns\.py')),
+    ('pandas', re.compile(r'[/\\](pandas|numpy)[/\\]')),
+    ('tracker_io', re.compile(r'property_tracker\.py|response_cache\.py|listing_store\.py|sqlite3')),
+    ('rate_limit', re.compile(r'rate_limiter\.py')),
+    ('network', re.compile(r'socket\.py|ssl\.py|[/\\]http[/\\]client\.py|[/\\](urllib3|requests)[/\\]')),
+    ('sheets', re.compile(r'google_sheets_reader_writer\.py|[/\\]gspread[/\\]')),
+    ('telegram', re.compile(r'telegram_notifier\.py|outbound_queue\.py')),
+    ('waiting', re.compile(r'[/\\](threading|queue)\.py|[/\\]concurrent[/\\]futures[/\\]')),
+)
+
+_THREAD_NUMBER = re.compile(r'[_-]\d+')  # ThreadPoolExecutor-0_3 -> ThreadPoolExecutor
+# Threads of an in-process server (the replay server) are not part of the scraper's profile
+_SERVER_FILES = ('socketserver.py',)
+# Stacks through the profiler itself (memory snapshots, the sampler) are its overhead, not the scraper's time
+_PROFILER_FILES = ('profiling.py', 'tracemalloc.py')
+# Frames dropped from memory snapshots before they are compared
+_SNAPSHOT_FILTERS = (__file__, tracemalloc.__file__,
+                     '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+_active_profiler = None
+
+
+def checkpoint(name: str):
+    """Mark a stage boundary; takes a memory snapshot when a RunProfiler is active, otherwise does nothing"""
+    if _active_profiler is not None:
+        _active_profiler.checkpoint(name)
+
+
+def _frame_label(code, root: str) -> str:
+    filename = code.co_filename
+    if filename.startswith(root):
+        filename = os.path.relpath(filename, root)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _categorize(filenames: List[str]) -> str:
+    """Category of a stack given its filenames, innermost first"""
+    for filename in filenames:
+        for category, pattern in CATEGORY_RULES:
+            if pattern.search(filename):
+                return category
+    return 'python'
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize a wall-clock sampling profiler covering every thread
+
+        A background thread reads every thread's current stack at each interval,
+        so fetch workers and pipeline stages are profiled along with the main
+        thread. Threads blocked on a socket or a lock show up too, which is what
+        separates network time from CPU time.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.raw: Counter = Counter()  # (thread name, code objects outermost first) -> samples
+        self.stacks: Counter = Counter()  # folded stack -> samples
+        self.categories: Counter = Counter()
+        self.self_samples: Counter = Counter()  # innermost frame -> samples
+        self.total_samples: Counter = Counter()  # any frame on the stack -> samples
+        self.samples = 0
+        self.overhead_samples = 0  # samples inside the profiler, left out of every table
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        self._aggregate()
+
+    def _run(self):
+        """Only count raw stacks here; labels are built once in _aggregate to keep sampling cheap"""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if codes:
+                    self.raw[names.get(thread_id, 'thread'), tuple(reversed(codes))] += 1
+
+    def _aggregate(self):
+        labels = {}
+        for (thread_name, codes), count in self.raw.items():
+            if any(code.co_filename.endswith(_SERVER_FILES) for code in codes):
+                continue
+            if thread_name == 'profiler' or any(code.co_filename.endswith(_PROFILER_FILES) for code in codes):
+                self.overhead_samples += count
+                continue
+            stack = []
+            for code in codes:
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code, self.root)
+                stack.append(label)
+            self.stacks[';'.join([_THREAD_NUMBER.sub('', thread_name)] + stack)] += count
+            self.categories[_categorize([code.co_filename for code in reversed(codes)])] += count
+            self.self_samples[stack[-1]] += count
+            for label in set(stack):
+                self.total_samples[label] += count
+            self.samples += count
+
+    def write_folded(self, path: str):
+        """Collapsed stacks, one 'frame;frame;frame count' per line (flamegraph.pl, speedscope, inferno)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary_lines(self, top_n: int) -> List[str]:
+        lines = [f"{self.samples} samples over {self.elapsed:.2f}s at {self.interval * 1000:g} ms "
+                 f"(all threads, wall clock; {self.overhead_samples} profiler samples left out)",
+                 "", "Time by category (share of thread samples):"]
+        for category, count in self.categories.most_common():
+            lines.append(f"  {category:<12} {count / max(1, self.samples):6.1%}  ({count} samples)")
+        lines += ["", "  'waiting' is threads parked on a queue, lock or future; the rest is work or I/O.",
+                  "", f"Top {top_n} functions by self samples:"]
+        lines += [f"  {count:7d}  {label}" for label, count in self.self_samples.most_common(top_n)]
+        lines += ["", f"Top {top_n} functions by inclusive samples:"]
+        lines += [f"  {count:7d}  {label}" for label, count in self.total_samples.most_common(top_n)]
+        return lines
+
+
+class RunProfiler:
+    def __init__(self, output_dir: str = 'data/profile', top_n: int = 25,
+                 interval: float = 0.005, trace_memory: bool = True):
+        """
+        Initialize a profiler for one scrape run
+
+        Combines a sampling profiler with tracemalloc snapshots taken at stage
+        boundaries (see checkpoint()). stop() writes to a timestamped directory
+        under output_dir:
+        - profile.folded: collapsed stacks for a flamegraph
+        - profile.txt: time by category and the top functions
+        - allocations.txt: memory per stage and the top-N allocation sites
+
+        Args:
+            output_dir: Parent directory of the per-run output directory
+            top_n: Rows in each top-N table
+            interval: Seconds between stack samples
+            trace_memory: Record tracemalloc snapshots (slows the run noticeably)
+        """
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.sampler = SamplingProfiler(interval)
+        self.snapshots: List[Tuple[str, float, Optional[tracemalloc.Snapshot], int, int]] = []
+        self._started = None
+
+    def start(self):
+        global _active_profiler
+        if self.trace_memory:
+            tracemalloc.start(1)
+        self._started = time.perf_counter()
+        _active_profiler = self
+        self.checkpoint('start')
+        self.sampler.start()
+
+    def checkpoint(self, name: str):
+        """Record elapsed time and, when tracing memory, a snapshot of live allocations"""
+        snapshot = None
+        current = peak = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # Filtered in stop(), once sampling is over: filter_traces costs far more than the snapshot
+            snapshot = tracemalloc.take_snapshot()
+        self.snapshots.append((name, time.perf_counter() - self._started, snapshot, current, peak))
+
+    def stop(self) -> str:
+        """Stop profiling, write the reports and return their directory"""
+        global _active_profiler
+        self.checkpoint('end')
+        _active_profiler = None
+        self.sampler.stop()
+        if self.trace_memory:
+            tracemalloc.stop()
+            filters = [tracemalloc.Filter(False, pattern) for pattern in _SNAPSHOT_FILTERS]
+            self.snapshots = [(name, elapsed, snapshot.filter_traces(filters) if snapshot else None, current, peak)
+                              for name, elapsed, snapshot, current, peak in self.snapshots]
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.sampler.write_folded(os.path.join(self.output_dir, 'profile.folded'))
+        summary = self.sampler.summary_lines(self.top_n)
+        with open(os.path.join(self.output_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(summary + [''] + self._stage_lines()) + '\n')
+        if self.trace_memory:
+            with open(os.path.join(self.output_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self._allocation_lines()) + '\n')
+
+        logger.info("🔬 Profile:")
+        for line in summary[:len(self.sampler.categories) + 3] + self._stage_lines():
+            logger.info(f"   {line}")
+        if self.trace_memory:
+            logger.info("   Timings include tracemalloc overhead; use --profile-no-memory for time-only numbers")
+        logger.info(f"🔬 Profile written to {self.output_dir} (flamegraph: flamegraph.pl profile.folded > profile.svg)")
+        return self.output_dir
+
+    def _stage_lines(self) -> List[str]:
+        lines = ["Stages (elapsed, traced memory now / peak):"]
+        previous = 0.0
+        for name, elapsed, _, current, peak in self.snapshots[1:]:
+            memory = f", {current / 1e6:.1f} / {peak / 1e6:.1f} MB" if self.trace_memory else ''
+            lines.append(f"  {name:<20} +{elapsed - previous:7.2f}s{memory}")
+            previous = elapsed
+        return lines
+
+    def _allocation_lines(self) -> List[str]:
+        """Allocation growth per stage, then what is still allocated at the end"""
+        lines = []
+        for (_, _, before, _, _), (name, _, after, current, peak) in zip(self.snapshots, self.snapshots[1:]):
+            lines.append(f"=== {name}: {current / 1e6:.1f} MB traced, peak {peak / 1e6:.1f} MB ===")
+            lines.append(f"Top {self.top_n} allocation sites by growth since the previous stage:")
+            for stat in after.compare_to(before, 'lineno')[:self.top_n]:
+                lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback}")
+            lines.append('')
+
+        final = self.snapshots[-1][2]
+        lines.append(f"=== Live at end: top {self.top_n} allocation sites ===")
+        for stat in final.statistics('lineno')[:self.top_n]:
+            lines.append(f"  {stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback}")
+        lines.append('')
+        lines.append(f"=== Live at end: top {min(self.top_n, 10)} call stacks ===")
+        for stat in final.statistics('traceback')[:min(self.top_n, 10)]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines.extend(f"  {line}" for line in stat.traceback.format())
+        return lines
+
+
+def replay_fixtures(fixture_dir: str, latency_ms: float = 0.0) -> Dict:
+    """
+    Serve saved responses locally and point the scraper and its state at throwaway paths
+
+    Nothing leaves the machine: feed and item pages come from fixture_dir
+    (recorded with HTTP_RECORD_DIR or benchmarks/fixtures.py), and the tracker,
+    stores, caches and sheet are written to a temporary directory. Notifications
+    are turned off and request pacing is removed, so a replayed profile shows
+    the scraper's own cost.
+
+    Args:
+        fixture_dir: Directory of recorded responses
+        latency_ms: Delay the replay server adds to every response
+
+    Returns:
+        Dict with the running 'server' and the temporary 'work_dir'
+    """
+    import tempfile
+    from utils.replay_server import ReplayServer, point_scraper_at
+    from config.settings import settings
+
+    work_dir = tempfile.mkdtemp(prefix='yad2-replay-')
+    server = ReplayServer(fixture_dir, latency_ms=latency_ms)
+    point_scraper_at(server.start())
+
+    settings.database_path = os.path.join(work_dir, 'seen_properties.db')
+    settings.scraper.listing_store_path = os.path.join(work_dir, 'listing_store.json')
+    settings.scraper.response_cache_path = os.path.join(work_dir, 'response_cache.db')
+    settings.scraper.history_path = os.path.join(work_dir, 'history')
+    settings.scraper.request_delay = 0
+    settings.google_sheets.backend = 'local'
+    settings.google_sheets.local_path = os.path.join(work_dir, 'sheet.csv')
+    settings.telegram_queue_path = os.path.join(work_dir, 'outbound_queue.db')
+    settings.enable_notifications = False
+    settings.notify_on_new_properties = False
+    settings.notify_on_error = False
+
+    logger.info(f"📼 Replaying {len(server.index)} saved responses from {fixture_dir}; state in {work_dir}")
+    return {'server': server, 'work_dir': work_dir}
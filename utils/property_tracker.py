@@ -1,75 +1,172 @@
+from __future__ import annotations
+
 import json
+import logging
 import os
-import pandas as pd
+import sqlite3
+import sys
+import threading
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import TYPE_CHECKING, Dict, Set, Iterable, List, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LISTING_STATE_COLUMNS = (
+    'listing_id', 'rent', 'vaad', 'arnona_month', 'entry_date', 'image_hash', 'address_key',
+    'status', 'missed_runs', 'first_seen', 'last_seen', 'last_changed',
+)
+
+
+def _json_default(value):
+    """Serialize pandas/numpy values found in property rows"""
+    pd = sys.modules.get('pandas')  # NA values only exist once pandas is loaded
+    if pd is not None and (value is pd.NA or value is pd.NaT):
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
 
 class PropertyTracker:
-    def __init__(self, database_path: str = 'data/seen_properties.json'):
+    def __init__(self, database_path: str = 'data/seen_properties.db'):
         """
         Initialize property tracker
-        
+
         Args:
-            database_path: Path to JSON file storing seen property IDs
+            database_path: Path to the SQLite database storing seen properties.
+                A legacy ``.json`` path is accepted; its IDs are migrated once into
+                a ``.db`` file next to it.
         """
-        self.database_path = database_path
-        self.seen_properties = self._load_seen_properties()
-        
+        base_path, extension = os.path.splitext(database_path)
+        if extension == '.json':
+            self.database_path = f"{base_path}.db"
+        else:
+            self.database_path = database_path
+        self.legacy_json_path = f"{base_path}.json"
+
         # Ensure data directory exists
-        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
-    
+        database_dir = os.path.dirname(self.database_path)
+        if database_dir:
+            os.makedirs(database_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        self._setup_database()
+        self._migrate_from_json()
+        self.seen_properties = self._load_seen_properties()
+
+    def _setup_database(self):
+        """Create tables and enable WAL so readers never block the writer"""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS properties (
+                    property_id TEXT PRIMARY KEY,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    property_data TEXT
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            # Last known fingerprint per listing, maintained by ChangeDetector
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS listing_state (
+                    listing_id TEXT PRIMARY KEY,
+                    rent REAL,
+                    vaad REAL,
+                    arnona_month REAL,
+                    entry_date TEXT,
+                    image_hash TEXT,
+                    address_key TEXT,
+                    status TEXT NOT NULL DEFAULT 'active',
+                    missed_runs INTEGER NOT NULL DEFAULT 0,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    last_changed TEXT NOT NULL
+                )
+            ''')
+
+    def _migrate_from_json(self):
+        """One-shot import of IDs from the legacy seen_properties.json file"""
+        if not os.path.exists(self.legacy_json_path) or self._get_meta('migrated_from_json'):
+            return
+
+        try:
+            with open(self.legacy_json_path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return
+
+        seen_at = data.get('last_updated') or datetime.now().isoformat()
+        rows = [(str(property_id), seen_at, seen_at) for property_id in data.get('seen_ids', [])]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO properties (property_id, first_seen, last_seen) VALUES (?, ?, ?)',
+                rows
+            )
+            self._set_meta('migrated_from_json', datetime.now().isoformat())
+            self._set_meta('last_updated', seen_at)
+        logger.info(f"📦 Migrated {len(rows)} seen properties from {self.legacy_json_path}")
+
     def _load_seen_properties(self) -> Set[str]:
-        """Load previously seen property IDs from file"""
-        if os.path.exists(self.database_path):
-            try:
-                with open(self.database_path, 'r') as f:
-                    data = json.load(f)
-                    return set(data.get('seen_ids', []))
-            except (json.JSONDecodeError, FileNotFoundError):
-                return set()
-        return set()
-    
-    def _save_seen_properties(self):
-        """Save seen property IDs to file"""
-        data = {
-            'seen_ids': list(self.seen_properties),
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        with open(self.database_path, 'w') as f:
-            json.dump(data, f, indent=2)
-    
+        """Load previously seen property IDs from the database"""
+        with get_metrics().stage('tracker_io'), self._lock:
+            return {row[0] for row in self._conn.execute('SELECT property_id FROM properties')}
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        """Write a meta value; caller holds the lock and the transaction"""
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
     def get_new_properties(self, current_properties: pd.DataFrame) -> pd.DataFrame:
         """
         Identify new properties that haven't been seen before
-        
+
         Args:
             current_properties: DataFrame with current property listings
-            
+
         Returns:
             DataFrame containing only new properties
         """
         if current_properties.empty:
             return current_properties
-        
+
         # Filter out properties we've already seen
-        new_mask = ~current_properties['listing_id'].isin(self.seen_properties)
-        new_properties = current_properties[new_mask].copy()
-        
+        with get_metrics().stage('tracker_io'):
+            new_mask = ~current_properties['listing_id'].isin(self.seen_properties)
+            new_properties = current_properties[new_mask].copy()
+
         return new_properties
-    
+
     def mark_properties_as_seen(self, properties: pd.DataFrame):
         """
         Mark properties as seen and save to database
-        
+
         Args:
             properties: DataFrame containing properties to mark as seen
         """
         if not properties.empty:
-            new_ids = set(properties['listing_id'].astype(str))
-            self.seen_properties.update(new_ids)
-            self._save_seen_properties()
-    
+            self.add_properties(zip(properties['listing_id'], properties.to_dict('records')))
+
     def get_stats(self) -> Dict:
         """Get statistics about tracked properties"""
         return {
@@ -77,37 +174,135 @@ class PropertyTracker:
             'database_path': self.database_path,
             'last_updated': self._get_last_updated()
         }
-    
+
     def _get_last_updated(self) -> str:
         """Get last updated timestamp from database"""
-        if os.path.exists(self.database_path):
-            try:
-                with open(self.database_path, 'r') as f:
-                    data = json.load(f)
-                    return data.get('last_updated', 'Unknown')
-            except (json.JSONDecodeError, FileNotFoundError):
-                return 'Unknown'
-        return 'Never'
-    
+        return self._get_meta('last_updated') or 'Never'
+
     def property_exists(self, property_id: str) -> bool:
         """
         Check if a property ID has been seen before
-        
+
         Args:
             property_id: The property ID to check
-            
+
         Returns:
             True if property has been seen before, False otherwise
         """
         return str(property_id) in self.seen_properties
-    
+
+    def seen_snapshot(self) -> frozenset:
+        """
+        Seen property IDs as of now, unaffected by properties added later
+
+        Returns:
+            Frozen copy of the seen IDs
+        """
+        with self._lock:
+            return frozenset(self.seen_properties)
+
+    def get_property_data(self, property_id: str) -> Optional[Dict]:
+        """
+        Return the stored data for a property
+
+        Args:
+            property_id: The property ID to look up
+
+        Returns:
+            The property data recorded when it was added, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT property_data FROM properties WHERE property_id = ?', (str(property_id),)
+            ).fetchone()
+        if row and row[0]:
+            return json.loads(row[0])
+        return None
+
     def add_property(self, property_id: str, property_data: Dict = None):
         """
         Add a property to the seen properties list
-        
+
         Args:
             property_id: The property ID to add
-            property_data: Optional property data (for future use)
+            property_data: Optional property data stored alongside the ID
+        """
+        self.add_properties([(property_id, property_data)])
+
+    def add_properties(self, properties: Iterable[Tuple[str, Optional[Dict]]]):
         """
-        self.seen_properties.add(str(property_id))
-        self._save_seen_properties()
\ No newline at end of file
+        Add many properties in a single transaction
+
+        Args:
+            properties: Iterable of (property_id, property_data) pairs
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for property_id, property_data in properties:
+            data_json = None
+            if property_data is not None:
+                data_json = json.dumps(property_data, ensure_ascii=False, default=_json_default)
+            rows.append((str(property_id), now, now, data_json))
+
+        if not rows:
+            return
+
+        metrics = get_metrics()
+        with metrics.stage('tracker_io'), self._lock, self._conn:
+            self._conn.executemany('''
+                INSERT INTO properties (property_id, first_seen, last_seen, property_data)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(property_id) DO UPDATE SET
+                    last_seen = excluded.last_seen,
+                    property_data = COALESCE(excluded.property_data, properties.property_data)
+            ''', rows)
+            self._set_meta('last_updated', now)
+            self.seen_properties.update(row[0] for row in rows)
+        metrics.inc('stage_items_total', len(rows), stage='tracker_io')
+
+    def load_listing_state(self) -> pd.DataFrame:
+        """
+        Load every listing's last known fingerprint in one query
+
+        Returns:
+            DataFrame with one row per listing_id and the listing_state columns
+        """
+        import pandas as pd
+        with get_metrics().stage('tracker_io'), self._lock:
+            cursor = self._conn.execute(f'SELECT {", ".join(LISTING_STATE_COLUMNS)} FROM listing_state')
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=list(LISTING_STATE_COLUMNS))
+
+    def load_repost_keys(self) -> List[Tuple]:
+        """
+        Load the columns a repost is matched on, without building a DataFrame
+
+        Returns:
+            (image_hash, address_key, status) per stored listing
+        """
+        with get_metrics().stage('tracker_io'), self._lock:
+            return self._conn.execute('SELECT image_hash, address_key, status FROM listing_state').fetchall()
+
+    def save_listing_state(self, rows: Iterable[Tuple]):
+        """
+        Insert or replace listing fingerprints in a single transaction
+
+        Args:
+            rows: Tuples in LISTING_STATE_COLUMNS order
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        placeholders = ', '.join('?' * len(LISTING_STATE_COLUMNS))
+        metrics = get_metrics()
+        with metrics.stage('tracker_io'), self._lock, self._conn:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO listing_state ({", ".join(LISTING_STATE_COLUMNS)}) VALUES ({placeholders})',
+                rows
+            )
+        metrics.inc('stage_items_total', len(rows), stage='tracker_io')
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
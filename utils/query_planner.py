@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.field_extractor import extract_feed_entry
+
+# Range filters: (min param, max param, field compared against)
+RANGE_FILTERS = [
+    ('minRooms', 'maxRooms', 'rooms'),
+    ('minPrice', 'maxPrice', 'rent'),
+    ('minFloor', 'maxFloor', 'floor'),
+]
+
+# Amenity flags that can be re-checked client-side; the planner drops one from a
+# merged feed query only when the feed payload carries it (see plan_queries)
+FLAG_FILTERS = {
+    'elevator': 'elevator',
+    'balcony': 'balcony',
+    'renovated': 'renovated',
+    'parking': 'parking',
+    'shelter': 'mamad',
+}
+
+RANGE_PARAMS = {param for pair in RANGE_FILTERS for param in pair[:2]}
+
+
+def _to_number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def plan_queries(search_configs: List[Dict], default_max_pages: int = 5,
+                 feed_flags: Iterable[str] = ()) -> List[Dict]:
+    """
+    Merge overlapping search configs into fewer, wider feed queries
+
+    Configs are grouped by their non-relaxable params (city, imageOnly, ...).
+    Within a group, ranges are widened to cover every member and amenity flags
+    are kept only when all members require them. The page budget of a merged
+    query is the sum of its members' budgets.
+
+    Only filters readable from the feed are relaxed: the range fields always
+    are, amenity flags only when listed in feed_flags. A flag the feed lacks
+    cannot be checked before the item page is fetched, so merging across it
+    would cost an item fetch for every listing the wider query pulls in.
+    Configs that differ in such a flag stay in separate queries.
+
+    Args:
+        search_configs: Entries shaped like SEARCH_CONFIGURATIONS
+        default_max_pages: Page budget for configs that do not set max_pages
+        feed_flags: Amenity flag params (keys of FLAG_FILTERS) whose fields the
+            feed entries carry
+
+    Returns:
+        Query configs with 'name', 'params', 'max_pages' and 'members' (the original configs)
+    """
+    relaxable = RANGE_PARAMS | (set(FLAG_FILTERS) & set(feed_flags))
+    groups: Dict[Tuple, List[Dict]] = {}
+    for config in search_configs:
+        fixed = tuple(sorted(
+            (key, str(value)) for key, value in config['params'].items() if key not in relaxable
+        ))
+        groups.setdefault(fixed, []).append(config)
+
+    queries = []
+    for fixed, members in groups.items():
+        params = dict(fixed)
+
+        for min_param, max_param, _ in RANGE_FILTERS:
+            mins = [_to_number(m['params'].get(min_param)) for m in members]
+            maxs = [_to_number(m['params'].get(max_param)) for m in members]
+            if all(value is not None for value in mins):
+                params[min_param] = _format_number(min(mins))
+            if all(value is not None for value in maxs):
+                params[max_param] = _format_number(max(maxs))
+
+        for flag in FLAG_FILTERS:
+            values = {m['params'].get(flag) for m in members}
+            if len(values) == 1 and None not in values:
+                params[flag] = values.pop()
+
+        queries.append({
+            'name': " + ".join(m['name'] for m in members),
+            'params': params,
+            'max_pages': sum(m.get('max_pages', default_max_pages) for m in members),
+            'members': members,
+        })
+
+    return queries
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
+
+
+def feed_fields(listing: Dict) -> Dict:
+    """Matchable fields of a feed entry; fields the feed does not carry are None"""
+    return extract_feed_entry(listing)
+
+
+def detail_fields(property_details: Dict) -> Dict:
+    """Matchable fields of a scraped property_details row"""
+    fields = {field: property_details.get(field) for _, _, field in RANGE_FILTERS}
+    for field in FLAG_FILTERS.values():
+        fields[field] = property_details.get(field)
+    return fields
+
+
+def config_matches(params: Dict, fields: Dict) -> bool:
+    """
+    Check a listing against one search config's relaxable filters
+
+    Unknown fields (None) pass, so feed entries that lack a field are kept
+    until their item page can confirm it.
+    """
+    for min_param, max_param, field in RANGE_FILTERS:
+        value = _to_number(fields.get(field))
+        if value is None:
+            continue
+        low = _to_number(params.get(min_param))
+        high = _to_number(params.get(max_param))
+        if (low is not None and value < low) or (high is not None and value > high):
+            return False
+
+    for flag, field in FLAG_FILTERS.items():
+        if params.get(flag) == '1' and fields.get(field) is False:
+            return False
+
+    return True
+
+
+def matching_searches(configs: Iterable[Dict], fields: Dict) -> List[str]:
+    """Names of the configs a listing belongs to"""
+    return [config['name'] for config in configs if config_matches(config['params'], fields)]
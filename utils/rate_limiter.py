@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RateLimiter:
+    def __init__(self,
+                 requests_per_second: float,
+                 max_rate: Optional[float] = None,
+                 min_rate: float = 0.1,
+                 burst: float = 1.0,
+                 increase_factor: float = 1.05,
+                 decrease_factor: float = 0.5):
+        """
+        Initialize an adaptive, thread-safe token-bucket rate limiter
+
+        The rate creeps up towards max_rate while responses are healthy and is
+        cut back on throttling (429, 5xx, captcha pages).
+
+        Args:
+            requests_per_second: Starting rate. Values <= 0 disable limiting.
+            max_rate: Ceiling the rate may grow to (defaults to the starting rate)
+            min_rate: Floor the rate is never cut below
+            burst: Bucket capacity, i.e. requests allowed back-to-back
+            increase_factor: Multiplier applied to the rate after a healthy response
+            decrease_factor: Multiplier applied to the rate after a throttled response
+        """
+        self.enabled = requests_per_second > 0
+        self.rate = requests_per_second
+        self.max_rate = max(max_rate or requests_per_second, requests_per_second)
+        self.min_rate = min(min_rate, requests_per_second) if self.enabled else min_rate
+        self.burst = max(burst, 1.0)
+        self.increase_factor = increase_factor
+        self.decrease_factor = decrease_factor
+
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+    def acquire(self):
+        """Block until the caller is allowed to make the next request"""
+        if not self.enabled:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def record_success(self):
+        """Speed up after a healthy response"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * self.increase_factor)
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """
+        Slow down after a throttled or failed response
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if any
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            self._last_refill = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+class HostRateLimiters:
+    def __init__(self,
+                 default_limits: Tuple[float, float],
+                 host_limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Initialize a registry holding one adaptive limiter per host
+
+        Args:
+            default_limits: (starting rate, max rate) for hosts without an override
+            host_limits: Per-host (starting rate, max rate) overrides
+        """
+        self.default_limits = default_limits
+        self.host_limits = host_limits or {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_host(self, host: str) -> RateLimiter:
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(host)
+                if limiter is None:
+                    rate, max_rate = self.host_limits.get(host, self.default_limits)
+                    limiter = RateLimiter(rate, max_rate=max_rate)
+                    self._limiters[host] = limiter
+        return limiter
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config.search_configs import SCRAPER_CONFIG
+from utils.http_recorder import fixture_key, load_fixture_index
+
+
+class ReplayServer:
+    def __init__(self, fixture_dir, host='127.0.0.1', port=0,
+                 latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None):
+        """
+        Initialize a threaded HTTP server replaying recorded feed and item pages
+
+        Responses carry an ETag so conditional GETs are answered with 304.
+
+        Args:
+            fixture_dir: Directory written by ResponseRecorder
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency_ms: Delay added to every response
+            jitter_ms: Uniform random extra delay on top of latency_ms
+            error_rate: Fraction of requests answered with error_status instead
+            error_status: Status code used for injected errors
+            seed: Seed for the latency/error random generator
+        """
+        self.fixture_dir = fixture_dir
+        self.index = load_fixture_index(fixture_dir)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.requests_served = 0
+        self.errors_injected = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, content_type, body = server.respond(self.path)
+                etag = None
+                if status == 200:
+                    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        status, body = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(self, path):
+        """Pick the status, content type and body for a request path"""
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            inject_error = self.error_rate and self.random.random() < self.error_rate
+            if inject_error:
+                self.errors_injected += 1
+        if delay:
+            time.sleep(delay)
+
+        if inject_error:
+            return self.error_status, 'text/plain', b'injected error'
+
+        entry = self.index.get(fixture_key(path))
+        if entry is None:
+            return 404, 'text/plain', b'no fixture recorded for this request'
+
+        with open(os.path.join(self.fixture_dir, entry['file']), 'rb') as f:
+            body = f.read()
+        return entry.get('status', 200), entry.get('content_type', 'text/html; charset=utf-8'), body
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def point_scraper_at(base_url):
+    """Redirect SCRAPER_CONFIG (read by Yad2Scraper at call time) to a replay server"""
+    SCRAPER_CONFIG["url"] = f"{base_url}/realestate/rent"
+    SCRAPER_CONFIG["base_url"] = base_url
+    SCRAPER_CONFIG["base_item_url"] = f"{base_url}/realestate/item/"
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    token: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: str
+    details: Optional[Dict]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators for a conditional GET"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, cache_path: str = 'data/response_cache.db',
+                 ttl_hours: float = 72.0, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Initialize a disk-backed cache of item-page responses keyed by token
+
+        Bodies are stored zlib-compressed together with their validators
+        (ETag/Last-Modified) and the property_details parsed from them.
+
+        Args:
+            cache_path: SQLite file holding the cache
+            ttl_hours: Entries not revalidated for this long are dropped
+            max_bytes: Compressed-size budget; least recently used entries are evicted beyond it
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    token TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body BLOB NOT NULL,
+                    body_size INTEGER NOT NULL,
+                    body_hash TEXT NOT NULL,
+                    details TEXT,
+                    validated_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    @staticmethod
+    def body_hash(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()
+
+    def get(self, token: str) -> Optional[CacheEntry]:
+        """Return the cached entry for a token, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, body_hash, details, validated_at FROM responses WHERE token = ?',
+                (token,)
+            ).fetchone()
+            if row and time.time() - row[4] > self.ttl:
+                with self._conn:
+                    self._conn.execute('DELETE FROM responses WHERE token = ?', (token,))
+                row = None
+        if row is None:
+            return None
+        return CacheEntry(token, row[0], row[1], row[2], json.loads(row[3]) if row[3] else None)
+
+    def get_body(self, token: str) -> Optional[bytes]:
+        """Decompressed body of a cached response"""
+        with self._lock:
+            row = self._conn.execute('SELECT body FROM responses WHERE token = ?', (token,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def touch(self, token: str):
+        """Mark an entry as revalidated (304 or identical body) and recently used"""
+        now = time.time()
+        with self._lock, self._conn:
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE responses SET validated_at = ?, accessed_at = ? WHERE token = ?', (now, now, token)
+            )
+
+    def put(self, token: str, body: bytes, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, details: Optional[Dict] = None):
+        """Store a fresh response and evict least recently used entries over the size budget"""
+        now = time.time()
+        compressed = zlib.compress(body, 6)
+        details_json = json.dumps(details, ensure_ascii=False, default=str) if details is not None else None
+        with self._lock, self._conn:
+            self.misses += 1
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses
+                    (token, etag, last_modified, body, body_size, body_hash, details, validated_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (token, etag, last_modified, compressed, len(compressed), self.body_hash(body),
+                  details_json, now, now))
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then LRU entries until under max_bytes; caller holds the lock"""
+        self._conn.execute('DELETE FROM responses WHERE validated_at < ?', (time.time() - self.ttl,))
+        total = self._conn.execute('SELECT COALESCE(SUM(body_size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for token, size in self._conn.execute('SELECT token, body_size FROM responses ORDER BY accessed_at'):
+            victims.append((token,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany('DELETE FROM responses WHERE token = ?', victims)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(body_size), 0) FROM responses'
+            ).fetchone()
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()